@@ -2,18 +2,19 @@ from dotenv import load_dotenv
 from flask import Flask, request
 
 from api_utils import (
-    get_db_connection,
+    pooled_connection,
     get_case_by_citation,
     get_case_by_date_range,
     get_case_by_verdict,
+    search_cases,
     get_judges,
+    search_judges,
     get_judge,
     get_cases_sat_by_judge
 )
 
 load_dotenv()
 api = Flask(__name__)
-conn = get_db_connection()
 
 
 @api.get("/")
@@ -48,42 +49,72 @@ def route_get_case():
     if (start and not end) or (end and not start):
         return {"error": True, "reason": "must provide start and end date together"}, 400
 
-    if citation:
-        return get_case_by_citation(conn, citation)
+    with pooled_connection() as conn:
+        if citation:
+            return get_case_by_citation(conn, citation)
 
-    if start and end and favour:
-        date_cases, status = get_case_by_date_range(conn, start, end)
-        if status >= 400:
-            return date_cases, status
-        favour_cases, status = get_case_by_verdict(conn, favour)
-        if status >= 400:
-            return favour_cases, status
-        by_favour = list(filter(lambda case: case in favour_cases, date_cases))
-        return by_favour, 200
+        if start and end and favour:
+            date_cases, status = get_case_by_date_range(conn, start, end)
+            if status >= 400:
+                return date_cases, status
+            favour_cases, status = get_case_by_verdict(conn, favour)
+            if status >= 400:
+                return favour_cases, status
+            by_favour = list(filter(lambda case: case in favour_cases, date_cases))
+            return by_favour, 200
 
-    if start and end:
-        return get_case_by_date_range(conn, start, end)
+        if start and end:
+            return get_case_by_date_range(conn, start, end)
 
-    if favour:
         return get_case_by_verdict(conn, favour)
 
 
+@api.get("/case/search")
+def route_search_cases():
+    """
+    Route for searching cases by the words in their title, summary & anomalies.
+
+    - `q` is the search, which supports "quoted phrases", OR, and -excluded words.
+    - Results are ranked by relevance, and paged with `limit` (default 20) & `offset`.
+    """
+    with pooled_connection() as conn:
+        return search_cases(conn,
+                            request.args.get("q", ""),
+                            request.args.get("limit", "20"),
+                            request.args.get("offset", "0"))
+
+
 @api.get("/judge")
 def route_get_all_judges():
     """Route for fetching all judges."""
-    return get_judges(conn), 200
+    with pooled_connection() as conn:
+        return get_judges(conn), 200
+
+
+@api.get("/judge/search")
+def route_search_judges():
+    """
+    Route for searching judges by name.
+
+    - `q` is the name, or part of it, which may be misspelt.
+    - Returns at most `limit` (default 20) judges, closest match first.
+    """
+    with pooled_connection() as conn:
+        return search_judges(conn, request.args.get("q", ""), request.args.get("limit", "20"))
 
 
 @api.get("/judge/<int:judge_id>")
 def route_get_judge(judge_id: int):
     """Return for fetching judge by ID."""
-    return get_judge(conn, judge_id)
+    with pooled_connection() as conn:
+        return get_judge(conn, judge_id)
 
 
 @api.get("/judge/<int:judge_id>/case")
 def route_get_judge_cases(judge_id: int):
     """Return all cases sat by a judge."""
-    return get_cases_sat_by_judge(conn, judge_id)
+    with pooled_connection() as conn:
+        return get_cases_sat_by_judge(conn, judge_id)
 
 
 if __name__ == "__main__":
@@ -1,39 +1,37 @@
 """Utility functions for the API."""
 
-from os import environ as ENV
 from datetime import datetime
+from contextlib import contextmanager
 
-import psycopg2
 from psycopg2.extensions import connection
 from psycopg2.extras import RealDictCursor
 
+import rds_pool
+
+rds_pool.configure(default_max_connections=10)
 
-def get_db_connection() -> connection:
-    """Return a connection to a PostgreSQL server."""
-    try:
-        return psycopg2.connect(
-            dbname=ENV["DB_NAME"],
-            host=ENV["DB_HOST"],
-            port=ENV["DB_PORT"],
-            user=ENV["DB_USERNAME"],
-            password=ENV["DB_PASSWORD"],
-            cursor_factory=RealDictCursor
-        )
-    except psycopg2.errors.Error as e:
-        raise ConnectionError(f"Connection to {ENV['DB_NAME']} failed") from e
+
+@contextmanager
+def pooled_connection():
+    """Context manager which checks a connection, returning rows as dicts, out of the
+    shared pool and always returns it."""
+    with rds_pool.pooled_connection(RealDictCursor) as conn:
+        yield conn
 
 
 def get_case_by_citation(conn: connection, citation: str) -> tuple[dict, int]:
     """Get a case by its citation."""
+    # Found through hearing_citation, so only the hearing's own partition is scanned
     query = """
     SELECT
         hearing_title, hearing_citation, hearing_date,
         hearing_description, hearing_anomaly, judgement_favour,
         court_name, hearing_url, judge_id
-    FROM hearing
+    FROM hearing_citation
+    JOIN hearing USING (hearing_citation, hearing_id, hearing_date)
     JOIN court USING (court_id)
     JOIN judgement USING (judgement_id)
-    JOIN judge_hearing USING (hearing_id)
+    JOIN judge_hearing USING (hearing_id, hearing_date)
     JOIN judge USING (judge_id)
     WHERE hearing_citation=%s
     """
@@ -67,7 +65,7 @@ def get_case_by_date_range(
     FROM hearing
     JOIN court USING (court_id)
     JOIN judgement USING (judgement_id)
-    JOIN judge_hearing USING (hearing_id)
+    JOIN judge_hearing USING (hearing_id, hearing_date)
     JOIN judge USING (judge_id)
     WHERE
         hearing_date >= %s AND
@@ -95,7 +93,7 @@ def get_case_by_verdict(
     FROM hearing
     JOIN court USING (court_id)
     JOIN judgement USING (judgement_id)
-    JOIN judge_hearing USING (hearing_id)
+    JOIN judge_hearing USING (hearing_id, hearing_date)
     JOIN judge USING (judge_id)
     WHERE
         judgement_favour=%s
@@ -106,6 +104,49 @@ def get_case_by_verdict(
     return list(results), 200
 
 
+def search_cases(
+        conn: connection,
+        search: str,
+        limit: str = "20",
+        offset: str = "0"
+) -> tuple[list[dict], int] | tuple[dict, int]:
+    """Returns the cases best matching the words in `search` (in web search syntax, e.g.
+    "quoted phrases", or -excluded words), ranked, with a snippet of each summary
+    highlighting the matches."""
+    if not search or not search.strip():
+        return {"error": True, "reason": "q must not be empty"}, 400
+    if not (limit.isdigit() and offset.isdigit()) or not 1 <= int(limit) <= 100:
+        return {"error": True,
+                "reason": "limit must be 1-100, and offset a non-negative integer"}, 400
+
+    # Only the page of matches is highlighted, as ts_headline re-parses each summary
+    query = """
+    SELECT
+        hearing_title, hearing_citation, hearing_date,
+        hearing_description, hearing_anomaly, judgement_favour,
+        court_name, hearing_url, rank,
+        ts_headline('english', COALESCE(hearing_description, ''), search_query,
+                    'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MinWords=10, MaxWords=30')
+            AS snippet
+    FROM (
+        SELECT
+            hearing.*, search_query,
+            ts_rank_cd(hearing_search, search_query) AS rank
+        FROM hearing, websearch_to_tsquery('english', %s) AS search_query
+        WHERE hearing_search @@ search_query
+        ORDER BY rank DESC, hearing_date DESC
+        LIMIT %s OFFSET %s
+    ) AS matches
+    JOIN court USING (court_id)
+    LEFT JOIN judgement USING (judgement_id)
+    ORDER BY rank DESC, hearing_date DESC
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, (search, int(limit), int(offset)))
+        results = cur.fetchall()
+    return list(results), 200
+
+
 def get_judges(conn: connection) -> list[dict]:
     """Retrieves full records of each judge in DB."""
     query = """
@@ -118,6 +159,34 @@ def get_judges(conn: connection) -> list[dict]:
     return list(results)
 
 
+def search_judges(
+        conn: connection,
+        search: str,
+        limit: str = "20"
+) -> tuple[list[dict], int] | tuple[dict, int]:
+    """Returns the judges whose names best match `search`, allowing for misspellings & partial
+    names (e.g. "brig" or "brigs" for Briggs), most similar first, with their similarity `score`."""
+    if not search or not search.strip():
+        return {"error": True, "reason": "q must not be empty"}, 400
+    if not limit.isdigit() or not 1 <= int(limit) <= 100:
+        return {"error": True, "reason": "limit must be 1-100"}, 400
+
+    query = """
+    SELECT
+        judge_id, title_name, first_name, middle_name, last_name,
+        word_similarity(LOWER(%s), judge_name) AS score
+    FROM judge
+    LEFT JOIN title USING (title_id)
+    WHERE LOWER(%s) <%% judge_name
+    ORDER BY score DESC, last_name
+    LIMIT %s
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, (search, search, int(limit)))
+        results = cur.fetchall()
+    return list(results), 200
+
+
 def get_judge(conn: connection, judge_id: int) -> dict:
     """Retrieves a specific judge by their ID."""
     query = """
@@ -141,7 +210,7 @@ def get_cases_sat_by_judge(conn: connection, judge_id) -> list[dict]:
     FROM hearing
     JOIN court USING (court_id)
     JOIN judgement USING (judgement_id)
-    JOIN judge_hearing USING (hearing_id)
+    JOIN judge_hearing USING (hearing_id, hearing_date)
     JOIN judge USING (judge_id)
     WHERE
         judge_id=%s
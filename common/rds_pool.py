@@ -0,0 +1,158 @@
+"""A process-wide pool of connections to the RDS, shared by every service.
+
+This is the only copy: the pipeline, API, email Lambda & dashboard each link it into their
+own directory, and their Dockerfiles copy it in from the `common` build context.
+
+The pool is created on first use and kept at module level, so warm Lambda invocations and
+Streamlit reruns reuse the same connections rather than reconnecting. Each service may
+`configure` it before first use, e.g. with its own connection class or pool size.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from os import environ as ENV
+
+from psycopg2 import Error, InterfaceError, OperationalError
+from psycopg2.extensions import connection
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from dotenv import load_dotenv
+
+DEFAULT_MAX_CONNECTIONS = 8
+# Connections idle for longer than this are checked before reuse, as the RDS may have dropped them
+HEALTH_CHECK_IDLE_SECONDS = 60
+# Seconds to wait before retrying a checkout from an exhausted pool, doubled on each retry
+EXHAUSTED_BACKOFF_SECONDS = 0.5
+
+_pool = None
+_pool_lock = threading.Lock()
+_connection_factory = None
+_default_max_connections = DEFAULT_MAX_CONNECTIONS
+# When each idle connection was returned to the pool, by id
+_released_at = {}
+_released_at_lock = threading.Lock()
+
+
+def configure(connection_factory=None,
+              default_max_connections: int = DEFAULT_MAX_CONNECTIONS) -> None:
+    """
+    Sets the class of the pool's connections, and its size unless `DB_POOL_MAX_CONNECTIONS`
+    is set. Any existing pool is closed, so the next checkout opens a new one.
+    """
+    global _connection_factory, _default_max_connections  # pylint: disable=global-statement
+    _connection_factory = connection_factory
+    _default_max_connections = default_max_connections
+    close_pool()
+
+
+def get_pool() -> ThreadedConnectionPool:
+    """Returns the connection pool, creating it on first use."""
+    global _pool  # pylint: disable=global-statement
+    pool = _pool
+    if pool is not None and not pool.closed:
+        return pool
+    # Threads checking out their first connection at once must share one pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            load_dotenv()
+            try:
+                _pool = ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=int(ENV.get("DB_POOL_MAX_CONNECTIONS", _default_max_connections)),
+                    dbname=ENV["DB_NAME"],
+                    host=ENV["DB_HOST"],
+                    port=ENV["DB_PORT"],
+                    user=ENV["DB_USERNAME"],
+                    password=ENV["DB_PASSWORD"],
+                    connection_factory=_connection_factory
+                )
+            except Error as e:
+                raise ConnectionError(f"Connection to {ENV['DB_NAME']} failed") from e
+            logging.info("Created RDS connection pool.")
+        return _pool
+
+
+def is_healthy(conn: connection) -> bool:
+    """Checks that `conn` is still open and can reach the DB."""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except (OperationalError, InterfaceError):
+        return False
+
+
+def needs_health_check(conn: connection) -> bool:
+    """Checks whether `conn` has sat idle in the pool long enough that the RDS may have dropped it.
+    Connections which have just been opened are never checked."""
+    with _released_at_lock:
+        released_at = _released_at.pop(id(conn), None)
+    return released_at is not None and time.monotonic() - released_at > HEALTH_CHECK_IDLE_SECONDS
+
+
+def get_connection(cursor_factory=None, retries: int = 2) -> connection:
+    """
+    Checks a healthy connection out of the pool, with `cursor_factory` as its default
+    cursor. Broken connections (e.g. after an RDS restart) are discarded and replaced,
+    and if every connection is in use, the checkout is retried with exponential backoff.
+    """
+    pool = get_pool()
+    for attempt in range(retries + 1):
+        try:
+            conn = pool.getconn()
+        except PoolError:
+            logging.warning("RDS connection pool exhausted, retrying.")
+            time.sleep(EXHAUSTED_BACKOFF_SECONDS * 2 ** attempt)
+            continue
+        except OperationalError as e:
+            logging.warning("Could not open RDS connection: %s", e)
+            continue
+        if not conn.closed and (not needs_health_check(conn) or is_healthy(conn)):
+            conn.cursor_factory = cursor_factory
+            return conn
+        logging.warning("Discarding broken RDS connection.")
+        pool.putconn(conn, close=True)
+    raise ConnectionError(f"Connection to {ENV['DB_NAME']} failed")
+
+
+def release_connection(conn: connection) -> None:
+    """Returns `conn` to the pool, rolling back anything left uncommitted."""
+    if conn is None:
+        return
+    if not conn.closed:
+        try:
+            conn.rollback()
+        except (OperationalError, InterfaceError):
+            pass
+    with _released_at_lock:
+        _released_at[id(conn)] = time.monotonic()
+    get_pool().putconn(conn, close=bool(conn.closed))
+    # The pool closes connections it has no room to keep idle
+    if conn.closed:
+        with _released_at_lock:
+            _released_at.pop(id(conn), None)
+
+
+@contextmanager
+def pooled_connection(cursor_factory=None):
+    """Context manager which checks out a connection and always returns it to the pool."""
+    conn = get_connection(cursor_factory)
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+
+def close_pool() -> None:
+    """Closes every connection in the pool."""
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+    with _released_at_lock:
+        _released_at.clear()
@@ -0,0 +1,122 @@
+# pylint: skip-file
+
+"""Tests for the shared RDS connection pool."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from psycopg2 import OperationalError
+from psycopg2.pool import PoolError
+
+import rds_pool
+
+
+def make_conn(healthy=True):
+    conn = MagicMock(closed=0)
+    if not healthy:
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = OperationalError
+    return conn
+
+
+def test_is_healthy_closed_connection():
+    """Check a closed connection is never healthy."""
+    assert not rds_pool.is_healthy(MagicMock(closed=1))
+
+
+def make_idle(*conns, seconds=rds_pool.HEALTH_CHECK_IDLE_SECONDS + 1):
+    """Returns released-at times as if `conns` had been idle in the pool for `seconds`."""
+    return {id(conn): time.monotonic() - seconds for conn in conns}
+
+
+def test_get_connection_replaces_broken_connection():
+    """Check broken connections are discarded and a healthy one returned."""
+    broken, healthy = make_conn(False), make_conn()
+    pool = MagicMock()
+    pool.getconn.side_effect = [broken, healthy]
+    with patch("rds_pool.get_pool", return_value=pool), \
+            patch.dict("rds_pool._released_at", make_idle(broken, healthy)):
+        conn = rds_pool.get_connection(cursor_factory="factory")
+    assert conn is healthy
+    assert conn.cursor_factory == "factory"
+    pool.putconn.assert_called_once_with(broken, close=True)
+
+
+@pytest.mark.parametrize("seconds", [0, None])
+def test_get_connection_skips_health_check(seconds):
+    """Check recently released or newly opened connections are handed out without a round trip."""
+    conn = make_conn(False)
+    pool = MagicMock()
+    pool.getconn.return_value = conn
+    idle = make_idle(conn, seconds=seconds) if seconds is not None else {}
+    with patch("rds_pool.get_pool", return_value=pool), patch.dict("rds_pool._released_at", idle):
+        assert rds_pool.get_connection() is conn
+    conn.cursor.assert_not_called()
+
+
+def test_get_connection_gives_up():
+    """Check a ConnectionError is raised once retries are used up."""
+    pool = MagicMock()
+    pool.getconn.side_effect = lambda: MagicMock(closed=1)
+    with patch("rds_pool.get_pool", return_value=pool), \
+            patch.dict("rds_pool.ENV", {"DB_NAME": "courts"}):
+        with pytest.raises(ConnectionError):
+            rds_pool.get_connection(retries=1)
+    assert pool.getconn.call_count == 2
+
+
+def test_get_connection_waits_for_exhausted_pool():
+    """Check checkouts from an exhausted pool are retried with exponential backoff."""
+    conn = make_conn()
+    pool = MagicMock()
+    pool.getconn.side_effect = [PoolError("connection pool exhausted"),
+                                PoolError("connection pool exhausted"), conn]
+    with patch("rds_pool.get_pool", return_value=pool), patch("rds_pool.time.sleep") as sleep:
+        assert rds_pool.get_connection() is conn
+    assert [call.args[0] for call in sleep.call_args_list] == [
+        rds_pool.EXHAUSTED_BACKOFF_SECONDS, rds_pool.EXHAUSTED_BACKOFF_SECONDS * 2]
+
+
+def test_get_pool_created_once():
+    """Check threads checking out their first connection at once share one pool."""
+    env = {"DB_NAME": "courts", "DB_HOST": "host", "DB_PORT": "5432",
+           "DB_USERNAME": "user", "DB_PASSWORD": "password"}
+    with patch("rds_pool._pool", None), \
+            patch("rds_pool.ThreadedConnectionPool") as pool_class, \
+            patch("rds_pool.load_dotenv"), patch.dict("rds_pool.ENV", env, clear=True):
+        pool_class.return_value.closed = False
+        threads = [threading.Thread(target=rds_pool.get_pool) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    pool_class.assert_called_once()
+
+
+def test_pooled_connection_always_released():
+    """Check a connection is returned to the pool even if an error is raised."""
+    conn = make_conn()
+    pool = MagicMock()
+    pool.getconn.return_value = conn
+    with patch("rds_pool.get_pool", return_value=pool):
+        with pytest.raises(RuntimeError):
+            with rds_pool.pooled_connection():
+                raise RuntimeError
+    pool.putconn.assert_called_once_with(conn, close=False)
+
+
+def test_configure_sets_connection_class_and_size():
+    """Check the pool is reopened with the configured connection class & default size."""
+    env = {"DB_NAME": "courts", "DB_HOST": "host", "DB_PORT": "5432",
+           "DB_USERNAME": "user", "DB_PASSWORD": "password"}
+    factory = MagicMock()
+    # Restores the pool & its configuration afterwards
+    with patch("rds_pool._pool", None), patch("rds_pool._connection_factory"), \
+            patch("rds_pool._default_max_connections"), \
+            patch("rds_pool.ThreadedConnectionPool") as pool_class, \
+            patch("rds_pool.load_dotenv"), patch.dict("rds_pool.ENV", env, clear=True):
+        rds_pool.configure(connection_factory=factory, default_max_connections=2)
+        rds_pool.get_pool()
+    assert pool_class.call_args.kwargs["connection_factory"] is factory
+    assert pool_class.call_args.kwargs["maxconn"] == 2
@@ -4,9 +4,12 @@ Streamlit dashboard layout for court hearings data.
 
 import streamlit as st
 from dotenv import load_dotenv
-from rds_utils import get_db_connection
 from data_cache import (
-    get_data_from_db,
+    get_recent_hearings,
+    get_ruling_counts,
+    get_ruling_counts_by_court,
+    get_ruling_counts_by_title,
+    get_anomaly_counts
 )
 from charts import (
     get_recent_hearings_table,
@@ -68,11 +71,12 @@ def main():
     # Keeping layout="wide" as it is a layout setting, not a theme setting.
     st.set_page_config(page_title="Court Hearings Dashboard", layout="wide")
 
-    # Connect to database
-    conn = get_db_connection()
-
-    # Load data
-    data = get_data_from_db(conn)
+    # Load data, pre-aggregated in the DB
+    recent_hearings = get_recent_hearings()
+    ruling_counts = get_ruling_counts()
+    court_ruling_counts = get_ruling_counts_by_court()
+    title_ruling_counts = get_ruling_counts_by_title()
+    anomaly_counts = get_anomaly_counts()
 
     # Layout
     st.title("Barrister Brief")
@@ -83,20 +87,20 @@ def main():
 
     with col_main:
         st.markdown("### Last 5 Court Hearings Chronologically")
-        st.dataframe(get_recent_hearings_table(data), use_container_width=True)
+        st.dataframe(get_recent_hearings_table(recent_hearings), use_container_width=True)
 
         st.markdown("### Recent Rulings across Different Courts")
-        st.altair_chart(get_rulings_by_court_chart(data), use_container_width=True)
+        st.altair_chart(get_rulings_by_court_chart(court_ruling_counts), use_container_width=True)
 
         st.markdown("### Rulings by Judicial Title")
-        st.altair_chart(get_rulings_by_title(data), use_container_width=True)
+        st.altair_chart(get_rulings_by_title(title_ruling_counts), use_container_width=True)
 
     with col_side:
         st.markdown("### Overall Ruling Tendency")
-        st.altair_chart(get_overall_ruling_tendency_chart(data), use_container_width=True)
+        st.altair_chart(get_overall_ruling_tendency_chart(ruling_counts), use_container_width=True)
 
         st.markdown("### Recent Court Anomalies")
-        st.altair_chart(get_anomalies_visualisation(data), use_container_width=True)
+        st.altair_chart(get_anomalies_visualisation(anomaly_counts), use_container_width=True)
 
 
 if __name__ == "__main__":
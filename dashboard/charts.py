@@ -3,10 +3,8 @@ charts.py
 Functions to take in a DataFrame as argument and return Altair charts
 for usage in the Streamlit dashboard.
 """
-import random
 import altair as alt
 import pandas as pd
-from wordcloud import WordCloud  # Generate wordclouds
 
 
 
@@ -21,13 +19,9 @@ ruling_color_scale = alt.Scale(
 )
 
 
-def get_overall_ruling_tendency_chart(data: pd.DataFrame):
-    """Donut chart showing favour (Plaintiff vs Defendant vs Undisclosed)."""
-    data = data.copy()
-    data["judgement_favour"] = data["judgement_favour"].fillna("Undisclosed")
-    counts = data["judgement_favour"].value_counts().reset_index()
-    counts.columns = ["judgement_favour", "count"]
-
+def get_overall_ruling_tendency_chart(counts: pd.DataFrame):
+    """Donut chart showing favour (Plaintiff vs Defendant vs Undisclosed),
+    from the `count` of hearings ruled in each `judgement_favour`."""
     chart = (
         alt.Chart(counts)
         .mark_arc(innerRadius=50)
@@ -47,9 +41,10 @@ def get_overall_ruling_tendency_chart(data: pd.DataFrame):
     return chart
 
 
-def get_judge_ruling_tendency_chart(data: pd.DataFrame, judge_name: str = ""):
-    """Donut chart showing an individual judge's ruling tendency."""
-    if data.empty:
+def get_judge_ruling_tendency_chart(counts: pd.DataFrame, judge_name: str = ""):
+    """Donut chart showing an individual judge's ruling tendency,
+    from the `count` of their hearings ruled in each `judgement_favour`."""
+    if counts.empty:
         return (
             alt.Chart(pd.DataFrame({"message": ["No hearings available for this judge."]}))
             .mark_text(align="center", fontSize=13, color="gray")
@@ -57,11 +52,6 @@ def get_judge_ruling_tendency_chart(data: pd.DataFrame, judge_name: str = ""):
             .properties(height=80)
         )
 
-    data = data.copy()
-    data["judgement_favour"] = data["judgement_favour"].fillna("Undisclosed")
-    counts = data["judgement_favour"].value_counts().reset_index()
-    counts.columns = ["judgement_favour", "count"]
-
     title = f"Ruling Tendency for {judge_name}" if judge_name else "Judge Ruling Tendency"
 
     chart = (
@@ -86,6 +76,7 @@ def get_judge_ruling_tendency_chart(data: pd.DataFrame, judge_name: str = ""):
 def get_recent_hearings_table(data: pd.DataFrame):
     """Gets a table of the most recent hearings. """
     recent = data.sort_values(by="hearing_date", ascending=False).head(5)
+    recent = recent.assign(hearing_date=recent["hearing_date"].dt.date)
     table = recent[
         ["hearing_date", "court_name",
          "hearing_title", "judgement_favour", "hearing_url", "hearing_citation"]
@@ -103,12 +94,11 @@ def get_recent_hearings_table(data: pd.DataFrame):
     return table
 
 
-def get_rulings_by_court_chart(data: pd.DataFrame):
-    """Gets ruling decisions by court. """
-    data = data.copy()
-    data["judgement_favour"] = data["judgement_favour"].fillna("Undisclosed")
+def get_rulings_by_court_chart(counts: pd.DataFrame):
+    """Gets ruling decisions by court, from the `count` of hearings
+    per `court_name` & `judgement_favour`."""
     chart = (
-        alt.Chart(data)
+        alt.Chart(counts)
         .mark_bar()
         .encode(
             y=alt.Y(
@@ -119,13 +109,13 @@ def get_rulings_by_court_chart(data: pd.DataFrame):
                     labelOverlap=False
                 )
             ),
-            x=alt.X("count():Q", title="Number of Hearings"),
+            x=alt.X("sum(count):Q", title="Number of Hearings"),
             color=alt.Color(
                 "judgement_favour:N",
                 title="Ruling Favour",
                 scale=ruling_color_scale,
             ),
-            tooltip=["court_name", "count()"],
+            tooltip=["court_name", alt.Tooltip("sum(count):Q", title="Number of Hearings")],
         )
         .properties(title="Recent Rulings across Different Courts")
         .resolve_scale(y="independent")
@@ -134,17 +124,14 @@ def get_rulings_by_court_chart(data: pd.DataFrame):
     return chart
 
 
-def get_rulings_by_title(data: pd.DataFrame):
-    """Composite bar chart showing the disparity in rulings by title."""
-    data = data.copy()
-    data["title_name"] = data["title_name"].fillna("Unknown")
-    data["judgement_favour"] = data["judgement_favour"].fillna("Undisclosed")
-
+def get_rulings_by_title(counts: pd.DataFrame):
+    """Composite bar chart showing the disparity in rulings by title,
+    from the `count` of hearings per `title_name` & `judgement_favour`."""
     chart = (
-        alt.Chart(data)
+        alt.Chart(counts)
         .mark_bar()
         .encode(
-            x=alt.X("count():Q", title="Number of Hearings"),
+            x=alt.X("sum(count):Q", title="Number of Hearings"),
             y=alt.Y("title_name:N", sort="-x", title="Judge Title",
                 axis=alt.Axis(
                     labelLimit=600,
@@ -158,7 +145,7 @@ def get_rulings_by_title(data: pd.DataFrame):
             tooltip=[
                 alt.Tooltip("title_name:N", title="Title"),
                 alt.Tooltip("judgement_favour:N", title="Ruling Favour"),
-                alt.Tooltip("count():Q", title="Number of Hearings"),
+                alt.Tooltip("sum(count):Q", title="Number of Hearings"),
             ],
         )
         .properties(title="Rulings by Judicial Title", width=500, height=300)
@@ -167,13 +154,10 @@ def get_rulings_by_title(data: pd.DataFrame):
     return chart
 
 
-def get_anomalies_visualisation(data: pd.DataFrame):
-    """Visualisation showing frequency of anomalies per court over time."""
-    anomalies = data[
-        data["hearing_anomaly"].fillna("").apply(lambda x: x.strip().lower() not in ["none found"])
-    ].copy()
-
-    if anomalies.empty:
+def get_anomalies_visualisation(counts: pd.DataFrame):
+    """Visualisation showing frequency of anomalies per court over time,
+    from the `count` of anomalies per `court_name` & `month`."""
+    if counts.empty:
         return (
             alt.Chart(pd.DataFrame({"message": ["No significant anomalies detected."]}))
             .mark_text(align="center", fontSize=13, color="gray")
@@ -181,11 +165,6 @@ def get_anomalies_visualisation(data: pd.DataFrame):
             .properties(height=80)
         )
 
-    anomalies["hearing_date"] = pd.to_datetime(anomalies["hearing_date"], errors="coerce")
-    anomalies["month"] = anomalies["hearing_date"].dt.to_period("M").astype(str)
-
-    counts = anomalies.groupby(["court_name", "month"]).size().reset_index(name="count")
-
     chart = (
         alt.Chart(counts)
         .mark_rect()
@@ -204,28 +183,3 @@ def get_anomalies_visualisation(data: pd.DataFrame):
     )
 
     return chart
-
-def custom_colours(*args, **kwargs):
-    """Quick function to create a custom solour scheme for the judges word map. """
-    word = args[0].lower()
-
-    # Define palette inspired by the dashboard
-    golds = ["#b29758", "#a38c64", "#d4b06a", "#f0d890"]
-    highlights = ["#e0e0e0", "#cfcfcf", "#ffffff", "#027F8B"]
-    accents = ["#c7a15a", "#c4b37b", "#a59162"]
-
-    # Example of logic-based variation
-    if "data" in word or "court" in word:
-        return random.choice(golds)
-    if "law" in word or "rights" in word:
-        return random.choice(accents)
-    return random.choice(highlights)
-
-def create_word_cloud(text: str):
-    """Create a word cloud of the summaries for a judge."""
-
-    fog_machine = WordCloud(background_color='#212838',
-                            color_func=custom_colours,
-                            height=500,
-                            width=1000)
-    return fog_machine.generate(text)
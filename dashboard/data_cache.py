@@ -1,13 +1,46 @@
-"""File holding functions which retrieve data from the RDS (which can be cached)."""
+"""File holding functions which retrieve data from the RDS, cached until the data changes.
+Free-text searches are only cached by each process, the rest shared by every replica."""
 import datetime
-from psycopg2.extensions import connection
-import streamlit as st
+from psycopg2.extensions import cursor
 import pandas as pd
-from rds_utils import query_rds
+from rds_utils import pooled_connection, query_rds
+from shared_cache import local_cache, shared_cache
 
 
-@st.cache_data(ttl=600)  # cache for 10 min
-def get_total_hearing_count(_con: connection) -> dict:
+# Columns repeating a few names across many rows, loaded as categoricals
+CATEGORY_COLUMNS = {"court_name", "title_name", "judgement_favour"}
+# Postgres type OIDs of DATE, TIMESTAMP & TIMESTAMPTZ, loaded as datetime64 columns
+DATE_TYPE_CODES = {1082, 1114, 1184}
+# How many rows are fetched from the RDS at a time
+FETCH_SIZE = 2000
+
+
+def query_dataframe(query: str, params: tuple = None) -> pd.DataFrame:
+    """Runs `query` and returns its rows as a DataFrame, with a column per selected column.
+
+    Rows are fetched as tuples in batches and appended to a list per column, so no dict is
+    built per row. Dates become datetime64 columns and `CATEGORY_COLUMNS` categoricals."""
+    with pooled_connection() as con, con.cursor(cursor_factory=cursor) as cur:
+        cur.execute(query, params)
+        columns = [[] for _ in cur.description]
+        while rows := cur.fetchmany(FETCH_SIZE):
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+        description = cur.description
+
+    data = {}
+    for desc, values in zip(description, columns):
+        if desc.type_code in DATE_TYPE_CODES:
+            data[desc.name] = pd.to_datetime(pd.Series(values, dtype=object))
+        elif desc.name in CATEGORY_COLUMNS:
+            data[desc.name] = pd.Categorical(values)
+        else:
+            data[desc.name] = values
+    return pd.DataFrame(data, columns=[desc.name for desc in description])
+
+
+@shared_cache
+def get_total_hearing_count() -> dict:
     """Gets total court hearing count."""
     query = """
     SELECT
@@ -15,72 +48,347 @@ def get_total_hearing_count(_con: connection) -> dict:
     FROM
         hearing;
     """
-    return query_rds(_con, query)
+    return query_rds(query)
+
 
+@shared_cache
+def get_judges() -> pd.DataFrame:
+    """Returns every judge who has sat a case, with their title, the court they've sat in most
+    and the number of cases they've sat."""
+    query = """
+        SELECT
+            jd.judge_id,
+            CONCAT_WS(' ', t.title_name, jd.first_name, jd.middle_name, jd.last_name) AS name,
+            t.title_name,
+            courts.court_name,
+            jc.case_count
+        FROM judge jd
+        JOIN judge_case_count jc ON jd.judge_id = jc.judge_id
+        LEFT JOIN title t ON jd.title_id = t.title_id
+        LEFT JOIN (
+            SELECT
+                jh.judge_id,
+                mode() WITHIN GROUP (ORDER BY c.court_name) AS court_name
+            FROM judge_hearing jh
+            JOIN hearing h ON jh.hearing_id = h.hearing_id AND jh.hearing_date = h.hearing_date
+            JOIN court c ON h.court_id = c.court_id
+            GROUP BY jh.judge_id
+        ) AS courts ON jd.judge_id = courts.judge_id;
+    """
+    return query_dataframe(query)
 
-@st.cache_data(ttl=600)
-def get_data_from_db(_con: connection) -> pd.DataFrame:
-    """Fetches joined data from hearing, judge, court, and judgement tables."""
 
-    with _con.cursor() as cur:
-        query = """
+@shared_cache
+def get_judge(judge_id: int) -> dict:
+    """Returns a judge's name, title & appointment date,
+    or an empty dict if there's no such judge."""
+    query = """
+        SELECT
+            jd.judge_id,
+            t.title_name,
+            jd.first_name,
+            jd.middle_name,
+            jd.last_name,
+            jd.appointment_date
+        FROM judge jd
+        LEFT JOIN title t ON jd.title_id = t.title_id
+        WHERE jd.judge_id = %s;
+    """
+    judge = query_rds(query, (judge_id,))
+    return dict(judge) if judge else {}
+
+
+@shared_cache
+def get_judge_stats(judge_id: int, today: datetime.date) -> dict:
+    """Returns the number of cases a judge has sat in all, this month & this year, how many
+    were ruled in each favour, and the (up to 5) courts they've sat in most, in one query."""
+    query = """
+        WITH judge_hearings AS (
+            SELECT
+                h.hearing_date,
+                c.court_name,
+                COALESCE(j.judgement_favour, 'Undisclosed') AS judgement_favour
+            FROM judge_hearing jh
+            JOIN hearing h ON jh.hearing_id = h.hearing_id AND jh.hearing_date = h.hearing_date
+            LEFT JOIN court c ON h.court_id = c.court_id
+            LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+            WHERE jh.judge_id = %(judge_id)s
+        )
+        SELECT
+            COUNT(*)::INT AS total_cases,
+            COUNT(*) FILTER (
+                WHERE date_trunc('month', hearing_date) = date_trunc('month', %(today)s::DATE)
+            )::INT AS month_cases,
+            COUNT(*) FILTER (
+                WHERE date_trunc('year', hearing_date) = date_trunc('year', %(today)s::DATE)
+            )::INT AS year_cases,
+            (
+                SELECT json_object_agg(judgement_favour, count)
+                FROM (
+                    SELECT judgement_favour, COUNT(*) AS count
+                    FROM judge_hearings
+                    GROUP BY judgement_favour
+                ) AS rulings
+            ) AS ruling_counts,
+            (
+                SELECT json_agg(json_build_object('court_name', court_name, 'count', count)
+                                ORDER BY count DESC, court_name)
+                FROM (
+                    SELECT court_name, COUNT(*) AS count
+                    FROM judge_hearings
+                    WHERE court_name IS NOT NULL
+                    GROUP BY court_name
+                    ORDER BY count DESC, court_name
+                    LIMIT 5
+                ) AS courts
+            ) AS top_courts
+        FROM judge_hearings;
+    """
+    stats = dict(query_rds(query, {"judge_id": judge_id, "today": today}))
+    stats["ruling_counts"] = stats["ruling_counts"] or {}
+    stats["top_courts"] = stats["top_courts"] or []
+    return stats
+
+
+@shared_cache
+def get_recent_judge_hearings(judge_id: int, limit: int = 5) -> pd.DataFrame:
+    """Returns the details of the most recent `limit` hearings a judge has sat."""
+    query = """
+        SELECT
+            h.hearing_citation,
+            h.hearing_title,
+            h.hearing_date,
+            h.hearing_description,
+            h.hearing_url,
+            c.court_name
+        FROM judge_hearing jh
+        JOIN hearing h ON jh.hearing_id = h.hearing_id AND jh.hearing_date = h.hearing_date
+        LEFT JOIN court c ON h.court_id = c.court_id
+        WHERE jh.judge_id = %s
+        ORDER BY h.hearing_date DESC
+        LIMIT %s;
+    """
+    return query_dataframe(query, (judge_id, limit))
+
+
+@shared_cache
+def get_judge_word_cloud(judge_id: int) -> bytes | None:
+    """Returns the PNG of a judge's word cloud, rendered by the pipeline, or None if it has none."""
+    query = """
+        SELECT word_cloud_png
+        FROM judge_word_cloud
+        WHERE judge_id = %s;
+    """
+    word_cloud = query_rds(query, (judge_id,))
+    return bytes(word_cloud["word_cloud_png"]) if word_cloud else None
+
+
+@shared_cache
+def get_recent_hearings(limit: int = 5) -> pd.DataFrame:
+    """Returns the most recent `limit` hearings, with their court & ruling."""
+    query = """
+        SELECT
+            h.hearing_date,
+            c.court_name,
+            h.hearing_title,
+            j.judgement_favour,
+            h.hearing_url,
+            h.hearing_citation
+        FROM hearing h
+        LEFT JOIN court c ON h.court_id = c.court_id
+        LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+        ORDER BY h.hearing_date DESC
+        LIMIT %s;
+    """
+    return query_dataframe(query, (limit,))
+
+
+@shared_cache
+def get_ruling_counts() -> pd.DataFrame:
+    """Returns the number of hearings ruled in each favour."""
+    query = """
+        SELECT
+            judgement_favour,
+            SUM(hearing_count)::INT AS count
+        FROM ruling_count_by_court_month
+        GROUP BY judgement_favour;
+    """
+    return query_dataframe(query)
+
+
+@shared_cache
+def get_ruling_counts_by_court() -> pd.DataFrame:
+    """Returns the number of hearings ruled in each favour, by court."""
+    query = """
+        SELECT
+            court_name,
+            judgement_favour,
+            SUM(hearing_count)::INT AS count
+        FROM ruling_count_by_court_month
+        GROUP BY court_name, judgement_favour;
+    """
+    return query_dataframe(query)
+
+
+@shared_cache
+def get_ruling_counts_by_title() -> pd.DataFrame:
+    """Returns the number of hearings ruled in each favour, by the titles of their judges."""
+    query = """
+        SELECT
+            title_name,
+            judgement_favour,
+            SUM(hearing_count)::INT AS count
+        FROM ruling_count_by_title_month
+        GROUP BY title_name, judgement_favour;
+    """
+    return query_dataframe(query)
+
+
+@shared_cache
+def get_anomaly_counts() -> pd.DataFrame:
+    """Returns the number of hearings with anomalies, by court & month (as YYYY-MM)."""
+    query = """
+        SELECT
+            court_name,
+            to_char(hearing_month, 'YYYY-MM') AS month,
+            anomaly_count AS count
+        FROM anomaly_count_by_court_month;
+    """
+    return query_dataframe(query)
+
+
+@shared_cache
+def get_court_names() -> list[str]:
+    """Returns the name of every court, alphabetically."""
+    query = """
+        SELECT DISTINCT court_name
+        FROM court
+        ORDER BY court_name;
+    """
+    return query_dataframe(query)["court_name"].tolist()
+
+
+@shared_cache
+def get_judgement_favours() -> list[str]:
+    """Returns every possible ruling favour, alphabetically, including 'Undisclosed'."""
+    query = """
+        SELECT judgement_favour
+        FROM judgement;
+    """
+    favours = set(query_dataframe(query)["judgement_favour"].dropna()) | {"Undisclosed"}
+    return sorted(favours)
+
+
+@shared_cache
+def get_hearing_date_range() -> tuple[datetime.date, datetime.date]:
+    """Returns the dates of the first & last hearings, or today for both if there are none."""
+    query = """
+        SELECT
+            MIN(hearing_date)::DATE AS first_date,
+            MAX(hearing_date)::DATE AS last_date
+        FROM hearing;
+    """
+    dates = query_rds(query)
+    if dates["first_date"] is None:
+        return datetime.date.today(), datetime.date.today()
+    return dates["first_date"], dates["last_date"]
+
+
+def get_hearing_filters(keyword: str, court: str, ruling: str,
+                        start_date: datetime.date, end_date: datetime.date) -> tuple[str, list]:
+    """Returns the WHERE clause (and its parameters) matching hearings with the words of `keyword`
+    in their title, description or anomalies, in `court`, ruled in favour of `ruling` and held
+    between the dates. "All" (or an empty keyword) doesn't filter."""
+    conditions, params = [], []
+    if keyword:
+        # Matched against the full-text index of titles, summaries & anomalies
+        conditions.append("h.hearing_search @@ websearch_to_tsquery('english', %s)")
+        params.append(keyword)
+    if court != "All":
+        conditions.append("c.court_name = %s")
+        params.append(court)
+    if ruling == "Undisclosed":
+        conditions.append("j.judgement_favour IS NULL")
+    elif ruling != "All":
+        conditions.append("j.judgement_favour = %s")
+        params.append(ruling)
+    if start_date and end_date:
+        # A range on hearing_date itself, so only the partitions covering it are scanned
+        conditions.append("h.hearing_date >= %s AND h.hearing_date < %s")
+        params += [start_date, end_date + datetime.timedelta(days=1)]
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+
+@local_cache
+def count_hearings(keyword: str, court: str, ruling: str,
+                   start_date: datetime.date, end_date: datetime.date) -> int:
+    """Returns the number of hearings matching the filters (see `get_hearing_filters`)."""
+    where, params = get_hearing_filters(keyword, court, ruling, start_date, end_date)
+    query = f"""
+        SELECT COUNT(*) AS total
+        FROM hearing h
+        LEFT JOIN court c ON h.court_id = c.court_id
+        LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+        {where};
+    """
+    return query_rds(query, params)["total"]
+
+
+@local_cache
+def search_hearings(keyword: str, court: str, ruling: str,
+                    start_date: datetime.date, end_date: datetime.date,
+                    page: int = 0, page_size: int = 20) -> pd.DataFrame:
+    """Returns page `page` (from 0) of the hearings matching the filters
+    (see `get_hearing_filters`), most relevant to `keyword` first (if given), then most recent.
+    The `snippet` of each is its description, with the words matching `keyword` in bold."""
+    where, params = get_hearing_filters(keyword, court, ruling, start_date, end_date)
+    rank = "ts_rank_cd(h.hearing_search, websearch_to_tsquery('english', %s))" if keyword else "0"
+    rank_params = [keyword] if keyword else []
+    # Only the page of matches is highlighted, as ts_headline re-parses each description
+    query = f"""
+        SELECT
+            page.*,
+            CASE WHEN %s = '' THEN page.hearing_description
+            ELSE ts_headline('english', COALESCE(page.hearing_description, ''),
+                             websearch_to_tsquery('english', %s),
+                             'StartSel=**, StopSel=**, HighlightAll=true')
+            END AS snippet
+        FROM (
             SELECT
                 h.hearing_id,
                 h.hearing_citation,
                 h.hearing_title,
                 h.hearing_date,
                 h.hearing_description,
-                h.hearing_anomaly,
                 h.hearing_url,
                 j.judgement_favour,
                 c.court_name,
-                jd.judge_id,
-                jd.first_name,
-                jd.middle_name,
-                jd.last_name,
-                t.title_name,
-                jd.appointment_date
+                {rank} AS rank
             FROM hearing h
-            LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
             LEFT JOIN court c ON h.court_id = c.court_id
-            LEFT JOIN judge_hearing jh ON h.hearing_id = jh.hearing_id
-            LEFT JOIN judge jd ON jh.judge_id = jd.judge_id
-            LEFT JOIN title t ON jd.title_id = t.title_id;
-        """
-        cur.execute(query)
-        rows = cur.fetchall()
-        colnames = [desc[0] for desc in cur.description]
-
-    df = pd.DataFrame(rows, columns=colnames)
-    df = df.drop_duplicates(subset=["hearing_id"]).reset_index(drop=True)
-
-    # Convert datetime objects to strings for Streamlit display
-    for col in ['hearing_date', 'appointment_date']:
-        if col in df.columns:
-            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                df[col] = df[col].astype(str)
-            elif df[col].apply(lambda x: isinstance\
-                               (x, (pd.Timestamp, datetime.date, datetime.datetime))).any():
-                df[col] = df[col].astype(str)
-
-    return df
-
-@st.cache_data(ttl=600)
-def get_summaries_for_judge(_conn: connection, judge_id: int) -> str:
-    """Return a list of court transcript summaries which were overseen by a specific judge."""
-
-    all_summary_text = ''
-    query = """SELECT hearing_description FROM judge j
-            JOIN judge_hearing jh
-	            USING (judge_id)
-            JOIN hearing h
-	            USING (hearing_id)
-            WHERE judge_id = %s;"""
-
-    with _conn.cursor() as cur:
-        cur.execute(query, (judge_id,))
-        summaries = cur.fetchall()
-
-    for summary in summaries:
-        all_summary_text += summary['hearing_description']
-    return all_summary_text
+            LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+            {where}
+            ORDER BY rank DESC, h.hearing_date DESC, h.hearing_id DESC
+            LIMIT %s OFFSET %s
+        ) AS page
+        ORDER BY page.rank DESC, page.hearing_date DESC, page.hearing_id DESC;
+    """
+    return query_dataframe(query, (keyword, keyword, *rank_params, *params,
+                                         page_size, page * page_size))
+
+
+@local_cache
+def search_judge_names(search: str, limit: int = 100) -> pd.DataFrame:
+    """Returns the IDs of the judges whose names best match `search`, allowing for misspellings
+    & partial names, with their similarity `score`, most similar first."""
+    query = """
+        SELECT
+            judge_id,
+            word_similarity(LOWER(%s), judge_name) AS score
+        FROM judge
+        WHERE LOWER(%s) <%% judge_name
+        ORDER BY score DESC
+        LIMIT %s;
+    """
+    return query_dataframe(query, (search, search, limit))
@@ -6,7 +6,7 @@ import re
 import streamlit as st
 from dotenv import load_dotenv
 from psycopg2.extensions import connection
-from rds_utils import get_db_connection
+from rds_utils import pooled_connection
 
 
 # CSS Injection
@@ -88,9 +88,6 @@ def main():
     load_dotenv()
     st.set_page_config(page_title="News Letter Sign-Up", layout="wide")
 
-    # Connect to database
-    conn = get_db_connection()
-
     # Layout
     st.title("Sign Up For Barrister Brief")
     st.markdown("Enter your detail's below to receive daily court summaries!")
@@ -108,7 +105,8 @@ def main():
         if all([valid_first, valid_last, valid_email]):
             st.success(f"Thank You {first_name}! \
                        You have successfully signed up for Barrister Brief")
-            insert_subscriber(conn, first_name, last_name, email)
+            with pooled_connection() as conn:
+                insert_subscriber(conn, first_name, last_name, email)
         else:
             if not valid_first:
                 st.error(msg_first)
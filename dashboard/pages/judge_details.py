@@ -3,12 +3,17 @@
 import datetime
 import streamlit as st
 import pandas as pd
-from data_cache import get_data_from_db, get_summaries_for_judge
-from rds_utils import get_db_connection
+from data_cache import (
+    get_judge,
+    get_judge_stats,
+    get_recent_judge_hearings,
+    get_judge_word_cloud,
+    get_ruling_counts
+)
+from utils import fill_missing
 from charts import (
     get_judge_ruling_tendency_chart,
-    get_overall_ruling_tendency_chart,
-    create_word_cloud
+    get_overall_ruling_tendency_chart
 )
 
 PAGE_FILENAME = "Judge_Details"
@@ -67,35 +72,32 @@ if "selected_judge_id" not in st.session_state:
 
 judge_id = st.session_state["selected_judge_id"]
 
-conn = get_db_connection()
-data = get_data_from_db(conn)
+judge = get_judge(judge_id)
+
+if not judge:
+    st.error("Judge not found. Please return to the Search Judges page.")
+    st.stop()
 
-judge_hearings = data[data["judge_id"] == judge_id].copy()
+today = datetime.date.today()
+stats = get_judge_stats(judge_id, today)
 
-if judge_hearings.empty:
+if not stats["total_cases"]:
     st.warning("No hearing data found for this judge.")
     st.stop()
 
-judge = judge_hearings.iloc[0]
 FULL_NAME = " ".join(
     filter(None, [judge.get("title_name"), judge.get("first_name"), \
                   judge.get("middle_name"), judge.get("last_name")])
 ).strip()
-appointment_date = judge.get("appointment_date", "Unknown")
-court_name = judge.get("court_name", "Unknown")
-
-judge_hearings["hearing_date"] = pd.to_datetime(judge_hearings["hearing_date"], errors="coerce")
-
-total_cases = len(judge_hearings)
-today = datetime.date.today()
+appointment_date = judge.get("appointment_date") or "Unknown"
+court_name = stats["top_courts"][0]["court_name"] if stats["top_courts"] else "Unknown"
 
-month_str = today.strftime("%Y-%m")
-month_cases = judge_hearings[judge_hearings\
-                             ["hearing_date"].dt.to_period("M").astype(str) == month_str].shape[0]
-year_cases = judge_hearings[judge_hearings["hearing_date"].dt.year == today.year].shape[0]
+total_cases = stats["total_cases"]
+month_cases = stats["month_cases"]
+year_cases = stats["year_cases"]
 
 st.title(FULL_NAME or "Unknown Judge")
-st.caption(f"{judge.get('title_name', 'Unknown Title')} | {court_name}")
+st.caption(f"{judge.get('title_name') or 'Unknown Title'} | {court_name}")
 st.markdown(f"**Appointed:** {appointment_date}")
 
 col1, col2, col3 = st.columns(3)
@@ -108,10 +110,8 @@ st.divider()
 # STATISTICS PANEL
 st.subheader("Judge Statistics")
 
-# Calculate ruling favour breakdown
-judge_hearings_copy = judge_hearings.copy()
-judge_hearings_copy["judgement_favour"] = judge_hearings_copy["judgement_favour"].fillna("Undisclosed")
-ruling_counts = judge_hearings_copy["judgement_favour"].value_counts().to_dict()
+# Ruling favour breakdown
+ruling_counts = stats["ruling_counts"]
 
 plaintiff_count = ruling_counts.get("Plaintiff", 0)
 defendant_count = ruling_counts.get("Defendant", 0)
@@ -138,11 +138,11 @@ with stat_col4:
     st.metric("Undisclosed", f"{undisclosed_count} ({undisclosed_pct:.1f}%)")
 
 # Most common courts
-courts = judge_hearings_copy["court_name"].value_counts().head(5)
+courts = stats["top_courts"]
 
 st.markdown("**Most Common Courts:**")
-if not courts.empty:
-    courts_text = ", ".join([f"{court} ({count})" for court, count in courts.items()])
+if courts:
+    courts_text = ", ".join([f"{court['court_name']} ({court['count']})" for court in courts])
     st.write(courts_text)
 else:
     st.write("No court data available.")
@@ -154,12 +154,13 @@ st.subheader("Ruling Tendency Overview")
 col1, col2 = st.columns(2)
 with col1:
     st.markdown("**Judge's Ruling Tendency**")
-    tendency_chart = get_judge_ruling_tendency_chart(judge_hearings, FULL_NAME)
+    judge_ruling_counts = pd.DataFrame(ruling_counts.items(), columns=["judgement_favour", "count"])
+    tendency_chart = get_judge_ruling_tendency_chart(judge_ruling_counts, FULL_NAME)
     st.altair_chart(tendency_chart, use_container_width=True)
 
 with col2:
     st.markdown("**Overall Ruling Tendency (All Hearings)**")
-    overall_chart = get_overall_ruling_tendency_chart(data)
+    overall_chart = get_overall_ruling_tendency_chart(get_ruling_counts())
     st.altair_chart(overall_chart, use_container_width=True)
 
 st.divider()
@@ -169,23 +170,25 @@ with col1:
     st.subheader("Judge's Case's Wordcloud")
     st.markdown("**Judge's Case Wordcloud**")
 with col2:
-    text_data = get_summaries_for_judge(conn, judge_id)
-    judge_word_cloud = create_word_cloud(text_data)
-    image = judge_word_cloud.to_image()
-    st.image(image, use_container_width=1000)
+    word_cloud = get_judge_word_cloud(judge_id)
+    if word_cloud:
+        st.image(word_cloud, use_container_width=1000)
+    else:
+        st.info("No word cloud has been drawn for this judge yet.")
 
 
 st.divider()
 
 st.subheader("Most Recent Hearings")
 
-recent = judge_hearings.sort_values("hearing_date", ascending=False).head(5)
+recent = get_recent_judge_hearings(judge_id)
+recent["court_name"] = fill_missing(recent["court_name"], "Unknown")
 
 for _, row in recent.iterrows():
     with st.container():
         st.markdown(f"### {row['hearing_title'] or 'Untitled Hearing'}")
         st.caption(
-            f"Court: {row['court_name'] or 'Unknown'} | "
+            f"Court: {row['court_name']} | "
             f"Date: {row['hearing_date'].date() if pd.notna(row['hearing_date']) else 'Unknown'} | "
             f"Citation: {row['hearing_citation'] or 'N/A'}"
         )
@@ -1,10 +1,15 @@
 #pylint:disable=line-too-long, import-error
 """Streamlit dashboard page for searching hearings. """
-import datetime
 import streamlit as st
 import pandas as pd
-from data_cache import get_data_from_db
-from rds_utils import get_db_connection
+from data_cache import (
+    get_court_names,
+    get_judgement_favours,
+    get_hearing_date_range,
+    count_hearings,
+    search_hearings
+)
+from utils import fill_missing
 
 # --- CSS INJECTION FOR GOLD HEADERS & JUDGE DETAILS HIDDEN
 GOLD_COLOR = "#b29758"
@@ -57,32 +62,23 @@ st.markdown("Use the filters below to explore recent hearings \
             stored in the Court Transcripts database.")
 st.divider()
 
-conn = get_db_connection()
-data = get_data_from_db(conn)
-
-# Ensure consistent date formats
-data["hearing_date"] = pd.to_datetime(data["hearing_date"], errors="coerce")
+PAGE_SIZE = 20
 
 # Sidebar / top Filters
 col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
 
 with col1:
     keyword = st.text_input("Keyword Filter", \
-                            placeholder="Enter keyword in title or description...")
+                            placeholder="Enter keywords, or a \"quoted phrase\"...")
 
 with col2:
     court_filter = st.selectbox(
         "Court Filter",
-        options=["All"] + sorted(data["court_name"].dropna().unique().tolist())
+        options=["All"] + get_court_names()
     )
 
 with col3:
-    # Handle empty data
-    if data["hearing_date"].dropna().empty:
-        default_start = default_end = datetime.date.today()
-    else:
-        default_start = data["hearing_date"].min().date()
-        default_end = data["hearing_date"].max().date()
+    default_start, default_end = get_hearing_date_range()
 
     # Provide single date if start==end, else tuple for range
     default_value = default_start if default_start == default_end else (default_start, default_end)
@@ -92,52 +88,39 @@ with col3:
         value=default_value
     )
 
-    # Normalise to start_date and end_date
+    # Normalise to start_date and end_date (only the start is given while a range is being picked)
     if isinstance(date_selection, (tuple, list)):
-        start_date, end_date = date_selection
+        start_date, end_date = (tuple(date_selection) * 2)[:2]
     else:
         start_date = end_date = date_selection
 
 with col4:
     ruling_filter = st.selectbox(
         "Ruling Favour",
-        options=["All"] + sorted(data["judgement_favour"].fillna("Undisclosed").unique().tolist())
+        options=["All"] + get_judgement_favours()
     )
 
-filtered = data.copy()
-
-# Keyword filter
-if keyword:
-    keyword_lower = keyword.lower()
-    filtered = filtered[
-        filtered["hearing_title"].str.lower().str.contains(keyword_lower, na=False)
-        | filtered["hearing_description"].str.lower().str.contains(keyword_lower, na=False)
-    ]
+# Filtering & paging happen in the DB, so only one page of hearings is loaded
+filters = (keyword, court_filter, ruling_filter, start_date, end_date)
+if st.session_state.get("hearing_filters") != filters:
+    st.session_state["hearing_filters"] = filters
+    st.session_state["hearing_page"] = 0
 
-# Court filter
-if court_filter != "All":
-    filtered = filtered[filtered["court_name"] == court_filter]
-
-# Ruling filter
-if ruling_filter != "All":
-    filtered = filtered[filtered["judgement_favour"].fillna("Undisclosed") == ruling_filter]
-
-# Date range filter
-if isinstance(start_date, datetime.date) and isinstance(end_date, datetime.date):
-    if not filtered.empty:
-        filtered = filtered[
-            (filtered["hearing_date"].dt.date >= start_date)
-            & (filtered["hearing_date"].dt.date <= end_date)
-        ]
+total = count_hearings(*filters)
+page_count = max(1, -(-total // PAGE_SIZE))
+page = min(st.session_state["hearing_page"], page_count - 1)
+page_hearings = search_hearings(*filters, page=page, page_size=PAGE_SIZE)
 
 # Display
-st.markdown(f"### Showing {len(filtered)} matching hearing(s)")
+st.markdown(f"### Showing {len(page_hearings)} of {total} matching hearing(s)")
 
-if filtered.empty:
+if page_hearings.empty:
     st.info("No hearings found matching your filters.")
 else:
-    for _, row in filtered.iterrows():
-        ruling = row["judgement_favour"] or "Undisclosed"
+    page_hearings["judgement_favour"] = fill_missing(page_hearings["judgement_favour"], "Undisclosed")
+    page_hearings["court_name"] = fill_missing(page_hearings["court_name"], "Unknown")
+    for row in page_hearings.to_dict("records"):
+        ruling = row["judgement_favour"]
         color = {
             "Plaintiff": "#AC8B13",
             "Defendant": "#00B5B8",
@@ -148,11 +131,11 @@ else:
             # Card layout
             st.subheader(row['hearing_title'] or "Untitled Hearing")
             st.caption(
-                f"Court: {row['court_name'] or 'Unknown'} | "
+                f"Court: {row['court_name']} | "
                 f"Date: {row['hearing_date'].date() if pd.notna(row['hearing_date']) else 'Unknown'} | "
                 f"Citation: {row['hearing_citation'] or 'N/A'}"
             )
-            st.write(row['hearing_description'] or "No description available.")
+            st.markdown(row['snippet'] or "No description available.")
 
             # ruling badge
             st.markdown(
@@ -164,3 +147,16 @@ else:
                 st.markdown(f"[🔗 View Full Hearing]({row['hearing_url']})")
 
             st.divider()  # separator between cards
+
+    # Pagination
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("⬅ Previous", disabled=page == 0):
+            st.session_state["hearing_page"] = page - 1
+            st.rerun()
+    with page_col:
+        st.markdown(f"Page {page + 1} of {page_count}")
+    with next_col:
+        if st.button("Next ➡", disabled=page >= page_count - 1):
+            st.session_state["hearing_page"] = page + 1
+            st.rerun()
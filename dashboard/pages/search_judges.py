@@ -1,8 +1,8 @@
 #pylint:disable=import-error
 """Script to search for specific judges within the DB via keyword filers etc. """
 import streamlit as st
-from data_cache import get_data_from_db
-from rds_utils import get_db_connection
+from data_cache import get_judges, search_judge_names
+from utils import fill_missing
 
 # --- CSS INJECTION FOR GOLD HEADERS & JUDGE DETAILS HIDDEN
 GOLD_COLOR = "#b29758"
@@ -53,26 +53,8 @@ st.title("Search Judges")
 st.markdown("Use the filters below to explore judges in the Court Transcripts database.")
 st.divider()
 
-# Load hearing data
-conn = get_db_connection()
-data = get_data_from_db(conn)
-
-# Extract unique judges
-judges_df = data[["judge_id", "first_name", \
-                  "middle_name", "last_name", "title_name", "court_name"]].drop_duplicates()
-
-# Combine names
-judges_df["name"] = (
-    judges_df["title_name"].fillna("") + " " +
-    judges_df["first_name"].fillna("") + " " +
-    judges_df["middle_name"].fillna("") + " " +
-    judges_df["last_name"].fillna("")
-).str.replace(r"\s+", " ", regex=True).str.strip()
-
-# Count cases per judge
-case_counts = data.groupby("judge_id").size().reset_index(name="case_count")
-judges_df = judges_df.merge(case_counts, on="judge_id", how="left")
-judges_df["case_count"] = judges_df["case_count"].fillna(0).astype(int)
+# Load judges, with their case counts
+judges_df = get_judges()
 
 # Keep only necessary columns
 judges_df = judges_df[["judge_id", "name", "title_name", "court_name", "case_count"]].rename(
@@ -81,8 +63,8 @@ judges_df = judges_df[["judge_id", "name", "title_name", "court_name", "case_cou
 
 # Fill missing values
 judges_df["name"] = judges_df["name"].fillna("Unknown")
-judges_df["title"] = judges_df["title"].fillna("Unknown")
-judges_df["court_name"] = judges_df["court_name"].fillna("Unknown")
+judges_df["title"] = fill_missing(judges_df["title"], "Unknown")
+judges_df["court_name"] = fill_missing(judges_df["court_name"], "Unknown")
 
 # Filters
 col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
@@ -100,8 +82,10 @@ with col4:
 # Apply filters
 filtered = judges_df.copy()
 if name_filter:
-    name_lower = name_filter.lower()
-    filtered = filtered[filtered["name"].str.lower().str.contains(name_lower, na=False)]
+    # Fuzzy matched in the DB, so misspelt & partial names still find judges, best match first
+    matches = search_judge_names(name_filter)
+    filtered = filtered.merge(matches.rename(columns={"judge_id": "id"}), on="id")
+    filtered = filtered.sort_values("score", ascending=False)
 if title_filter != "All":
     filtered = filtered[filtered["title"] == title_filter]
 if court_filter != "All":
@@ -1,36 +1,25 @@
 """File holding RDS Utility functions"""
 
-import logging
-from os import environ as ENV
-from psycopg2.extensions import connection
-from psycopg2 import connect, Error
+from contextlib import contextmanager
 from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
 
+import rds_pool
 
-def get_db_connection():
-    """Gets database connection. """
-    load_dotenv()
-    try:
-        con = connect(
-            host=ENV["DB_HOST"],
-            database=ENV["DB_NAME"],
-            user=ENV["DB_USERNAME"],
-            password=ENV["DB_PASSWORD"],
-            port=ENV["DB_PORT"],
-            cursor_factory=RealDictCursor,
-        )
-        logging.info("Connected to RDS.")
-        return con
-    except Error:
-        # print(f"Error connecting to database: {e}")
-        logging.critical("Error connecting to RDS")
-        return None
 
+@contextmanager
+def pooled_connection():
+    """Checks a connection, returning rows as dicts, out of the shared pool for one query
+    and always returns it.
 
-def query_rds(con: connection, query: str) -> dict:
-    """Function to query the RDS with a given query."""
-    with con.cursor() as cur:
-        cur.execute(query)
-        data = cur.fetchall()
-    return data[0]
+    Streamlit runs each session in its own thread, so each query gets a connection to
+    itself, and a failed query can't abort another session's.
+    """
+    with rds_pool.pooled_connection(RealDictCursor) as con:
+        yield con
+
+
+def query_rds(query: str, params: tuple | dict = None) -> dict | None:
+    """Function to query the RDS with a given query, returning its first row."""
+    with pooled_connection() as con, con.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchone()
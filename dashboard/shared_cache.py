@@ -0,0 +1,121 @@
+"""A cache of query results shared by every dashboard replica, kept in the RDS.
+
+Results are cached under the data version, which the pipeline bumps after each run that
+loads hearings, so they are recomputed exactly when the data changes rather than on a timer.
+Each process also keeps the results it has seen in memory, so it reads each from the RDS
+once per data version. Like every dashboard query, each read & write checks a connection
+out of the pool and returns it straight after.
+
+Free-text searches are rarely repeated by other sessions, so `local_cache` keeps their results
+in memory only, rather than adding a row to the RDS for every search ever made.
+"""
+import functools
+import logging
+import pickle
+import threading
+import time
+from psycopg2.errors import UndefinedTable
+
+from rds_utils import pooled_connection, query_rds
+
+# How long a process trusts the data version it last read, before checking it again
+VERSION_CHECK_SECONDS = 10
+# How many results each process keeps in memory, dropping the oldest first
+MAX_LOCAL_ENTRIES = 256
+
+_data_version = None
+_version_checked_at = 0.0
+# Keyed by (data version, cache key), so results are never served for another version
+_local_cache = {}
+# Streamlit runs each session in its own thread
+_local_lock = threading.Lock()
+
+
+def get_data_version() -> int | None:
+    """Returns the version of the loaded data (None if the RDS has no data_version table),
+    reading it at most every `VERSION_CHECK_SECONDS`."""
+    global _data_version, _version_checked_at  # pylint: disable=global-statement
+    if time.monotonic() - _version_checked_at < VERSION_CHECK_SECONDS:
+        return _data_version
+
+    try:
+        row = query_rds("SELECT version FROM data_version;")
+        version = row["version"] if row else None
+    except UndefinedTable:
+        logging.warning("No data_version table, so query results won't be shared.")
+        version = None
+
+    if version != _data_version:
+        with _local_lock:
+            _local_cache.clear()
+    _data_version, _version_checked_at = version, time.monotonic()
+    return version
+
+
+def get_cache_key(func, args: tuple, kwargs: dict) -> str:
+    """Returns the key `func`'s result is cached under: its name & arguments."""
+    return f"{func.__module__}.{func.__qualname__}{args!r}{sorted(kwargs.items())!r}"
+
+
+def read_cached(key: str, version: int) -> bytes | None:
+    """Returns the pickled result cached under `key` for `version`, or None if there isn't one."""
+    row = query_rds("""
+        SELECT cache_value
+        FROM dashboard_cache
+        WHERE cache_key = %s AND data_version = %s;
+    """, (key, version))
+    return bytes(row["cache_value"]) if row else None
+
+
+def write_cached(key: str, version: int, value: bytes) -> None:
+    """Caches a pickled result under `key` for `version`, unless it's cached for a newer one."""
+    with pooled_connection() as con, con.cursor() as cur:
+        cur.execute("""
+            INSERT INTO dashboard_cache (cache_key, data_version, cache_value)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (cache_key) DO UPDATE
+            SET data_version = EXCLUDED.data_version,
+                cache_value = EXCLUDED.cache_value,
+                cached_at = CURRENT_TIMESTAMP
+            WHERE dashboard_cache.data_version <= EXCLUDED.data_version;
+        """, (key, version, value))
+        con.commit()
+
+
+def cache_under_version(func, shared: bool):
+    """Caches the results of `func`, a query, in memory under the data version, and in the RDS
+    too if `shared`. Like `st.cache_data`, each call returns a fresh copy, so callers may modify it.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        version = get_data_version()
+        if version is None:
+            return func(*args, **kwargs)
+
+        key = (version, get_cache_key(func, args, kwargs))
+        with _local_lock:
+            value = _local_cache.get(key)
+        if value is None and shared:
+            value = read_cached(key[1], version)
+        if value is None:
+            value = pickle.dumps(func(*args, **kwargs))
+            if shared:
+                write_cached(key[1], version, value)
+
+        with _local_lock:
+            _local_cache[key] = value
+            if len(_local_cache) > MAX_LOCAL_ENTRIES:
+                _local_cache.pop(next(iter(_local_cache)))
+        return pickle.loads(value)
+
+    return wrapper
+
+
+def shared_cache(func):
+    """Caches the results of `func`, a query, in the RDS under the data version."""
+    return cache_under_version(func, shared=True)
+
+
+def local_cache(func):
+    """Caches the results of `func`, a free-text query, in this process only."""
+    return cache_under_version(func, shared=False)
@@ -1,5 +1,6 @@
 """Util functions."""
 import logging
+import pandas as pd
 
 
 def setup_logging() -> None:
@@ -7,3 +8,11 @@ def setup_logging() -> None:
     logging.basicConfig(level=logging.INFO,
                         format='%(asctime)s - %(levelname)s - %(message)s')
     logging.info("Logging initialised.")
+
+
+def fill_missing(column: pd.Series, value: str) -> pd.Series:
+    """Fills a column's missing values with `value`, adding it to a categorical's categories."""
+    if isinstance(column.dtype, pd.CategoricalDtype) and column.isna().any() \
+            and value not in column.cat.categories:
+        column = column.cat.add_categories([value])
+    return column.fillna(value)
@@ -0,0 +1,144 @@
+"""Checks, with EXPLAIN, that each hot query made by the API, dashboard, email & loader
+uses its index.
+
+Sequential scans are disabled for the check, so the result doesn't depend on how much data
+the DB holds: it proves the planner *can* serve each query from the expected index.
+`hearing` is partitioned by month, so the indexes of its partitions are checked as the
+`hearing` index they belong to, and date-range queries are checked to scan only the
+partitions covering their range. Run against any DB with the schema (and migrations) applied:
+    python database/check_indexes.py
+"""
+
+import json
+import sys
+from os import environ as ENV
+
+import psycopg2
+from dotenv import load_dotenv
+
+# name: (query, params, index expected in its plan)
+HOT_QUERIES = {
+    "hearing by citation (api, pipeline uniqueness)": (
+        "SELECT * FROM hearing WHERE hearing_citation = %s;",
+        ("[2025] UKSC 1",), "unique_hearing_citation"),
+    "hearings in date range (api)": (
+        "SELECT * FROM hearing WHERE hearing_date >= %s AND hearing_date <= %s;",
+        ("2025-01-01", "2025-01-31"), "hearing_date_idx"),
+    "yesterday's hearings (email)": (
+        """SELECT * FROM hearing
+        WHERE hearing_date >= current_date - interval '1' day
+        AND hearing_date < current_date;""",
+        (), "hearing_date_idx"),
+    "keyword search (api, dashboard)": (
+        "SELECT * FROM hearing WHERE hearing_search @@ websearch_to_tsquery('english', %s);",
+        ("negligence",), "hearing_search_idx"),
+    "hearings by court": (
+        "SELECT * FROM hearing WHERE court_id = %s;",
+        (1,), "hearing_court_idx"),
+    "hearings by verdict (api)": (
+        "SELECT * FROM hearing WHERE judgement_id = %s;",
+        (1,), "hearing_judgement_idx"),
+    "cases sat by judge (api, dashboard)": (
+        "SELECT hearing_id FROM judge_hearing WHERE judge_id = %s;",
+        (1,), "unique_judge_hearing"),
+    "judges of a hearing (api)": (
+        "SELECT judge_id FROM judge_hearing WHERE hearing_id = %s;",
+        (1,), "judge_hearing_hearing_idx"),
+    "judge by last name (loader)": (
+        "SELECT judge_id FROM judge WHERE LOWER(last_name) %% LOWER(%s);",
+        ("Briggs",), "judge_last_name_trgm_idx"),
+    "judge name search (api, dashboard)": (
+        "SELECT judge_id FROM judge WHERE LOWER(%s) <%% judge_name;",
+        ("brigs",), "judge_name_trgm_idx"),
+    "court by name (loader)": (
+        "SELECT court_id FROM court WHERE LOWER(court_name) = LOWER(%s);",
+        ("Supreme Court",), "court_name_lower_idx"),
+    "title by name (loader)": (
+        "SELECT title_id FROM title WHERE LOWER(title_name) = LOWER(%s);",
+        ("Lord",), "title_name_lower_idx"),
+    "run token total (pipeline)": (
+        "SELECT COALESCE(SUM(total_tokens), 0) FROM token_usage WHERE run_id = %s;",
+        (1,), "token_usage_run_idx")
+}
+
+# name: (query, params, most hearing partitions its plan may scan)
+PRUNED_QUERIES = {
+    "yesterday's hearings (email)": (
+        """SELECT * FROM hearing
+        WHERE hearing_date >= current_date - interval '1' day
+        AND hearing_date < current_date;""",
+        (), 1),
+    "hearings in a month (api)": (
+        "SELECT * FROM hearing WHERE hearing_date >= %s AND hearing_date < %s;",
+        ("2025-01-01", "2025-02-01"), 1)
+}
+
+
+def get_plan_values(plan: dict, key: str) -> set[str]:
+    """Returns every value of `key` (e.g. "Index Name") anywhere in
+    an EXPLAIN (FORMAT JSON) plan node."""
+    values = {plan[key]} if key in plan else set()
+    for child in plan.get("Plans", []):
+        values |= get_plan_values(child, key)
+    return values
+
+
+def get_plan(cur, query: str, params: tuple) -> dict:
+    """Returns the top node of `query`'s plan."""
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def get_root_index(cur, index: str) -> str:
+    """Returns the name of the partitioned index `index` belongs to,
+    or `index` if it isn't a partition's."""
+    cur.execute("SELECT pg_partition_root(%s::regclass)::text;", (index,))
+    root = cur.fetchone()[0]
+    return root or index
+
+
+def check_query(cur, query: str, params: tuple, index: str) -> tuple[bool, set[str]]:
+    """Returns whether `query`'s plan uses `index`, along with every index it uses."""
+    used = {get_root_index(cur, name)
+            for name in get_plan_values(get_plan(cur, query, params), "Index Name")}
+    return index in used, used
+
+
+def check_pruning(cur, query: str, params: tuple, max_partitions: int) -> tuple[bool, set[str]]:
+    """Returns whether `query`'s plan scans at most `max_partitions` hearing partitions,
+    along with those it scans."""
+    scanned = {name for name in get_plan_values(get_plan(cur, query, params), "Relation Name")
+               if name.startswith("hearing_y")}
+    return len(scanned) <= max_partitions, scanned
+
+
+def main() -> int:
+    """Checks every hot query, and returns a non-zero exit code if any misses its index."""
+    load_dotenv()
+    conn = psycopg2.connect(dbname=ENV["DB_NAME"], host=ENV["DB_HOST"], port=ENV["DB_PORT"],
+                            user=ENV["DB_USERNAME"], password=ENV["DB_PASSWORD"])
+    failures = 0
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET enable_seqscan = off;")
+            for name, (query, params, index) in HOT_QUERIES.items():
+                ok, used = check_query(cur, query, params, index)
+                failures += not ok
+                print(f"{'OK  ' if ok else 'FAIL'} {name}: expected {index}, "
+                      f"used {', '.join(sorted(used)) or 'no index'}")
+            for name, (query, params, max_partitions) in PRUNED_QUERIES.items():
+                ok, scanned = check_pruning(cur, query, params, max_partitions)
+                failures += not ok
+                print(f"{'OK  ' if ok else 'FAIL'} {name}: expected at most {max_partitions} "
+                      f"partition(s), scanned {', '.join(sorted(scanned)) or 'none'}")
+        conn.rollback()
+    finally:
+        conn.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,33 @@
 -- Drop tables in reverse order of dependencies
+DROP MATERIALIZED VIEW IF EXISTS ruling_count_by_court_month;
+DROP MATERIALIZED VIEW IF EXISTS ruling_count_by_title_month;
+DROP MATERIALIZED VIEW IF EXISTS anomaly_count_by_court_month;
+DROP MATERIALIZED VIEW IF EXISTS judge_case_count;
 DROP TABLE IF EXISTS judge_hearing CASCADE;
+DROP TABLE IF EXISTS hearing_citation CASCADE;
 DROP TABLE IF EXISTS hearing CASCADE;
 DROP TABLE IF EXISTS judge CASCADE;
 DROP TABLE IF EXISTS court CASCADE;
 DROP TABLE IF EXISTS judgement CASCADE;
 DROP TABLE IF EXISTS title CASCADE;
 DROP TABLE IF EXISTS subscriber CASCADE;
+DROP TABLE IF EXISTS token_usage CASCADE;
+DROP TABLE IF EXISTS pipeline_run CASCADE;
+DROP TABLE IF EXISTS transcript_checkpoint CASCADE;
+DROP TABLE IF EXISTS backfill_entry CASCADE;
+DROP TABLE IF EXISTS hearing_section CASCADE;
+DROP TABLE IF EXISTS schema_migration CASCADE;
+DROP TABLE IF EXISTS data_version CASCADE;
+DROP TABLE IF EXISTS dashboard_cache CASCADE;
+DROP TABLE IF EXISTS judge_word_cloud CASCADE;
+DROP FUNCTION IF EXISTS create_hearing_partitions;
+DROP FUNCTION IF EXISTS set_hearing_search;
+DROP FUNCTION IF EXISTS get_hearing_search;
 -- Recreate schema
 
+-- Trigram matching, for fuzzy searches of judge names
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TABLE title (
     title_id BIGSERIAL PRIMARY KEY,
     title_name VARCHAR(60) UNIQUE NOT NULL
@@ -20,6 +40,11 @@ CREATE TABLE judge (
     middle_name VARCHAR(50),
     last_name VARCHAR(50) NOT NULL,
     appointment_date TIMESTAMP,
+    -- Lower-cased full name, searched by trigram similarity
+    judge_name TEXT GENERATED ALWAYS AS (
+        TRIM(regexp_replace(LOWER(COALESCE(first_name, '') || ' ' || COALESCE(middle_name, '') || ' ' || last_name),
+                       '\s+', ' ', 'g'))
+    ) STORED,
     CONSTRAINT unique_judge UNIQUE (
         title_id, first_name, middle_name, last_name, appointment_date
     )
@@ -40,27 +65,312 @@ CREATE TABLE court (
     court_name VARCHAR(80) NOT NULL
 );
 
+-- Partitioned by month of hearing_date, so date-range queries (e.g. yesterday's hearings)
+-- only scan the partitions they need. Its keys must include hearing_date, which is why
+-- judge_hearing references (hearing_id, hearing_date).
+-- Citations are kept unique by the hearing_citation table.
 CREATE TABLE hearing (
-    hearing_id BIGSERIAL PRIMARY KEY,
+    hearing_id BIGSERIAL,
     judgement_id BIGINT REFERENCES judgement (judgement_id),
     court_id BIGINT REFERENCES court (court_id),
     hearing_citation VARCHAR(50) NOT NULL,
     hearing_title VARCHAR(200),
-    hearing_date TIMESTAMP,
+    hearing_date TIMESTAMP NOT NULL,
     hearing_description VARCHAR(1000),
     hearing_anomaly VARCHAR(1000),
-    hearing_url VARCHAR(100)
+    hearing_url VARCHAR(100),
+    -- Searchable words, set by hearing_search_trigger
+    hearing_search TSVECTOR,
+    PRIMARY KEY (hearing_id, hearing_date),
+    CONSTRAINT unique_hearing_citation UNIQUE (hearing_citation, hearing_date)
+) PARTITION BY RANGE (hearing_date);
+
+-- Creates the monthly partitions of hearing (named hearing_yYYYYmMM) covering
+-- from_date to to_date which don't exist yet, and returns how many were created
+CREATE OR REPLACE FUNCTION create_hearing_partitions(from_date DATE, to_date DATE)
+RETURNS INT AS $$
+DECLARE
+    partition_month DATE := date_trunc('month', from_date);
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    -- Concurrent loaders may need the same partition, so only one creates it
+    PERFORM pg_advisory_xact_lock(hashtext('create_hearing_partitions'));
+    WHILE partition_month <= to_date LOOP
+        partition_name := 'hearing_' || to_char(partition_month, '"y"YYYY"m"MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF hearing FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, partition_month, partition_month + interval '1 month');
+            created := created + 1;
+        END IF;
+        partition_month := partition_month + interval '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The searchable words of a hearing, weighted so matches in the title rank above the summary,
+-- then anomalies
+CREATE OR REPLACE FUNCTION get_hearing_search(title TEXT, description TEXT, anomaly TEXT)
+RETURNS TSVECTOR AS $$
+    SELECT
+        setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(description, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(anomaly, '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION set_hearing_search()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.hearing_search := get_hearing_search(
+        NEW.hearing_title, NEW.hearing_description, NEW.hearing_anomaly);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A trigger rather than a generated column, so existing databases could add it without
+-- rewriting hearing (see pipeline/migrations/004_hearing_search.sql)
+CREATE TRIGGER hearing_search_trigger
+BEFORE INSERT OR UPDATE OF hearing_title, hearing_description, hearing_anomaly ON hearing
+FOR EACH ROW EXECUTE FUNCTION set_hearing_search();
+
+-- The loader creates the partition of each hearing it inserts, and every run creates the next few months'
+SELECT create_hearing_partitions(CURRENT_DATE, (CURRENT_DATE + interval '3 months')::DATE);
+
+-- Each citation's hearing. hearing's unique constraints must include hearing_date, so this
+-- keeps a citation to one hearing even if it's loaded again with a corrected date, and lets
+-- lookups by citation go straight to the hearing's partition.
+CREATE TABLE hearing_citation (
+    hearing_citation VARCHAR(50) PRIMARY KEY,
+    hearing_id BIGINT NOT NULL,
+    hearing_date TIMESTAMP NOT NULL,
+    FOREIGN KEY (hearing_id, hearing_date) REFERENCES hearing (hearing_id, hearing_date)
+        ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED
 );
 
 CREATE TABLE judge_hearing (
     judge_hearing_id BIGSERIAL PRIMARY KEY,
     judge_id BIGINT REFERENCES judge (judge_id),
-    hearing_id BIGINT REFERENCES hearing (hearing_id)
+    hearing_id BIGINT NOT NULL,
+    hearing_date TIMESTAMP NOT NULL,
+    FOREIGN KEY (hearing_id, hearing_date) REFERENCES hearing (hearing_id, hearing_date),
+    CONSTRAINT unique_judge_hearing UNIQUE (judge_id, hearing_id)
 );
 
+-- Indexes for the lookups made by the API, dashboard, email & loader
+-- (see pipeline/migrations for existing databases)
+
+CREATE INDEX hearing_date_idx
+ON
+hearing (hearing_date);
+
+CREATE INDEX hearing_court_idx
+ON
+hearing (court_id);
+
+CREATE INDEX hearing_judgement_idx
+ON
+hearing (judgement_id);
+
+CREATE INDEX hearing_search_idx
+ON
+hearing USING GIN (hearing_search);
+
+CREATE INDEX judge_hearing_hearing_idx
+ON
+judge_hearing (hearing_id);
+
+CREATE INDEX judge_name_trgm_idx
+ON
+judge USING GIN (judge_name gin_trgm_ops);
+
+CREATE INDEX judge_last_name_trgm_idx
+ON
+judge USING GIN (LOWER(last_name) gin_trgm_ops);
+
+CREATE INDEX court_name_lower_idx
+ON
+court (LOWER(court_name));
+
+CREATE INDEX title_name_lower_idx
+ON
+title (LOWER(title_name));
+
 CREATE TABLE subscriber(
     subscriber_id BIGSERIAL PRIMARY KEY,
     first_name VARCHAR(50),
     last_name VARCHAR(50),
     email VARCHAR(50) UNIQUE
-);
\ No newline at end of file
+);
+
+CREATE TABLE pipeline_run (
+    run_id BIGSERIAL PRIMARY KEY,
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    token_budget BIGINT
+);
+
+CREATE TABLE token_usage (
+    token_usage_id BIGSERIAL PRIMARY KEY,
+    run_id BIGINT REFERENCES pipeline_run (run_id),
+    hearing_citation VARCHAR(50) NOT NULL,
+    stage VARCHAR(20) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    input_tokens INT NOT NULL,
+    output_tokens INT NOT NULL,
+    total_tokens INT NOT NULL,
+    recorded_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX token_usage_run_idx
+ON
+token_usage (run_id);
+
+CREATE TABLE transcript_checkpoint (
+    hearing_citation VARCHAR(50) PRIMARY KEY,
+    stage VARCHAR(20) NOT NULL,
+    metadata JSONB NOT NULL,
+    payload JSONB,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX transcript_checkpoint_pending_idx
+ON
+transcript_checkpoint (stage)
+WHERE stage <> 'loaded';
+
+CREATE TABLE backfill_entry (
+    entry_uri VARCHAR(200) PRIMARY KEY,
+    entry_title VARCHAR(500),
+    xml_url VARCHAR(300) NOT NULL,
+    shard_index INT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    claimed_at TIMESTAMP
+);
+
+CREATE INDEX backfill_entry_claim_idx
+ON
+backfill_entry (shard_index, status, entry_uri);
+
+CREATE TABLE hearing_section (
+    hearing_citation VARCHAR(50) NOT NULL,
+    section_order INT NOT NULL,
+    section_heading TEXT NOT NULL,
+    section_content BYTEA NOT NULL,
+    PRIMARY KEY (hearing_citation, section_order)
+);
+
+-- Content is already zlib-compressed, so skip TOAST compressing it again
+ALTER TABLE hearing_section ALTER COLUMN section_content SET STORAGE EXTERNAL;
+
+-- Pre-aggregated counts read by the dashboard, refreshed by the pipeline after each run
+-- (each has a unique index, so it can be refreshed CONCURRENTLY without blocking readers)
+CREATE MATERIALIZED VIEW ruling_count_by_court_month AS
+SELECT
+    COALESCE(c.court_name, 'Unknown') AS court_name,
+    date_trunc('month', h.hearing_date)::DATE AS hearing_month,
+    COALESCE(j.judgement_favour, 'Undisclosed') AS judgement_favour,
+    COUNT(*)::INT AS hearing_count
+FROM hearing h
+LEFT JOIN court c ON h.court_id = c.court_id
+LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX ruling_count_by_court_month_idx
+ON
+ruling_count_by_court_month (court_name, hearing_month, judgement_favour);
+
+CREATE MATERIALIZED VIEW ruling_count_by_title_month AS
+SELECT
+    COALESCE(t.title_name, 'Unknown') AS title_name,
+    date_trunc('month', h.hearing_date)::DATE AS hearing_month,
+    COALESCE(j.judgement_favour, 'Undisclosed') AS judgement_favour,
+    COUNT(DISTINCT h.hearing_id)::INT AS hearing_count
+FROM hearing h
+LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+LEFT JOIN judge_hearing jh ON h.hearing_id = jh.hearing_id AND h.hearing_date = jh.hearing_date
+LEFT JOIN judge jd ON jh.judge_id = jd.judge_id
+LEFT JOIN title t ON jd.title_id = t.title_id
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX ruling_count_by_title_month_idx
+ON
+ruling_count_by_title_month (title_name, hearing_month, judgement_favour);
+
+CREATE MATERIALIZED VIEW anomaly_count_by_court_month AS
+SELECT
+    COALESCE(c.court_name, 'Unknown') AS court_name,
+    date_trunc('month', h.hearing_date)::DATE AS hearing_month,
+    COUNT(*)::INT AS anomaly_count
+FROM hearing h
+LEFT JOIN court c ON h.court_id = c.court_id
+WHERE LOWER(TRIM(COALESCE(h.hearing_anomaly, ''))) <> 'none found'
+GROUP BY 1, 2;
+
+CREATE UNIQUE INDEX anomaly_count_by_court_month_idx
+ON
+anomaly_count_by_court_month (court_name, hearing_month);
+
+CREATE MATERIALIZED VIEW judge_case_count AS
+SELECT
+    judge_id,
+    COUNT(DISTINCT hearing_id)::INT AS case_count,
+    MAX(hearing_date) AS last_hearing_date
+FROM judge_hearing
+GROUP BY judge_id;
+
+CREATE UNIQUE INDEX judge_case_count_idx
+ON
+judge_case_count (judge_id);
+
+-- Word clouds of each judge's hearing summaries, rendered by the pipeline after each run
+-- for the judges of the hearings it loaded, so the dashboard only fetches their PNGs
+CREATE TABLE judge_word_cloud (
+    judge_id BIGINT PRIMARY KEY REFERENCES judge (judge_id),
+    term_frequencies JSONB NOT NULL,
+    word_cloud_png BYTEA NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- PNGs are already compressed, so skip TOAST compressing them again
+ALTER TABLE judge_word_cloud ALTER COLUMN word_cloud_png SET STORAGE EXTERNAL;
+
+-- The version of the loaded data, bumped by the pipeline after each run which loads hearings.
+-- The dashboard's shared cache is keyed by it, so its results are recomputed when data changes.
+CREATE TABLE data_version (
+    single_row BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (single_row),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version DEFAULT VALUES;
+
+-- Query results shared by every dashboard replica; only a cache, so not worth WAL-logging
+CREATE UNLOGGED TABLE dashboard_cache (
+    cache_key TEXT PRIMARY KEY,
+    data_version BIGINT NOT NULL,
+    cache_value BYTEA NOT NULL,
+    cached_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Migrations this schema already includes, so pipeline/migrate.py doesn't apply them
+-- (a NULL checksum marks a migration as applied by this file). Add each new one here.
+CREATE TABLE schema_migration (
+    version INT PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migration
+    (version, name)
+VALUES
+    (0, 'pipeline_tables'),
+    (1, 'hot_query_indexes'),
+    (2, 'partition_hearing'),
+    (3, 'analytics_views'),
+    (4, 'hearing_search'),
+    (5, 'judge_name_search'),
+    (6, 'dashboard_cache'),
+    (7, 'judge_word_cloud'),
+    (8, 'hearing_citation'),
+    (9, 'drop_judge_last_name_lower_idx');
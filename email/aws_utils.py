@@ -3,30 +3,30 @@
 import logging
 from os import environ as ENV
 from psycopg2.extensions import connection
-from psycopg2 import connect, Error
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 import boto3
 
+import rds_pool
+
+# The pool is kept at module level, so warm Lambda invocations reuse the same connections
+rds_pool.configure(default_max_connections=2)
+
 
 def get_db_connection():
-    """Gets the db connection and returns it."""
-    load_dotenv()
+    """Gets a healthy connection from the shared pool and returns it."""
     try:
-        con = connect(
-            host=ENV["DB_HOST"],
-            database=ENV["DB_NAME"],
-            user=ENV["DB_USERNAME"],
-            password=ENV["DB_PASSWORD"],
-            port=ENV["DB_PORT"],
-            cursor_factory=RealDictCursor,
-        )
-        logging.info("Connected to RDS.")
-        return con
-    except Error as e:
-        # print(f"Error connecting to database: {e}")
+        con = rds_pool.get_connection(cursor_factory=RealDictCursor)
+    except ConnectionError:
         logging.critical("Error connecting to RDS")
         return None
+    logging.info("Connected to RDS.")
+    return con
+
+
+def release_db_connection(con: connection) -> None:
+    """Returns a connection to the pool."""
+    rds_pool.release_connection(con)
 
 
 def query_rds(con: connection, query: str) -> dict:
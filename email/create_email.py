@@ -3,7 +3,7 @@
 import logging
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from aws_utils import get_db_connection, query_rds
+from aws_utils import get_db_connection, release_db_connection, query_rds
 from psycopg2.extensions import connection
 
 logging.basicConfig(level=logging.INFO,
@@ -26,7 +26,9 @@ def get_yesterdays_hearings(conn: connection) -> list[dict]:
         judgement j 
     USING(judgement_id)
     WHERE
-        date(hearing_date) = (current_date - interval '1' day);
+        -- A range, rather than date(hearing_date), so hearing_date_idx can be used
+        hearing_date >= (current_date - interval '1' day)
+        AND hearing_date < current_date;
     """
     hearings = query_rds(conn, query)
 
@@ -112,7 +114,7 @@ def get_subscribers_and_email(dashboard_url: str):
     subscriber_emails = get_subscriber_list(conn)
     email = write_email(hearings, dashboard_url)
 
-    conn.close()
+    release_db_connection(conn)
 
     res = {
         'subscriber_emails': subscriber_emails,
@@ -0,0 +1,63 @@
+"""Publishes newly loaded hearings to the dashboard: refreshes the materialized views of
+pre-aggregated counts which it charts, re-renders the word clouds of their judges, and bumps
+the data version its shared cache is keyed by."""
+
+import logging
+
+from psycopg2.extensions import connection
+
+import load
+import word_clouds
+
+# Views in database/schema.sql, each with a unique index so it can be refreshed concurrently
+ANALYTICS_VIEWS = (
+    "ruling_count_by_court_month",
+    "ruling_count_by_title_month",
+    "anomaly_count_by_court_month",
+    "judge_case_count"
+)
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def refresh_analytics_views(conn: connection) -> None:
+    """Recomputes every analytics view, without blocking the dashboard's reads of them."""
+    for view in ANALYTICS_VIEWS:
+        with conn.cursor() as cur:
+            cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+        conn.commit()
+    logging.info("Refreshed %s analytics views", len(ANALYTICS_VIEWS))
+
+
+def bump_data_version(conn: connection) -> int:
+    """Bumps the data version, dropping results the dashboard cached for older ones,
+    and returns it."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE data_version
+            SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            RETURNING version;
+        """)
+        version = cur.fetchone()[0]
+        cur.execute("""
+            DELETE FROM dashboard_cache
+            WHERE data_version < %s;
+        """, (version,))
+    conn.commit()
+    logging.info("Bumped data version to %s", version)
+    return version
+
+
+def publish_changes(conn: connection) -> None:
+    """Refreshes the analytics views & their judges' word clouds, then bumps the data version,
+    if any hearings have been loaded since they were last published."""
+    loaded = load.pop_hearings_loaded()
+    judge_ids = load.pop_loaded_judge_ids()
+    if not loaded:
+        logging.info("No hearings loaded, so the dashboard's data is unchanged")
+        return
+    logging.info("Publishing %s loaded hearings", loaded)
+    refresh_analytics_views(conn)
+    word_clouds.update_word_clouds(conn, judge_ids)
+    bump_data_version(conn)
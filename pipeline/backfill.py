@@ -0,0 +1,96 @@
+"""Historical ingestion of transcripts over a date range, split into shards which run in parallel.
+
+Each shard is given every K-th day of the range, so shards never overlap. A shard first
+registers the feed entries for its days in the `backfill_entry` table, then repeatedly
+claims a batch of them with `FOR UPDATE SKIP LOCKED`, so that even several workers
+on the same shard never process the same transcript twice.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor, execute_values
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+# Claims older than this are assumed to belong to a crashed worker, and can be claimed again
+CLAIM_TIMEOUT_MINUTES = 30
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def get_shard_dates(from_date: date, to_date: date, shards: int, shard_index: int) -> list[date]:
+    """Returns every day between `from_date` and `to_date` (inclusive)
+    which belongs to `shard_index`."""
+    if shards < 1:
+        raise ValueError("shards must be a value greater than 0")
+    if not 0 <= shard_index < shards:
+        raise ValueError("shard_index must be between 0 and shards - 1")
+    if to_date < from_date:
+        raise ValueError("to_date must be on or after from_date")
+
+    days = (to_date - from_date).days + 1
+    return [from_date + timedelta(days=offset)
+            for offset in range(shard_index, days, shards)]
+
+
+def register_entries(conn: connection, entries: list[tuple], shard_index: int) -> None:
+    """Adds feed entries to the backfill queue, ignoring any which are already registered."""
+    rows = [(uri, title, href, shard_index)
+            for title, uri, href in entries if href]
+    if not rows:
+        return
+
+    with conn.cursor() as cur:
+        query = """
+        INSERT INTO backfill_entry (entry_uri, entry_title, xml_url, shard_index)
+        VALUES %s
+        ON CONFLICT (entry_uri) DO NOTHING;
+        """
+        execute_values(cur, query, rows)
+        conn.commit()
+
+
+def claim_entries(conn: connection, shard_index: int, batch_size: int) -> list[dict]:
+    """
+    Claims up to `batch_size` unprocessed entries of a shard, skipping any
+    locked by another worker, and returns them.
+    """
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+        UPDATE backfill_entry
+        SET status = %s, claimed_at = NOW()
+        WHERE entry_uri IN (
+            SELECT entry_uri
+            FROM backfill_entry
+            WHERE shard_index = %s
+            AND (
+                status = %s
+                OR (status = %s AND claimed_at < NOW() - make_interval(mins => %s))
+            )
+            ORDER BY entry_uri
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING entry_uri, entry_title, xml_url;
+        """
+        cur.execute(query, (CLAIMED, shard_index, PENDING, CLAIMED,
+                            CLAIM_TIMEOUT_MINUTES, batch_size))
+        claimed = cur.fetchall()
+        conn.commit()
+    return claimed
+
+
+def mark_entries_done(conn: connection, entry_uris: list[str]) -> None:
+    """Marks claimed entries as processed."""
+    with conn.cursor() as cur:
+        query = """
+        UPDATE backfill_entry
+        SET status = %s
+        WHERE entry_uri = ANY(%s);
+        """
+        cur.execute(query, (DONE, entry_uris))
+        conn.commit()
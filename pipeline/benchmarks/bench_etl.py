@@ -0,0 +1,178 @@
+"""Offline benchmark of the whole ETL, reporting docs/sec and per-stage latency.
+
+The National Archives, judiciary.uk and GPT-API are replaced by local stand-ins which
+replay a recorded (or synthetic) corpus, and hearings are loaded into an ephemeral
+PostgreSQL server, so runs are repeatable and cost nothing.
+
+Run from the pipeline directory:
+    python -m benchmarks.bench_etl --sizes 20 200 2000
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import responses
+
+import db_pool
+import etl
+import instrumentation
+from gpt import summary
+from judge_scraping import judges_rds
+from benchmarks import ephemeral_db, fixtures, stand_ins
+
+FEED_URL_PATTERN = re.compile(r"https://caselaw\.nationalarchives\.gov\.uk/atom\.xml.*")
+XML_URL_PATTERN = re.compile(re.escape(fixtures.XML_BASE_URL) + r"/(\d+)\.xml")
+DEFAULT_SIZES = [20, 200, 2000]
+
+
+@contextmanager
+def replay_http(corpus: list[str]):
+    """Serves the Atom feed and XMLs of `corpus` in place of the National Archives."""
+    def feed_callback(request):
+        query = parse_qs(urlparse(request.url).query)
+        per_page = int(query.get("per_page", [20])[0])
+        return 200, {}, fixtures.make_feed(min(per_page, len(corpus)))
+
+    def xml_callback(request):
+        number = int(XML_URL_PATTERN.match(request.url).group(1))
+        return 200, {}, corpus[number]
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as mock:
+        mock.add_callback(responses.GET, FEED_URL_PATTERN, callback=feed_callback)
+        mock.add_callback(responses.GET, XML_URL_PATTERN, callback=xml_callback)
+        yield
+
+
+def count_hearings() -> int:
+    """Returns the number of hearings loaded into the DB."""
+    with db_pool.pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM hearing;")
+            return cur.fetchone()[0]
+
+
+def run_benchmark(size: int, recorded: list[str] = None, pipelined: bool = False,
+                  workers: int = 1, batch_size: int = 20, batch_latency: float = 0.0) -> dict:
+    """Runs the ETL over a fresh DB and a corpus of `size` transcripts, and returns its timings."""
+    db_pool.close_pool()
+    ephemeral_db.reset_database()
+    corpus = fixtures.make_corpus(size, recorded)
+
+    with replay_http(corpus), \
+            patch.object(summary, "openai", stand_ins.FakeOpenAI(batch_latency)), \
+            patch.object(judges_rds, "scrape_and_upload_judges"):
+        start = time.perf_counter()
+        if pipelined:
+            etl.run_pipelined_etl(number_of_transcripts=size, batch_size=batch_size)
+        else:
+            etl.run_etl(number_of_transcripts=size, workers=workers)
+        seconds = time.perf_counter() - start
+
+    stages = {name: {"seconds": round(totals["seconds"], 3),
+                     "ms_per_item": round(1000 * totals["seconds"] / totals["items"], 3)
+                     if totals["items"] else None,
+                     "db_round_trips": totals["db_round_trips"]}
+              for name, totals in instrumentation.get_stage_totals().items()}
+    return {"transcripts": size,
+            "loaded": count_hearings(),
+            "seconds": round(seconds, 3),
+            "docs_per_second": round(size / seconds, 2),
+            "stages": stages}
+
+
+def format_results(results: list[dict]) -> str:
+    """Formats benchmark results as a plain text table, with a column of ms/item per stage."""
+    stage_names = list(dict.fromkeys(name for result in results for name in result["stages"]))
+    header = f"{'transcripts':>11} {'loaded':>7} {'seconds':>9} {'docs/s':>8} " + \
+        " ".join(f"{name[:12]:>12}" for name in stage_names)
+    lines = [header, "-" * len(header)]
+    for result in results:
+        latencies = [result["stages"].get(name, {}).get("ms_per_item") for name in stage_names]
+        lines.append(
+            f"{result['transcripts']:>11} {result['loaded']:>7} {result['seconds']:>9.2f} "
+            f"{result['docs_per_second']:>8.2f} " +
+            " ".join(f"{latency:>12.2f}" if latency is not None else f"{'-':>12}"
+                     for latency in latencies))
+    return "\n".join(lines)
+
+
+def find_regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Returns a message for each size whose docs/sec fell more than `tolerance`
+    below the baseline."""
+    baseline_by_size = {result["transcripts"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_size.get(result["transcripts"])
+        if previous is None:
+            continue
+        floor = previous["docs_per_second"] * (1 - tolerance)
+        if result["docs_per_second"] < floor:
+            regressions.append(
+                f"{result['transcripts']} transcripts: {result['docs_per_second']} docs/s "
+                f"(baseline {previous['docs_per_second']} docs/s)")
+    return regressions
+
+
+def get_args() -> argparse.Namespace:
+    """Sets up CLI arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the ETL offline.")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Numbers of transcripts to benchmark (default 20 200 2000).")
+    parser.add_argument("-r", "--recorded",
+                        help="Directory of recorded XMLs to replay, instead of synthetic ones.")
+    parser.add_argument("-p", "--pipelined", action="store_true",
+                        help="Benchmark the pipelined ETL.")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of processes to parse XMLs with (default 1).")
+    parser.add_argument("--batch-size", type=int, default=20,
+                        help="Transcripts per GPT-API batch when pipelined (default 20).")
+    parser.add_argument("--batch-latency", type=float, default=0.0,
+                        help="Seconds of simulated GPT-API processing per batch (default 0).")
+    parser.add_argument("--use-env-db", action="store_true",
+                        help="Use the (disposable!) DB in the DB_* env vars "
+                             "instead of an ephemeral one.")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file.")
+    parser.add_argument("-b", "--baseline",
+                        help="JSON results of a previous run to compare against.")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.2,
+                        help="Allowed fractional drop in docs/sec against the baseline "
+                             "(default 0.2).")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Runs the benchmarks, and returns a non-zero exit code on a regression."""
+    args = get_args()
+    # Per-transcript logs would dominate the output, so only the report is shown
+    logging.getLogger().setLevel(logging.WARNING)
+    recorded = fixtures.load_recorded_xmls(args.recorded) if args.recorded else None
+
+    with (nullcontext() if args.use_env_db else ephemeral_db.ephemeral_postgres()):
+        results = [run_benchmark(size, recorded, args.pipelined, args.workers,
+                                 args.batch_size, args.batch_latency)
+                   for size in args.sizes]
+        db_pool.close_pool()
+
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
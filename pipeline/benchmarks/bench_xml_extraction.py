@@ -0,0 +1,80 @@
+# pylint: skip-file
+
+"""Micro-benchmarks for the XML extraction hot paths, which is where per-document CPU goes.
+
+Each function is timed with pytest-benchmark over small, medium and pathological synthetic
+transcripts, and its peak memory (from tracemalloc) is saved alongside the timings.
+These aren't collected by a plain `pytest` run; from the pipeline directory, run:
+    python -m pytest benchmarks/bench_xml_extraction.py --benchmark-autosave
+"""
+
+import tracemalloc
+
+import pytest
+from lxml import etree
+
+from benchmarks.fixtures import make_transcript_xml
+from xml_extraction import metadata_xml, parse_xml
+
+# name: (make_transcript_xml keyword arguments, timed rounds)
+DOCUMENTS = {
+    "small": ({}, 50),
+    "medium": ({"sections": 50, "paragraphs_per_section": 20, "subparagraphs": 100}, 10),
+    # Thousands of <level> & <subparagraph> elements
+    "pathological": ({"sections": 2000, "paragraphs_per_section": 1, "subparagraphs": 2000}, 2)
+}
+METADATA_GETTERS = [
+    metadata_xml.get_case_url,
+    metadata_xml.get_case_judgement_date,
+    metadata_xml.get_case_citation,
+    metadata_xml.get_case_name,
+    metadata_xml.get_court_name,
+    metadata_xml.get_judges
+]
+
+
+@pytest.fixture(scope="module", params=DOCUMENTS, ids=str)
+def document(request):
+    """Returns the XML string of a document, and how many rounds to time it for."""
+    kwargs, rounds = DOCUMENTS[request.param]
+    return make_transcript_xml(0, **kwargs), rounds
+
+
+def run(benchmark, rounds, func, *args):
+    """Records the peak memory of one call of `func`, then times it."""
+    tracemalloc.start()
+    func(*args)
+    benchmark.extra_info["peak_memory_kib"] = tracemalloc.get_traced_memory()[1] // 1024
+    tracemalloc.stop()
+    return benchmark.pedantic(func, args=args, rounds=rounds, warmup_rounds=1)
+
+
+def test_get_headings(benchmark, document):
+    xml, rounds = document
+    root = etree.fromstring(xml.encode())
+    assert run(benchmark, rounds, parse_xml.get_headings, root)
+
+
+def test_get_text_between_elements(benchmark, document):
+    xml, rounds = document
+    root = etree.fromstring(xml.encode())
+    headings = parse_xml.get_headings(root)
+    assert run(benchmark, rounds, parse_xml.get_text_between_elements, root, headings[0])
+
+
+def test_get_label_text_dict(benchmark, document):
+    xml, rounds = document
+    assert run(benchmark, rounds, parse_xml.get_label_text_dict, xml)
+
+
+def test_get_metadata(benchmark, document):
+    xml, rounds = document
+    assert run(benchmark, rounds, metadata_xml.get_metadata, xml)["citation"]
+
+
+@pytest.mark.parametrize("getter", METADATA_GETTERS, ids=lambda getter: getter.__name__)
+def test_metadata_getter(benchmark, document, getter):
+    xml, rounds = document
+    meta = etree.fromstring(xml.encode()).xpath(
+        "//n:meta", namespaces=metadata_xml.NS_MAPPING)[0]
+    assert run(benchmark, rounds, getter, meta)
@@ -0,0 +1,80 @@
+"""A throwaway PostgreSQL server for the ETL benchmarks, with the project schema loaded.
+
+Needs the PostgreSQL server binaries (`initdb`, `pg_ctl`) on the PATH, or in `PG_BIN`.
+"""
+
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from os import environ as ENV
+from pathlib import Path
+
+import psycopg2
+
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+DB_NAME = "courts_bench"
+DB_USERNAME = "bench"
+
+
+def find_binary(name: str) -> str:
+    """Returns the path of a PostgreSQL server binary."""
+    path = shutil.which(name, path=ENV.get("PG_BIN")) or shutil.which(name)
+    if path is None:
+        raise FileNotFoundError(
+            f"{name} not found; install PostgreSQL or point PG_BIN at its bin directory")
+    return path
+
+
+def get_free_port() -> int:
+    """Returns a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def reset_database() -> None:
+    """Drops and recreates every table in the DB described by the DB_* env vars, and seeds it."""
+    conn = psycopg2.connect(dbname=ENV["DB_NAME"], host=ENV["DB_HOST"], port=ENV["DB_PORT"],
+                            user=ENV["DB_USERNAME"], password=ENV["DB_PASSWORD"])
+    try:
+        with conn.cursor() as cur:
+            for filename in ("schema.sql", "seed_db.sql"):
+                cur.execute((DATABASE_DIR / filename).read_text(encoding="utf-8"))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@contextmanager
+def ephemeral_postgres():
+    """
+    Starts a PostgreSQL server in a temporary directory and points the DB_* env vars
+    at a new, empty DB on it. The server and its data are removed afterwards.
+    """
+    data_dir = tempfile.mkdtemp(prefix="courts_bench_")
+    port = get_free_port()
+    subprocess.run([find_binary("initdb"), "-D", data_dir, "-U", DB_USERNAME, "--auth=trust"],
+                   check=True, capture_output=True)
+    subprocess.run([find_binary("pg_ctl"), "-D", data_dir,
+                    "-l", os.path.join(data_dir, "server.log"),
+                    "-o", f"-p {port} -k {data_dir} -c fsync=off", "-w", "start"],
+                   check=True, capture_output=True)
+    logging.info("Started ephemeral PostgreSQL on port %s", port)
+    try:
+        conn = psycopg2.connect(dbname="postgres", host="localhost", port=port, user=DB_USERNAME)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE {DB_NAME};")
+        conn.close()
+
+        ENV.update({"DB_NAME": DB_NAME, "DB_HOST": "localhost", "DB_PORT": str(port),
+                    "DB_USERNAME": DB_USERNAME, "DB_PASSWORD": ""})
+        yield
+    finally:
+        subprocess.run([find_binary("pg_ctl"), "-D", data_dir, "-m", "immediate", "stop"],
+                       check=False, capture_output=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
@@ -0,0 +1,157 @@
+"""Transcript corpora for the offline ETL benchmarks.
+
+A corpus is either built from synthetic Akoma Ntoso transcripts (in the shape of
+`xml_extraction/conftest.py`), or replayed from XMLs previously recorded from the
+National Archives with `python case_fetcher/case_fetcher.py --download`.
+"""
+
+import re
+from pathlib import Path
+
+XML_BASE_URL = "https://bench.local/xml"
+COURTS = ["Supreme Court", "Court of Appeal (Civil Division)", "High Court (Chancery Division)"]
+JUDGES = ["Lord Briggs", "Lord Sales", "Lady Simler", "Mr Justice Fancourt", "Lord Justice Arnold"]
+HEADINGS = ["Introduction", "The facts", "The legal framework", "The grounds of appeal",
+            "Discussion", "Conclusion"]
+PARAGRAPH = "The appellant submits that the judge erred in law in concluding that " \
+    "the respondent was entitled to rely on the clause. "
+
+TRANSCRIPT_TEMPLATE = """<akomaNtoso xmlns="http://docs.oasis-open.org/legaldocml/ns/akn/3.0" \
+xmlns:uk="https://caselaw.nationalarchives.gov.uk/akn">
+<judgment name="judgment">
+<meta>
+<identification source="#tna">
+<FRBRWork>
+<FRBRthis value="https://caselaw.nationalarchives.gov.uk/id/bench/2025/{number}"/>
+<FRBRdate date="2025-{month:02d}-{day:02d}" name="judgment"/>
+<FRBRname value="Claimant {number} v Defendant {number}"/>
+</FRBRWork>
+<FRBRExpression>
+<FRBRthis value="https://caselaw.nationalarchives.gov.uk/bench/2025/{number}"/>
+<FRBRdate date="2025-{month:02d}-{day:02d}" name="judgment"/>
+</FRBRExpression>
+</identification>
+<references source="#tna">
+<TLCOrganization eId="bench" href="https://bench.local/" showAs="{court}"/>
+<TLCOrganization eId="tna" href="https://www.nationalarchives.gov.uk/" showAs="The National Archives"/>
+<TLCPerson eId="claimant" href="" showAs="Claimant {number}"/>
+{judges}
+</references>
+<proprietary source="#">
+<uk:cite>[2025] BENCH {number}</uk:cite>
+</proprietary>
+</meta>
+<judgmentBody>
+<decision>
+{sections}
+</decision>
+</judgmentBody>
+</judgment>
+</akomaNtoso>
+"""
+
+SECTION_TEMPLATE = """<level eId="lvl_{index}">
+<content>
+<p class="Paraheading6">{heading}</p>
+</content>
+</level>
+{paragraphs}"""
+
+SUBPARAGRAPH_TEMPLATE = """<subparagraph>
+{num}<content>
+<p class="ParaLevel1">{text}</p>
+</content>
+</subparagraph>
+"""
+
+PARAGRAPH_TEMPLATE = """<paragraph>
+<num>{index}.</num>
+<content>
+<p class="ParaLevel1">{text}</p>
+</content>
+</paragraph>
+"""
+
+
+def make_sections(sections: int, paragraphs_per_section: int) -> str:
+    """Returns `sections` <level> headings, each followed by `paragraphs_per_section` paragraphs."""
+    return "".join(
+        SECTION_TEMPLATE.format(
+            index=i,
+            heading=HEADINGS[i] if i < len(HEADINGS) else f"{HEADINGS[i % len(HEADINGS)]} {i}",
+            paragraphs="".join(PARAGRAPH_TEMPLATE.format(index=i * paragraphs_per_section + j,
+                                                         text=PARAGRAPH * 4)
+                               for j in range(paragraphs_per_section)))
+        for i in range(sections))
+
+
+def make_subparagraphs(subparagraphs: int) -> str:
+    """Returns `subparagraphs` <subparagraph> elements;
+    every other one is numbered, so isn't a heading."""
+    return "".join(
+        SUBPARAGRAPH_TEMPLATE.format(num=f"<num>({i})</num>\n" if i % 2 else "",
+                                     text=f"Subheading {i}" if i % 2 == 0 else PARAGRAPH)
+        for i in range(subparagraphs))
+
+
+def make_transcript_xml(number: int, paragraphs_per_section: int = 5,
+                        sections: int = len(HEADINGS), subparagraphs: int = 0) -> str:
+    """
+    Returns a synthetic transcript, whose citation, court and judges vary with `number`.
+    Larger `sections` & `subparagraphs` give the documents the XML extraction benchmarks run on.
+    """
+    judges = "\n".join(
+        f'<TLCPerson eId="judge-{i}" href="/judge-{i}" '
+        f'showAs="{JUDGES[(number + i) % len(JUDGES)]}"/>'
+        for i in range(3))
+    return TRANSCRIPT_TEMPLATE.format(number=number,
+                                      month=number % 12 + 1,
+                                      day=number % 28 + 1,
+                                      court=COURTS[number % len(COURTS)],
+                                      judges=judges,
+                                      sections=make_sections(sections, paragraphs_per_section)
+                                      + make_subparagraphs(subparagraphs))
+
+
+def load_recorded_xmls(directory: str) -> list[str]:
+    """Returns every XML previously downloaded to `directory`."""
+    paths = sorted(Path(directory).glob("*.xml"))
+    if not paths:
+        raise FileNotFoundError(f"No recorded XMLs found in {directory}")
+    return [path.read_text(encoding="utf-8") for path in paths]
+
+
+def make_citation_unique(xml: str, number: int) -> str:
+    """Rewrites the citation of a recorded XML,
+    so that replaying it more than once loads a new hearing."""
+    return re.sub(r"<uk:cite>(.*?)</uk:cite>",
+                  lambda match: f"<uk:cite>{match.group(1)[:40]} #{number}</uk:cite>",
+                  xml, count=1)
+
+
+def make_corpus(size: int, recorded: list[str] = None) -> list[str]:
+    """Returns `size` transcripts with unique citations,
+    cycling through `recorded` XMLs if given."""
+    if recorded:
+        return [make_citation_unique(recorded[i % len(recorded)], i) for i in range(size)]
+    return [make_transcript_xml(i) for i in range(size)]
+
+
+def get_xml_url(number: int) -> str:
+    """Returns the URL transcript `number` of a corpus is served from."""
+    return f"{XML_BASE_URL}/{number}.xml"
+
+
+def make_feed(size: int) -> str:
+    """Returns an Atom feed (in the shape of `case_fetcher/conftest.py`)
+    with entries for the first `size` transcripts."""
+    entries = "".join(f"""
+    <entry>
+        <title>Benchmark Case {i}</title>
+        <tna:uri>https://caselaw.nationalarchives.gov.uk/id/bench/{i}</tna:uri>
+        <link type="application/akn+xml" href="{get_xml_url(i)}"/>
+    </entry>""" for i in range(size))
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:tna="https://caselaw.nationalarchives.gov.uk">{entries}
+</feed>
+"""
@@ -0,0 +1,122 @@
+"""A local stand-in for GPT-API, so the ETL can be benchmarked offline.
+
+`FakeOpenAI` implements the parts of the OpenAI Batch API used by `gpt/summary.py`,
+completing each batch as soon as it is created, with output in the recorded format.
+"""
+
+import ast
+import itertools
+import json
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+RULINGS = ["Plaintiff", "Defendant"]
+
+
+def answer_request(request: dict) -> str:
+    """Returns the content GPT-API would be expected to answer a batch request with."""
+    system_prompt, user_prompt = (message["content"]
+                                  for message in request["body"]["messages"])
+    if "list of headers" in system_prompt:
+        # Keep every heading
+        return ",".join(f"'{heading}'" for heading in ast.literal_eval(user_prompt))
+    ruling = RULINGS[sum(map(ord, request["custom_id"])) % len(RULINGS)]
+    return json.dumps({
+        "summary": f"A benchmark hearing ({request['custom_id']}).",
+        "ruling": ruling,
+        "anomaly": "None Found"
+    })
+
+
+def make_batch_record(request: dict) -> str:
+    """Returns the batch output line for `request`,
+    in the format of a recorded batch output file."""
+    content = answer_request(request)
+    prompt_tokens = sum(len(message["content"])
+                        for message in request["body"]["messages"]) // 4
+    completion_tokens = len(content) // 4
+    return json.dumps({
+        "custom_id": request["custom_id"],
+        "response": {"body": {
+            "model": request["body"]["model"],
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens,
+                      "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }}
+    })
+
+
+class FakeStreamedFile:
+    """Stands in for a streamed file content response."""
+
+    def __init__(self, lines: list[str]):
+        self.lines = lines
+
+    def iter_lines(self):
+        """Yields each line of the file."""
+        yield from self.lines
+
+
+class FakeFiles:
+    """Stands in for `OpenAI().files`."""
+
+    def __init__(self, client: "FakeOpenAI"):
+        self.client = client
+        self.with_streaming_response = SimpleNamespace(content=self.content)
+
+    def create(self, file, purpose: str):
+        """Stores an uploaded batch input file."""
+        with file:
+            lines = file.read().decode("utf-8").splitlines()
+        return SimpleNamespace(id=self.client.store_file(lines), purpose=purpose)
+
+    @contextmanager
+    def content(self, file_id: str):
+        """Streams a stored file."""
+        yield FakeStreamedFile(self.client.files_by_id[file_id])
+
+
+class FakeBatches:
+    """Stands in for `OpenAI().batches`, completing each batch as soon as it is created."""
+
+    def __init__(self, client: "FakeOpenAI"):
+        self.client = client
+
+    def create(self, input_file_id: str, endpoint: str, completion_window: str):
+        """Answers every request in the input file, after the client's simulated latency."""
+        time.sleep(self.client.batch_latency)
+        output = [make_batch_record(json.loads(line))
+                  for line in self.client.files_by_id[input_file_id] if line.strip()]
+        batch = SimpleNamespace(id=f"batch_{next(self.client.ids)}",
+                                status="completed",
+                                endpoint=endpoint,
+                                completion_window=completion_window,
+                                output_file_id=self.client.store_file(output),
+                                message=None)
+        self.client.batches_by_id[batch.id] = batch
+        return batch
+
+    def retrieve(self, batch_id: str):
+        """Returns a created batch."""
+        return self.client.batches_by_id[batch_id]
+
+
+class FakeOpenAI:
+    """Stands in for the OpenAI client,
+    with `batch_latency` seconds of simulated processing per batch."""
+
+    def __init__(self, batch_latency: float = 0.0):
+        self.batch_latency = batch_latency
+        self.ids = itertools.count()
+        self.files_by_id = {}
+        self.batches_by_id = {}
+        self.files = FakeFiles(self)
+        self.batches = FakeBatches(self)
+
+    def store_file(self, lines: list[str]) -> str:
+        """Stores a file's lines and returns its id."""
+        file_id = f"file_{next(self.ids)}"
+        self.files_by_id[file_id] = lines
+        return file_id
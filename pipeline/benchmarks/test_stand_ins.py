@@ -0,0 +1,65 @@
+# pylint: skip-file
+
+"""Tests for the benchmark fixtures and GPT-API stand-in."""
+
+import io
+import json
+import re
+
+from fixtures import make_corpus, make_feed, make_transcript_xml
+from stand_ins import FakeOpenAI, answer_request
+
+
+def make_request(citation, system_prompt, user_prompt):
+    return {"custom_id": citation, "body": {"model": "gpt-4.1-nano", "messages": [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]}}
+
+
+def test_synthetic_corpus_citations_unique():
+    """Check every synthetic transcript has its own citation."""
+    corpus = make_corpus(5)
+    citations = {re.search(r"<uk:cite>(.*)</uk:cite>", xml).group(1) for xml in corpus}
+    assert len(citations) == 5
+
+
+def test_recorded_corpus_replayed_with_unique_citations():
+    """Check recorded XMLs are cycled through, with a new citation each time."""
+    recorded = [make_transcript_xml(0)]
+    corpus = make_corpus(3, recorded)
+    assert "<uk:cite>[2025] BENCH 0 #2</uk:cite>" in corpus[2]
+
+
+def test_feed_has_entry_per_transcript():
+    """Check the feed has one entry per transcript requested."""
+    assert make_feed(4).count("<entry>") == 4
+
+
+def test_answer_headings_request():
+    """Check every heading is kept, in GPT-API's quoted list format."""
+    request = make_request("[2025] BENCH 0", "a list of headers from a court transcript",
+                           str(["The facts", "Conclusion"]))
+    assert answer_request(request) == "'The facts','Conclusion'"
+
+
+def test_answer_summary_request():
+    """Check summaries are JSON with a valid ruling."""
+    request = make_request("[2025] BENCH 0", "Return your output strictly in this JSON format",
+                           str({"The facts": "..."}))
+    assert json.loads(answer_request(request))["ruling"] in ["Plaintiff", "Defendant"]
+
+
+def test_batch_round_trip():
+    """Check an uploaded batch completes with an output line per request."""
+    client = FakeOpenAI()
+    lines = [json.dumps(make_request(f"[2025] BENCH {i}", "summary", "{}")) for i in range(3)]
+    upload = client.files.create(file=io.BytesIO("\n".join(lines).encode()), purpose="batch")
+    batch = client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions",
+                                  completion_window="24h")
+
+    assert client.batches.retrieve(batch.id).status == "completed"
+    with client.files.with_streaming_response.content(batch.output_file_id) as response:
+        records = [json.loads(line) for line in response.iter_lines()]
+    assert [record["custom_id"] for record in records] == [f"[2025] BENCH {i}" for i in range(3)]
+    assert records[0]["response"]["body"]["usage"]["total_tokens"] > 0
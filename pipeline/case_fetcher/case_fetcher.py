@@ -44,6 +44,22 @@ def fetch_feed(per_page: int = 20) -> ET.Element:
     return ET.fromstring(r.content)
 
 
+def fetch_feed_for_dates(from_date: str, to_date: str,
+                         page: int = 1, per_page: int = 50) -> ET.Element:
+    """Fetch one page of the Atom feed for cases handed down between
+    `from_date` and `to_date` (inclusive, YYYY-MM-DD)."""
+    params = {
+        "from_date": from_date,
+        "to_date": to_date,
+        "order": "date",
+        "page": page,
+        "per_page": per_page
+    }
+    r = requests.get(BASE_FEED_URL, params=params, timeout=1000)
+    r.raise_for_status()
+    return ET.fromstring(r.content)
+
+
 def get_xml_entries(feed: ET.Element) -> List[Tuple[str, str, Optional[str]]]:
     """
     Extract entries from the Atom feed.
@@ -60,21 +76,44 @@ def get_xml_entries(feed: ET.Element) -> List[Tuple[str, str, Optional[str]]]:
     return entries
 
 
+def get_entries_for_dates(from_date: str, to_date: str,
+                          per_page: int = 50) -> List[Tuple[str, str, Optional[str]]]:
+    """Return every feed entry for cases handed down between `from_date` and `to_date`,
+    reading the feed page by page."""
+    entries = []
+    page = 1
+    while True:
+        feed = fetch_feed_for_dates(from_date, to_date, page=page, per_page=per_page)
+        page_entries = get_xml_entries(feed)
+        entries += page_entries
+        if len(page_entries) < per_page:
+            return entries
+        page += 1
+
+
+def fetch_xml(entry: Tuple[str, str, Optional[str]]) -> Optional[str]:
+    """Fetch the XML of a single entry, or None if it has none or it failed to load."""
+    title, uri, href = entry
+    if not href:
+        logging.warning(f"No XML for: {title} ({uri})")
+        return None
+    try:
+        resp = requests.get(href, timeout=1000)
+        resp.raise_for_status()
+        return resp.text
+    except (requests.exceptions.RequestException, TimeoutError) as e:
+        logging.error(f"Failed to load {title} ({href}): {e}")
+        return None
+
+
 def load_single_xml(entry: Tuple[str, str, Optional[str]], xml_dict: Dict[str, str]) -> None:
     """
     Fetch XML for a single entry and store in xml_dict.
     Key = slugified title, Value = raw XML string.
     """
-    title, uri, href = entry
-    if href:
-        try:
-            resp = requests.get(href, timeout=1000)
-            resp.raise_for_status()
-            xml_dict[slugify(title)] = resp.text
-        except (requests.exceptions.RequestException, TimeoutError) as e:
-            logging.error(f"Failed to load {title} ({href}): {e}")
-    else:
-        logging.warning(f"No XML for: {title} ({uri})")
+    xml = fetch_xml(entry)
+    if xml is not None:
+        xml_dict[slugify(entry[0])] = xml
 
 
 def load_all_xml(entries: List[Tuple[str, str, Optional[str]]]) -> Dict[str, str]:
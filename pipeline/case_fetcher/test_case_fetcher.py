@@ -94,6 +94,38 @@ class TestFetchFeed:
             case_fetcher.fetch_feed(per_page=10)
 
 
+class TestFetchFeedForDates:
+    """Tests for the `fetch_feed_for_dates` function."""
+
+    @responses.activate
+    def test_fetch_feed_for_dates_sends_date_range(self, sample_feed):
+        """Test the date range and page are passed as query parameters."""
+        responses.add(responses.GET, case_fetcher.BASE_FEED_URL,
+                      body=sample_feed, status=200)
+
+        feed = case_fetcher.fetch_feed_for_dates("2024-01-01", "2024-01-31", page=2)
+        assert feed.tag.endswith("feed")
+        params = responses.calls[0].request.params
+        assert params["from_date"] == "2024-01-01"
+        assert params["to_date"] == "2024-01-31"
+        assert params["page"] == "2"
+
+
+class TestGetEntriesForDates:
+    """Tests for the `get_entries_for_dates` function."""
+
+    def test_get_entries_for_dates_reads_every_page(self):
+        """Test pages are read until a page is not full."""
+        pages = [[("a", "1", "x")] * 2, [("b", "2", "y")]]
+        with patch("case_fetcher.fetch_feed_for_dates") as mock_fetch, \
+                patch("case_fetcher.get_xml_entries", side_effect=pages):
+            entries = case_fetcher.get_entries_for_dates(
+                "2024-01-01", "2024-01-01", per_page=2)
+        assert len(entries) == 3
+        assert mock_fetch.call_count == 2
+        assert mock_fetch.call_args.kwargs["page"] == 2
+
+
 class TestGetXmlEntries:
     """Tests for the `get_xml_entries` function."""
 
@@ -175,6 +207,29 @@ class TestLoadSingleXml:
         assert len(xml_dict) == 0
 
 
+class TestFetchXml:
+    """Tests for the `fetch_xml` function."""
+
+    @responses.activate
+    def test_fetch_xml_success(self, sample_xml):
+        """Ensure the XML of an entry is returned."""
+        responses.add(responses.GET, "https://example.com/case1.xml", body=sample_xml, status=200)
+
+        entry = ("Sample Case", "uri", "https://example.com/case1.xml")
+
+        assert case_fetcher.fetch_xml(entry) == sample_xml
+
+    @responses.activate
+    def test_fetch_xml_http_error(self, caplog):
+        """Ensure HTTP errors are logged and None is returned, so callers can retry."""
+        responses.add(responses.GET, "https://example.com/case1.xml", status=500)
+
+        entry = ("Sample Case", "uri", "https://example.com/case1.xml")
+
+        assert case_fetcher.fetch_xml(entry) is None
+        assert "Failed to load" in caplog.text
+
+
 class TestLoadAllXml:
     """Tests for the `load_all_xml` function."""
 
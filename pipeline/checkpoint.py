@@ -0,0 +1,117 @@
+"""Records how far each transcript has got through the ETL,
+so that an interrupted run can resume."""
+
+import logging
+from datetime import datetime
+
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor, Json
+
+# Stages, in the order a transcript passes through them
+PARSED = "parsed"
+HEADINGS = "headings"
+SUMMARISED = "summarised"
+LOADED = "loaded"
+STAGES = [PARSED, HEADINGS, SUMMARISED, LOADED]
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def serialise_metadata(metadata: dict) -> dict:
+    """Returns a JSON-safe copy of `metadata`, with the verdict date as an ISO string."""
+    serialised = dict(metadata)
+    if isinstance(serialised.get("verdict_date"), datetime):
+        serialised["verdict_date"] = serialised["verdict_date"].isoformat()
+    return serialised
+
+
+def deserialise_metadata(metadata: dict) -> dict:
+    """Reverses `serialise_metadata`."""
+    deserialised = dict(metadata)
+    if isinstance(deserialised.get("verdict_date"), str):
+        deserialised["verdict_date"] = datetime.fromisoformat(
+            deserialised["verdict_date"])
+    return deserialised
+
+
+def save_checkpoint(conn: connection, metadata: dict, stage: str, payload=None) -> None:
+    """
+    Records that the transcript described by `metadata` has completed `stage`,
+    along with the output of that stage (`payload`) needed to resume from it.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"stage must be one of {STAGES}")
+
+    with conn.cursor() as cur:
+        query = """
+        INSERT INTO transcript_checkpoint (hearing_citation, stage, metadata, payload)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (hearing_citation) DO UPDATE
+        SET stage = EXCLUDED.stage,
+            metadata = EXCLUDED.metadata,
+            payload = EXCLUDED.payload,
+            updated_at = NOW();
+        """
+        cur.execute(query, (metadata["citation"], stage,
+                            Json(serialise_metadata(metadata)), Json(payload)))
+        conn.commit()
+
+
+def mark_loaded(conn: connection, citation: str) -> None:
+    """Records that a transcript has been loaded, dropping its now unneeded payload."""
+    with conn.cursor() as cur:
+        query = """
+        UPDATE transcript_checkpoint
+        SET stage = %s, payload = NULL, updated_at = NOW()
+        WHERE hearing_citation = %s;
+        """
+        cur.execute(query, (LOADED, citation))
+        conn.commit()
+
+
+def get_pending_checkpoints(conn: connection) -> dict[str, dict]:
+    """
+    Returns every transcript which has not yet been loaded, as a dictionary mapping
+    its citation to its last completed `stage`, its `metadata` and that stage's `payload`.
+    """
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+        SELECT hearing_citation, stage, metadata, payload
+        FROM transcript_checkpoint
+        WHERE stage <> %s;
+        """
+        cur.execute(query, (LOADED,))
+        rows = cur.fetchall()
+
+    pending = {row["hearing_citation"]: {
+        "stage": row["stage"],
+        "metadata": deserialise_metadata(row["metadata"]),
+        "payload": row["payload"]
+    } for row in rows}
+    if pending:
+        logging.info("Resuming %s transcripts from a previous run", len(pending))
+    return pending
+
+
+def get_checkpointed_citations(conn: connection, citations: list[str]) -> set[str]:
+    """
+    Returns which of `citations` have a checkpoint, at any stage. This includes those the
+    loader skipped (e.g. for having no date), which are marked loaded but never reach `hearing`.
+    """
+    if not citations:
+        return set()
+    with conn.cursor() as cur:
+        query = """
+        SELECT hearing_citation
+        FROM transcript_checkpoint
+        WHERE hearing_citation = ANY(%s);
+        """
+        cur.execute(query, (list(citations),))
+        return {row[0] for row in cur.fetchall()}
+
+
+def get_citations_at(checkpoints: dict[str, dict], stage: str) -> list[str]:
+    """Returns the citations of every checkpoint whose last completed stage is `stage`."""
+    return [citation for citation, checkpoint in checkpoints.items()
+            if checkpoint["stage"] == stage]
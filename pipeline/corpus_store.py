@@ -0,0 +1,210 @@
+"""A compressed, content-addressed store of transcript XMLs, with random access by citation.
+
+Every XML is compressed separately with zstd and appended to a single packed file,
+`corpus.pack`, so any one transcript can be read back without decompressing the others.
+Transcripts are addressed by the SHA-256 of their XML, so storing the same XML twice
+only stores it once. `index.jsonl` records where each one starts in the pack, and the
+citation it belongs to. Reads go through a memory map of the pack.
+
+Several processes may write to the same store: each append holds an exclusive `flock` on
+the pack, and first reads any index records the others have written since, so the same
+XML is never stored twice and no two XMLs are given the same offset.
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import zstandard
+
+from xml_extraction import metadata_xml
+
+PACK_FILENAME = "corpus.pack"
+INDEX_FILENAME = "index.jsonl"
+COMPRESSION_LEVEL = 10
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def get_digest(xml: str) -> str:
+    """Returns the content address of an XML."""
+    return hashlib.sha256(xml.encode("utf-8")).hexdigest()
+
+
+class CorpusStore:
+    """A packed store of compressed XMLs in `directory`, which is created if it doesn't exist."""
+
+    def __init__(self, directory: str, level: int = COMPRESSION_LEVEL):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.decompressor = zstandard.ZstdDecompressor()
+        # digest -> {"offset", "length", "size"}, and citation -> digest
+        self.entries = {}
+        self.citations = {}
+        self.lock = threading.Lock()
+        # How much of the index has been read into the lookups
+        self.index_position = 0
+        self.pack = open(self.directory / PACK_FILENAME, "ab")
+        self.index = open(self.directory / INDEX_FILENAME, "ab")
+        self.map = None
+        self.load_index()
+
+    def load_index(self) -> None:
+        """Reads the index records written since it was last read, by this or another process.
+        A partly written last line is left for later, as another process may be writing it."""
+        with open(self.directory / INDEX_FILENAME, "rb") as file:
+            file.seek(self.index_position)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                self.index_position += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning("Skipping corrupt corpus index line")
+                    continue
+                self.add_to_index(record)
+
+    def add_to_index(self, record: dict) -> None:
+        """Adds an index record to the in-memory lookups."""
+        self.entries.setdefault(record["digest"], {"offset": record["offset"],
+                                                   "length": record["length"],
+                                                   "size": record["size"]})
+        if record.get("citation"):
+            self.citations[record["citation"]] = record["digest"]
+
+    def put(self, xml: str, citation: Optional[str] = None) -> str:
+        """Stores `xml` (once), recording it under `citation` if given, and returns its digest."""
+        digest = get_digest(xml)
+        with self.lock:
+            fcntl.flock(self.pack, fcntl.LOCK_EX)
+            try:
+                # Other processes may have stored this XML (or others) since the index was read
+                self.load_index()
+                if digest in self.entries:
+                    if citation is None or self.citations.get(citation) == digest:
+                        return digest
+                    entry = self.entries[digest]
+                else:
+                    raw = xml.encode("utf-8")
+                    compressed = self.compressor.compress(raw)
+                    self.pack.seek(0, os.SEEK_END)
+                    entry = {"offset": self.pack.tell(), "length": len(compressed),
+                             "size": len(raw)}
+                    self.pack.write(compressed)
+                    self.pack.flush()
+
+                # Nobody else can be writing, so an unfinished last line was left by a crash
+                if os.fstat(self.index.fileno()).st_size > self.index_position:
+                    self.index.write(b"\n")
+                record = {"digest": digest, "citation": citation, **entry}
+                self.index.write(json.dumps(record).encode("utf-8") + b"\n")
+                self.index.flush()
+                self.load_index()
+            finally:
+                fcntl.flock(self.pack, fcntl.LOCK_UN)
+        return digest
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Returns `length` bytes of the pack from `offset`, remapping it if it has grown."""
+        if self.map is None or offset + length > len(self.map):
+            if self.map is not None:
+                self.map.close()
+            with open(self.directory / PACK_FILENAME, "rb") as file:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map[offset:offset + length]
+
+    def get(self, digest: str) -> str:
+        """Returns the XML with the given digest."""
+        with self.lock:
+            entry = self.entries[digest]
+            compressed = self.read(entry["offset"], entry["length"])
+        return self.decompressor.decompress(
+            compressed, max_output_size=entry["size"]).decode("utf-8")
+
+    def get_by_citation(self, citation: str) -> str:
+        """Returns the XML of the transcript with `citation`."""
+        if citation not in self.citations:
+            # It may have been stored by another process
+            with self.lock:
+                self.load_index()
+        return self.get(self.citations[citation])
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_stats(self) -> dict:
+        """Returns the number of transcripts stored, and their total raw & compressed sizes."""
+        return {
+            "transcripts": len(self.entries),
+            "citations": len(self.citations),
+            "raw_bytes": sum(entry["size"] for entry in self.entries.values()),
+            "compressed_bytes": sum(entry["length"] for entry in self.entries.values())
+        }
+
+    def close(self) -> None:
+        """Closes the store's files."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.pack.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_corpus_store() -> Optional[CorpusStore]:
+    """Returns the store in the CORPUS_DIR env var, or None if fetched XMLs aren't to be kept."""
+    directory = os.environ.get("CORPUS_DIR")
+    return CorpusStore(directory) if directory else None
+
+
+def import_directory(store: CorpusStore, directory: str) -> int:
+    """Stores every loose .xml file in `directory` (e.g. from `case_fetcher.py --download`),
+    returning how many."""
+    paths = sorted(Path(directory).glob("*.xml"))
+    for path in paths:
+        xml = path.read_text(encoding="utf-8")
+        store.put(xml, metadata_xml.get_metadata(xml)["citation"])
+    return len(paths)
+
+
+def get_args() -> argparse.Namespace:
+    """Sets up CLI arguments."""
+    parser = argparse.ArgumentParser(description="Manage the compressed transcript corpus.")
+    parser.add_argument("-s", "--store", default=os.environ.get("CORPUS_DIR", "/tmp/corpus"),
+                        help="Directory of the store (defaults to CORPUS_DIR, or /tmp/corpus).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Store a directory of loose XML files.")
+    import_parser.add_argument("directory")
+    get_parser = subparsers.add_parser("get", help="Print the XML of a transcript.")
+    get_parser.add_argument("citation")
+    subparsers.add_parser("stats", help="Show the size of the store.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with CorpusStore(args.store) as corpus:
+        if args.command == "import":
+            logging.info("Imported %s XMLs", import_directory(corpus, args.directory))
+        elif args.command == "get":
+            print(corpus.get_by_citation(args.citation))
+        else:
+            print(json.dumps(corpus.get_stats(), indent=4))
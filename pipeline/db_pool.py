@@ -0,0 +1,16 @@
+"""The pipeline's pool of connections to the RDS, shared by every stage of the pipeline.
+
+This is the shared `rds_pool`, with connections which count statements & commits towards
+the open instrumentation spans.
+"""
+
+import rds_pool
+from rds_pool import (close_pool, get_connection, get_pool, is_healthy, pooled_connection,
+                      release_connection)
+
+from instrumentation import CountingConnection
+
+__all__ = ["close_pool", "get_connection", "get_pool", "is_healthy", "pooled_connection",
+           "release_connection"]
+
+rds_pool.configure(connection_factory=CountingConnection)
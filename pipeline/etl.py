@@ -10,17 +10,37 @@
 # Insert into RDS
 
 import os
+from os import environ as ENV
 import logging
 import csv
 import io
 import argparse
-
+import itertools
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue
+from typing import Optional
+
+from psycopg2 import OperationalError
 from psycopg2.extensions import connection
 
+from case_fetcher import case_fetcher
 from judge_scraping import judges_rds
 from xml_extraction import get_unique_xml, parse_xml, metadata_xml
 from gpt import summary
 import load
+import token_usage
+import checkpoint
+import sections
+import corpus_store
+import backfill
+import db_pool
+import stages
+import instrumentation
+import migrate
+import analytics
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,47 +55,72 @@ def reset_jsonl_file(filename: str) -> None:
 def insert_scraped_judges() -> None:
     """Scrapes judges from the judiciary website, and inserts them in the DB."""
     logging.info("Scraping judges into RDS")
-    judges_rds.scrape_and_upload_judges()
-
-
-def extract_and_parse_xml(xmls: list[str]) -> list[str]:
-    """Function to extract xml and parse it to a list of xml strings with all the metadata."""
-    logging.info("Extracting metadata from XMLs")
-    metadatas = []
-    for xml in xmls:
-        metadatas.append(metadata_xml.get_metadata(xml))
-
-    return metadatas
-
-
-def parse_transcripts(unique_xmls: list[str]) -> list[dict]:
-    """Parses the unique xmls into a list of dictionaries, each representing a hearing."""
-    logging.info("Parsing transcripts")
-    transcripts = []
-    for xml in unique_xmls:
-        headings_dict = parse_xml.get_label_text_dict(xml)
-        if headings_dict is None:
-            continue
-        citation = metadata_xml.get_metadata(xml)["citation"]
-        if citation is None:
-            # Exclude XML with missing citation
-            continue
-        transcripts.append({citation: headings_dict})
-    return transcripts
-
-
-def extract_meaningful_headers_and_content(transcripts: list[dict], filename: str) -> list[dict]:
+    with instrumentation.span("scrape_judges"):
+        judges_rds.scrape_and_upload_judges()
+
+
+def get_xml_bytes(xmls: list[str]) -> int:
+    """Returns the total size of downloaded XMLs in bytes."""
+    return sum(len(xml.encode("utf-8")) for xml in xmls)
+
+
+def parse_xml_document(xml: str) -> tuple[dict, Optional[dict]]:
+    """
+    Parses a single XML into its metadata, and a {citation: {heading: text}}
+    transcript (None if the XML has no citation or no headings).
+    Only plain dicts are returned, so this can run in a worker process.
+    """
+    metadata = metadata_xml.get_metadata(xml)
+    citation = metadata["citation"]
+    if citation is None:
+        # Exclude XML with missing citation
+        return metadata, None
+    headings_dict = parse_xml.get_label_text_dict(xml)
+    if headings_dict is None:
+        return metadata, None
+    return metadata, {citation: headings_dict}
+
+
+def parse_all_xml(xmls: list[str], workers: int = 1) -> tuple[list[dict], list[dict]]:
+    """
+    Parses every XML into its metadata and transcript, preserving order.
+    With `workers` > 1, parsing is fanned out in chunks across a process pool.
+    """
+    logging.info("Parsing %s transcripts with %s worker(s)", len(xmls), workers)
+    with instrumentation.span("parse"):
+        if workers > 1 and len(xmls) > 1:
+            chunksize = max(1, len(xmls) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(parse_xml_document, xmls, chunksize=chunksize))
+        else:
+            results = [parse_xml_document(xml) for xml in xmls]
+        instrumentation.add_items(len(xmls))
+
+    metadatas = [metadata for metadata, _ in results]
+    transcripts = [transcript for _, transcript in results if transcript]
+    return metadatas, transcripts
+
+
+def extract_meaningful_headers_and_content(transcripts: list[dict],
+                                           filename: str,
+                                           token_log: list = None,
+                                           token_ceiling: int = None) -> list[dict]:
     """Grabs only the meaningful headers and their content from each hearing
        inside the transcripts."""
     logging.info("Extracting meaningful headers.")
-    meaningful_headers = summary.extract_meaningful_headers(
-        transcripts, f'/tmp/{filename}.jsonl')
-
-    for i, items in enumerate(meaningful_headers.items()):
-        citation, headers = items
+    with instrumentation.span("headings"):
+        meaningful_headers = summary.extract_meaningful_headers(
+            transcripts, f'/tmp/{filename}.jsonl', token_log, token_ceiling)
+        instrumentation.add_items(len(transcripts))
+
+    # Batch output isn't guaranteed to be in input order, so match on citation
+    positions = {citation: i for i, transcript in enumerate(transcripts)
+                 for citation in transcript}
+    for citation, headers in meaningful_headers.items():
         reader = csv.reader(io.StringIO(headers), quotechar="'", delimiter=',')
         headers_list = next(reader)
 
+        i = positions[citation]
         orig_headings = transcripts[i][citation]
         filtered_headings = {k: v for k, v
                              in orig_headings.items() if k in headers_list}
@@ -84,68 +129,510 @@ def extract_meaningful_headers_and_content(transcripts: list[dict], filename: st
     return transcripts
 
 
-def gpt_summarise_transcripts(conn: connection,
-                              transcripts: list[dict],
-                              metadatas: list[str],
-                              filename: str) -> None:
-    """Feeds GPT-API headers and content, and it summarises it. Data is then pushed to the DB."""
+def gpt_summarise_transcripts(transcripts: list[dict],
+                              filename: str,
+                              token_log: list = None,
+                              token_ceiling: int = None) -> dict:
+    """Feeds GPT-API headers and content, and returns its summary for each citation."""
     logging.info("Getting summaries from GPT-API")
-    summaries = summary.summarise(transcripts, f"/tmp/{filename}.jsonl")
-
-    for metadata in metadatas:
-        logging.info(metadata)
-        logging.info(metadata.get('judges'))
-        hearing = summaries.get(metadata["citation"])
-        logging.info(hearing)
-        if hearing:
-            load.insert_into_hearing(conn, hearing, metadata)
-
-
-def run_etl(number_of_transcripts: int = 20) -> None:
-    """Runs the entire ETL process."""
+    with instrumentation.span("summarise"):
+        instrumentation.add_items(len(transcripts))
+        return summary.summarise(
+            transcripts, f"/tmp/{filename}.jsonl", token_log, token_ceiling)
+
+
+def checkpoint_parsed_transcripts(conn: connection,
+                                  checkpoints: dict[str, dict],
+                                  metadatas: list[dict],
+                                  transcripts: list[dict]) -> None:
+    """
+    Checkpoints newly parsed transcripts, skipping any already checkpointed by a previous run:
+    those in progress, and those the loader skipped, which are never in `hearing` so are fetched
+    again, but mustn't be sent to GPT-API again.
+    Every parsed section is also stored, so transcripts can be re-summarised without re-fetching.
+    """
+    metadata_by_citation = {metadata["citation"]: metadata for metadata in metadatas}
+    checkpointed = checkpoint.get_checkpointed_citations(
+        conn, [citation for transcript in transcripts for citation in transcript])
+    for transcript in transcripts:
+        for citation, headings in transcript.items():
+            if citation in checkpoints or citation in checkpointed:
+                continue
+            metadata = metadata_by_citation[citation]
+            sections.save_sections(conn, citation, headings)
+            checkpoint.save_checkpoint(conn, metadata, checkpoint.PARSED, headings)
+            checkpoints[citation] = {"stage": checkpoint.PARSED,
+                                     "metadata": metadata,
+                                     "payload": headings}
+
+
+def advance_checkpoints(conn: connection,
+                        checkpoints: dict[str, dict],
+                        stage: str,
+                        results: dict) -> None:
+    """Checkpoints each citation in `results` as having completed `stage`,
+    with its result as payload."""
+    for citation, result in results.items():
+        if citation not in checkpoints:
+            continue
+        checkpoint.save_checkpoint(
+            conn, checkpoints[citation]["metadata"], stage, result)
+        checkpoints[citation]["stage"] = stage
+        checkpoints[citation]["payload"] = result
+
+
+def load_summarised_hearings(conn: connection, checkpoints: dict[str, dict]) -> None:
+    """Loads every summarised transcript into the DB, checkpointing each as it's loaded."""
+    with instrumentation.span("load"):
+        for citation in checkpoint.get_citations_at(checkpoints, checkpoint.SUMMARISED):
+            metadata = checkpoints[citation]["metadata"]
+            hearing = checkpoints[citation]["payload"]
+            logging.info(metadata)
+            logging.info(hearing)
+            # Hearings skipped by the loader for good are also marked, so they are not
+            # re-summarised when they're fetched again (see checkpoint_parsed_transcripts).
+            # Those without a date stay summarised, so later runs try loading them again
+            if not load.insert_into_hearing(conn, hearing, metadata):
+                continue
+            checkpoint.mark_loaded(conn, citation)
+            checkpoints[citation]["stage"] = checkpoint.LOADED
+            instrumentation.add_items()
+
+
+def store_xmls(corpus: Optional[corpus_store.CorpusStore],
+               xmls: list[str],
+               metadatas: list[dict]) -> None:
+    """Keeps each fetched XML in the corpus store under its citation, if there is a store."""
+    if corpus is None:
+        return
+    with instrumentation.span("store"):
+        for xml, metadata in zip(xmls, metadatas):
+            corpus.put(xml, metadata["citation"])
+        instrumentation.add_items(len(xmls))
+
+
+def release_connections(conns: list[connection]) -> None:
+    """Returns every connection in `conns` to the pool."""
+    for conn in conns:
+        db_pool.release_connection(conn)
+
+
+@contextmanager
+def publishing_changes(conn: connection):
+    """Publishes the hearings loaded within the block to the dashboard, even if it raises,
+    as they're only counted in memory and a later run in a new process wouldn't publish them."""
+    try:
+        yield
+    except BaseException:
+        try:
+            with instrumentation.span("refresh"):
+                analytics.publish_changes(conn)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logging.error("Couldn't publish the hearings loaded before the run failed: %s", error)
+        raise
+    with instrumentation.span("refresh"):
+        analytics.publish_changes(conn)
+
+
+def open_corpus_store(stack: ExitStack) -> Optional[corpus_store.CorpusStore]:
+    """Returns the corpus store, if fetched XMLs are to be kept, closing it with `stack`."""
+    corpus = corpus_store.get_corpus_store()
+    return stack.enter_context(corpus) if corpus is not None else None
+
+
+def get_token_budget() -> int:
+    """Returns the token ceiling for a run from the TOKEN_BUDGET env var, if set."""
+    env_budget = ENV.get("TOKEN_BUDGET")
+    return int(env_budget) if env_budget else None
+
+
+def process_xmls(conn: connection,
+                 xmls: list[str],
+                 checkpoints: dict[str, dict],
+                 run_id: int,
+                 token_budget: int = None,
+                 workers: int = 1,
+                 corpus: Optional[corpus_store.CorpusStore] = None) -> None:
+    """
+    Parses, summarises and loads `xmls`, along with any unfinished transcripts in
+    `checkpoints`. Each transcript's progress is checkpointed as it completes a stage.
+    If a `corpus` store is given, the XMLs are kept in it for re-processing.
+    """
     MEANINGFUL_HEADERS_INPUT = 'headers_input'
     SUMMARY_INPUT = 'summary_input'
-    logging.info("Processing %s most recent transcripts",
-                 number_of_transcripts)
-
-    # Getting DB connection
-    logging.info("Starting Courts ETL Pipeline")
-    conn = get_unique_xml.get_db_connection()
 
     # Resetting jsonl files
     reset_jsonl_file(MEANINGFUL_HEADERS_INPUT)
     reset_jsonl_file(SUMMARY_INPUT)
 
-    # Scraping + updating judges
-    insert_scraped_judges()
-
-    # Extracting and dealing with XMLs
-    logging.info("Getting unique XMLs")
-    unique_xmls = get_unique_xml.get_unique_xmls(
-        conn, number=number_of_transcripts)
-    logging.info("%s unique transcripts found", len(unique_xmls))
-    metadatas = extract_and_parse_xml(unique_xmls)
-    # Filter XMLs without citation from metadata list
-    metadatas = [data for data in metadatas if data["citation"] is not None]
-    transcripts = parse_transcripts(unique_xmls)
-    transcripts = extract_meaningful_headers_and_content(
-        transcripts, MEANINGFUL_HEADERS_INPUT)
+    metadatas, transcripts = parse_all_xml(xmls, workers)
+    store_xmls(corpus, xmls, metadatas)
+    with instrumentation.span("checkpoint"):
+        checkpoint_parsed_transcripts(conn, checkpoints, metadatas, transcripts)
+
+    # Extracting meaningful headers with GPT-API
+    to_filter = [{citation: checkpoints[citation]["payload"]}
+                 for citation in checkpoint.get_citations_at(checkpoints, checkpoint.PARSED)]
+    if to_filter:
+        headers_tokens = []
+        filtered = extract_meaningful_headers_and_content(
+            to_filter, MEANINGFUL_HEADERS_INPUT, headers_tokens,
+            token_usage.get_remaining_budget(conn, run_id, token_budget))
+        token_usage.insert_token_usage(
+            conn, run_id, token_usage.HEADINGS_STAGE, headers_tokens)
+        advance_checkpoints(conn, checkpoints, checkpoint.HEADINGS,
+                            {citation: headings for transcript in filtered
+                             for citation, headings in transcript.items()})
 
     # Summarising with GPT-API
-    gpt_summarise_transcripts(conn, transcripts, metadatas, SUMMARY_INPUT)
+    to_summarise = [{citation: checkpoints[citation]["payload"]}
+                    for citation in checkpoint.get_citations_at(checkpoints, checkpoint.HEADINGS)]
+    if to_summarise:
+        summary_tokens = []
+        summaries = gpt_summarise_transcripts(
+            to_summarise, SUMMARY_INPUT, summary_tokens,
+            token_usage.get_remaining_budget(conn, run_id, token_budget))
+        token_usage.insert_token_usage(
+            conn, run_id, token_usage.SUMMARY_STAGE, summary_tokens)
+        advance_checkpoints(conn, checkpoints, checkpoint.SUMMARISED, summaries)
+
+    # Loading into the DB
+    load_summarised_hearings(conn, checkpoints)
+
+
+def run_etl(number_of_transcripts: int = 20, token_budget: int = None, workers: int = 1) -> None:
+    """Runs the entire ETL process.
+       If `token_budget` is given, the run stops before any GPT batch which would exceed it.
+       XML parsing is spread across `workers` processes.
+       Each transcript's progress is checkpointed, so a rerun resumes where this one stopped."""
+    logging.info("Processing %s most recent transcripts",
+                 number_of_transcripts)
 
-    conn.close()
+    # Getting DB connection
+    logging.info("Starting Courts ETL Pipeline")
+    instrumentation.reset()
+    # The connection & corpus are released even if the run fails
+    with ExitStack() as stack:
+        stack.callback(instrumentation.log_run_summary)
+        conn = stack.enter_context(db_pool.pooled_connection())
+        stack.enter_context(publishing_changes(conn))
+        corpus = open_corpus_store(stack)
+        with instrumentation.span("setup"):
+            run_id = token_usage.create_run(conn, token_budget)
+            load.create_future_partitions(conn)
+            # Transcripts left unfinished by a previous run resume from their last completed stage
+            checkpoints = checkpoint.get_pending_checkpoints(conn)
+
+        # Scraping + updating judges
+        insert_scraped_judges()
+
+        # Extracting and dealing with XMLs
+        logging.info("Getting unique XMLs")
+        with instrumentation.span("fetch"):
+            unique_xmls = get_unique_xml.get_unique_xmls(
+                conn, number=number_of_transcripts)
+            instrumentation.add_items(len(unique_xmls))
+            instrumentation.add_bytes(get_xml_bytes(unique_xmls))
+        logging.info("%s unique transcripts found", len(unique_xmls))
+        process_xmls(conn, unique_xmls, checkpoints, run_id, token_budget, workers, corpus)
+
+
+def get_feed_entries(number_of_transcripts: int):
+    """Yields the entries of the `number_of_transcripts` most recent transcripts in the feed."""
+    yield from case_fetcher.get_xml_entries(case_fetcher.fetch_feed(number_of_transcripts))
+
+
+# Stages run on their own threads, so each item is timed separately and only logged in the summary
+@instrumentation.timed("fetch", log=False)
+def fetch_entry(entry: tuple) -> list[str]:
+    """Fetches the XML of a feed entry, as a list which is empty if it couldn't be fetched."""
+    xml = case_fetcher.fetch_xml(entry)
+    xmls = [xml] if xml is not None else []
+    instrumentation.add_items(len(xmls))
+    instrumentation.add_bytes(get_xml_bytes(xmls))
+    return xmls
+
+
+class PipelinedRun:  # pylint: disable=too-many-instance-attributes
+    """The DB connections, corpus store & token budget shared by the stages of a pipelined run.
+
+    Entering it checks out the connections and records the run. Leaving it, however the run
+    ended, publishes the hearings loaded and releases the connections & corpus store.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget
+        self.stack = ExitStack()
+        self.summary_conn = self.load_conn = self.corpus = self.run_id = None
+        self.checkpoints = {}
+        # Parse workers each commit their own sections & checkpoints, so each has a connection
+        self.parse_conns, self.parse_local = [], threading.local()
+        self.batch_numbers = itertools.count()
+
+    def __enter__(self):
+        # If any of the setup fails, whatever was set up before it is released
+        with ExitStack() as stack:
+            self.summary_conn = stack.enter_context(db_pool.pooled_connection())
+            self.load_conn = stack.enter_context(db_pool.pooled_connection())
+            stack.enter_context(publishing_changes(self.load_conn))
+            stack.callback(release_connections, self.parse_conns)
+            self.corpus = open_corpus_store(stack)
+            self.run_id = token_usage.create_run(self.summary_conn, self.token_budget)
+            load.create_future_partitions(self.load_conn)
+            self.checkpoints = checkpoint.get_pending_checkpoints(self.load_conn)
+            self.stack = stack.pop_all()
+        return self
+
+    def __exit__(self, *exc):
+        return self.stack.__exit__(*exc)
+
+    def resume(self) -> None:
+        """Finishes the transcripts left unfinished by a previous run, from their last stage."""
+        if self.checkpoints:
+            process_xmls(self.load_conn, [], self.checkpoints, self.run_id, self.token_budget)
+
+    def get_parse_conn(self) -> connection:
+        """Returns the calling parse worker's connection, checking it out on first use."""
+        if not hasattr(self.parse_local, "conn"):
+            self.parse_local.conn = get_unique_xml.get_db_connection()
+            self.parse_conns.append(self.parse_local.conn)
+        return self.parse_local.conn
+
+    @instrumentation.timed("parse", log=False)
+    def parse(self, xml: str) -> list[tuple[dict, dict]]:
+        """Parses a transcript, storing & checkpointing its sections,
+        unless it's been seen before."""
+        instrumentation.add_items()
+        parse_conn = self.get_parse_conn()
+        metadata, transcript = parse_xml_document(xml)
+        citation = metadata["citation"]
+        if transcript is None or not get_unique_xml.is_citation_unique(citation, parse_conn):
+            return []
+        # Those already checkpointed were resumed, or skipped by the loader
+        if checkpoint.get_checkpointed_citations(parse_conn, [citation]):
+            return []
+        if self.corpus is not None:
+            self.corpus.put(xml, citation)
+        sections.save_sections(parse_conn, citation, transcript[citation])
+        checkpoint.save_checkpoint(parse_conn, metadata, checkpoint.PARSED, transcript[citation])
+        return [(metadata, transcript)]
+
+    def summarise(self, batch: list[tuple[dict, dict]]) -> list[tuple[dict, dict]]:
+        """Summarises a batch of parsed transcripts in two GPT-API batches (headings, then
+        summaries), returning each summarised hearing with its metadata."""
+        batch_number = next(self.batch_numbers)
+        headers_input = f"headers_input_{batch_number}"
+        summary_input = f"summary_input_{batch_number}"
+        reset_jsonl_file(headers_input)
+        reset_jsonl_file(summary_input)
+        logging.info("Summarising batch %s of %s transcripts", batch_number, len(batch))
+        batch_checkpoints = {metadata["citation"]: {"stage": checkpoint.PARSED,
+                                                    "metadata": metadata,
+                                                    "payload": transcript[metadata["citation"]]}
+                             for metadata, transcript in batch}
+
+        headers_tokens = []
+        transcripts = extract_meaningful_headers_and_content(
+            [transcript for _, transcript in batch], headers_input, headers_tokens,
+            token_usage.get_remaining_budget(self.summary_conn, self.run_id, self.token_budget))
+        token_usage.insert_token_usage(
+            self.summary_conn, self.run_id, token_usage.HEADINGS_STAGE, headers_tokens)
+        advance_checkpoints(self.summary_conn, batch_checkpoints, checkpoint.HEADINGS,
+                            {citation: headings for transcript in transcripts
+                             for citation, headings in transcript.items()})
+
+        summary_tokens = []
+        summaries = gpt_summarise_transcripts(
+            transcripts, summary_input, summary_tokens,
+            token_usage.get_remaining_budget(self.summary_conn, self.run_id, self.token_budget))
+        token_usage.insert_token_usage(
+            self.summary_conn, self.run_id, token_usage.SUMMARY_STAGE, summary_tokens)
+        advance_checkpoints(self.summary_conn, batch_checkpoints, checkpoint.SUMMARISED,
+                            summaries)
+
+        return [(summaries[metadata["citation"]], metadata)
+                for metadata, _ in batch if summaries.get(metadata["citation"])]
+
+    @instrumentation.timed("load", log=False)
+    def load_hearing(self, item: tuple[dict, dict]) -> list:
+        """Loads a summarised hearing, checkpointing it once it's loaded."""
+        hearing, metadata = item
+        if load.insert_into_hearing(self.load_conn, hearing, metadata):
+            checkpoint.mark_loaded(self.load_conn, metadata["citation"])
+            instrumentation.add_items()
+        return []
+
+
+def run_pipelined_etl(number_of_transcripts: int = 20,
+                      token_budget: int = None,
+                      fetch_workers: int = 4,
+                      parse_workers: int = 2,
+                      batch_size: int = 20,
+                      queue_size: int = 50) -> None:
+    """
+    Runs the ETL process as a pipeline, where each transcript flows through
+    fetch -> parse -> summarise -> load independently via bounded queues.
+
+    Transcripts are summarised in GPT-API batches of up to `batch_size`, so
+    loading of early transcripts overlaps with downloading of later ones,
+    and at most `queue_size` transcripts wait between any two stages.
+
+    A transcript which fails is skipped, but if the token budget runs out or the DB
+    connection is lost, the whole pipeline stops and that error is raised.
+    Each transcript's progress is checkpointed as it completes a stage, and transcripts
+    left unfinished by a previous run are finished before the pipeline starts.
+    """
+    logging.info("Processing %s most recent transcripts (pipelined)",
+                 number_of_transcripts)
+
+    logging.info("Starting Courts ETL Pipeline")
+    instrumentation.reset()
+    failure = stages.Failure((summary.TokenBudgetExceededError, OperationalError))
+    # Connections & the corpus are released, and the stages stopped, even if the run fails
+    with ExitStack() as stack:
+        stack.callback(instrumentation.log_run_summary)
+        run = stack.enter_context(PipelinedRun(token_budget))
+
+        # Scraping + updating judges
+        insert_scraped_judges()
+        run.resume()
+
+        # entry -> fetch -> XML -> parse -> transcript -> summarise -> hearing -> load -> done
+        queues = [Queue(maxsize=queue_size) for _ in range(5)]
+        pipeline = [
+            stages.start_stage(fetch_entry, queues[0], queues[1],
+                               workers=fetch_workers, name="fetch", failure=failure),
+            stages.start_stage(run.parse, queues[1], queues[2],
+                               workers=parse_workers, name="parse", failure=failure),
+            stages.start_batch_stage(run.summarise, queues[2], queues[3],
+                                     batch_size=batch_size, name="summarise", failure=failure),
+            stages.start_stage(run.load_hearing, queues[3], queues[4],
+                               workers=1, name="load", failure=failure)
+        ]
+
+        try:
+            stages.feed_queue(get_feed_entries(number_of_transcripts), queues[0], failure)
+        finally:
+            for stage in pipeline:
+                stage.join()
+        failure.raise_error()
+
+
+def fetch_claimed_xmls(claimed: list[dict]) -> dict[str, str]:
+    """Fetches the XML of each claimed backfill entry, keyed by its URI.
+    Entries whose XML couldn't be fetched are left out."""
+    xmls = {}
+    for entry in claimed:
+        xml = case_fetcher.fetch_xml(
+            (entry["entry_title"], entry["entry_uri"], entry["xml_url"]))
+        if xml is not None:
+            xmls[entry["entry_uri"]] = xml
+    if len(xmls) < len(claimed):
+        logging.warning("%s claimed entries couldn't be fetched; they'll be retried "
+                        "after %s minutes", len(claimed) - len(xmls),
+                        backfill.CLAIM_TIMEOUT_MINUTES)
+    return xmls
+
+
+def run_backfill(from_date: date,
+                 to_date: date,
+                 shards: int = 1,
+                 shard_index: int = 0,
+                 token_budget: int = None,
+                 workers: int = 1,
+                 batch_size: int = 20) -> None:
+    """
+    Ingests every transcript handed down between `from_date` and `to_date` which
+    belongs to shard `shard_index` of `shards`. Entries are claimed from the DB in
+    batches of `batch_size`, so several workers can run the same shard safely.
+    """
+    logging.info("Backfilling %s to %s (shard %s/%s)",
+                 from_date, to_date, shard_index, shards)
+    instrumentation.reset()
+    with ExitStack() as stack:
+        stack.callback(instrumentation.log_run_summary)
+        conn = stack.enter_context(db_pool.pooled_connection())
+        stack.enter_context(publishing_changes(conn))
+        corpus = open_corpus_store(stack)
+        run_id = token_usage.create_run(conn, token_budget)
+        checkpoints = checkpoint.get_pending_checkpoints(conn)
+
+        # Judges only need scraping once across all shards
+        if shard_index == 0:
+            insert_scraped_judges()
+
+        shard_dates = backfill.get_shard_dates(from_date, to_date, shards, shard_index)
+        logging.info("Registering entries for %s days", len(shard_dates))
+        with instrumentation.span("register"):
+            for day in shard_dates:
+                entries = case_fetcher.get_entries_for_dates(day.isoformat(), day.isoformat())
+                logging.info("%s: %s entries found", day, len(entries))
+                backfill.register_entries(conn, entries, shard_index)
+                instrumentation.add_items(len(entries))
+
+        while claimed := backfill.claim_entries(conn, shard_index, batch_size):
+            logging.info("Claimed %s entries", len(claimed))
+            with instrumentation.span("fetch"):
+                # Keyed by entry, as titles aren't unique
+                xmls = fetch_claimed_xmls(claimed)
+                unique_xmls = [xml for xml in xmls.values()
+                               if get_unique_xml.is_xml_unique(xml, conn)]
+                instrumentation.add_items(len(xmls))
+                instrumentation.add_bytes(get_xml_bytes(list(xmls.values())))
+            process_xmls(conn, unique_xmls, checkpoints, run_id, token_budget, workers, corpus)
+            # Every fetched transcript is now loaded or checkpointed (and resumed by later runs).
+            # Entries which failed to fetch stay claimed,
+            # so they're retried once the claim is stale.
+            backfill.mark_entries_done(conn, list(xmls))
+
+        logging.info("Shard %s/%s complete", shard_index, shards)
 
 
 def handler(event=None, context=None) -> None:
-    """Handler for AWS Lambda (on 20 files by default)."""
-    run_etl(number_of_transcripts=20)
+    """Handler for AWS Lambda (on 20 files by default).
+    An event with a `backfill` key ({"from", "to", "shards", "shard_index"})
+    runs a backfill shard instead, and one with a truthy `migrate` key
+    applies pending schema migrations instead."""
+    if event and event.get("migrate"):
+        migrate.migrate()
+        return
+    if event and event.get("backfill"):
+        options = event["backfill"]
+        run_backfill(from_date=date.fromisoformat(options["from"]),
+                     to_date=date.fromisoformat(options["to"]),
+                     shards=options.get("shards", 1),
+                     shard_index=options.get("shard_index", 0),
+                     token_budget=get_token_budget())
+        return
+    run_etl(number_of_transcripts=20, token_budget=get_token_budget())
 
 
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument("-n", "--number", type=int,
                         help="Number of transcripts to process.")
+    parser.add_argument("-b", "--token-budget", type=int,
+                        help="Maximum GPT-API tokens the run may use (defaults to TOKEN_BUDGET).")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of processes to parse XMLs with (default 1).")
+    parser.add_argument("-p", "--pipelined", action="store_true",
+                        help="Overlap fetching, parsing, summarising and loading of transcripts.")
+    parser.add_argument("--batch-size", type=int, default=20,
+                        help="Transcripts per GPT-API batch when pipelined or backfilling "
+                             "(default 20).")
+
+    subparsers = parser.add_subparsers(dest="command")
+    backfill_parser = subparsers.add_parser(
+        "backfill", help="Ingest historical transcripts over a date range.")
+    backfill_parser.add_argument("--from", dest="from_date", type=date.fromisoformat, required=True,
+                                 help="First day to ingest (YYYY-MM-DD).")
+    backfill_parser.add_argument("--to", dest="to_date", type=date.fromisoformat, required=True,
+                                 help="Last day to ingest (YYYY-MM-DD).")
+    backfill_parser.add_argument("--shards", type=int, default=1,
+                                 help="Total number of workers the date range is split across "
+                                      "(default 1).")
+    backfill_parser.add_argument("--shard-index", type=int, default=0,
+                                 help="Which shard this worker ingests, from 0 (default 0).")
     return parser.parse_args()
 
 
@@ -154,4 +641,17 @@ if __name__ == "__main__":
     num_files = args.number if args.number else 20
     if num_files <= 0:
         raise ValueError("number must be a value greater than 0")
-    run_etl(number_of_transcripts=num_files)
+    if args.workers <= 0:
+        raise ValueError("workers must be a value greater than 0")
+    budget = args.token_budget if args.token_budget else get_token_budget()
+    if args.command == "backfill":
+        run_backfill(from_date=args.from_date, to_date=args.to_date,
+                     shards=args.shards, shard_index=args.shard_index,
+                     token_budget=budget, workers=args.workers,
+                     batch_size=args.batch_size)
+    elif args.pipelined:
+        run_pipelined_etl(number_of_transcripts=num_files, token_budget=budget,
+                          batch_size=args.batch_size)
+    else:
+        run_etl(number_of_transcripts=num_files, token_budget=budget,
+                workers=args.workers)
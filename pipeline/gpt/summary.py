@@ -2,6 +2,7 @@
 from openai import OpenAI
 from dotenv import load_dotenv
 import json
+import os
 import time
 import logging
 
@@ -11,6 +12,16 @@ logging.basicConfig(level=logging.INFO,
 load_dotenv()
 openai = OpenAI()
 
+MODEL = "gpt-4.1-nano"
+# Rough number of characters per token, used to estimate the size of a batch before submitting it
+CHARS_PER_TOKEN = 4
+# Completion tokens allowed for per request when estimating the size of a batch
+OUTPUT_TOKEN_ALLOWANCE = 400
+
+
+class TokenBudgetExceededError(RuntimeError):
+    """Raised when a batch would take a run over its configured token ceiling."""
+
 
 def get_extract_headings_prompt() -> str:
     """Return the extract headings system prompt."""
@@ -56,7 +67,7 @@ def create_query_messages(system_prompt: str, user_prompt: str) -> list[dict]:
 def get_query_results(query_messages: list[dict]) -> str:
     """Get the results from the query request made to GPT-API"""
     response = openai.chat.completions.create(
-        model="gpt-4.1-nano",
+        model=MODEL,
         messages=query_messages
     )
     return response.choices[0].message.content
@@ -66,7 +77,8 @@ def get_query_results(query_messages: list[dict]) -> str:
 
 def create_batch_request(query_messages: list[dict], citation: str) -> dict:
     """Create a GPT-API request for batch processing."""
-    return {"custom_id": citation, "method": "POST", "url": "/v1/chat/completions", "body": {"model": "gpt-4.1-nano", "messages": query_messages}}
+    return {"custom_id": citation, "method": "POST", "url": "/v1/chat/completions",
+            "body": {"model": MODEL, "messages": query_messages}}
 
 
 def insert_request(request: str, filename: str) -> None:
@@ -76,6 +88,30 @@ def insert_request(request: str, filename: str) -> None:
         file.write(json_request + "\n")
 
 
+def estimate_batch_tokens(filename: str) -> int:
+    """Roughly estimate the number of tokens a .jsonl batch file will use, including completions."""
+    with open(filename, encoding="utf-8") as file:
+        requests = [json.loads(line) for line in file if line.strip()]
+    prompt_chars = sum(len(message["content"])
+                       for request in requests
+                       for message in request["body"]["messages"])
+    return prompt_chars // CHARS_PER_TOKEN + OUTPUT_TOKEN_ALLOWANCE * len(requests)
+
+
+def check_token_ceiling(filename: str, token_ceiling: int = None) -> None:
+    """Raise a TokenBudgetExceededError if the batch in `filename`
+    would use more than `token_ceiling` tokens."""
+    if token_ceiling is None:
+        return
+    estimated_tokens = estimate_batch_tokens(filename)
+    logging.info("Estimated batch tokens: %s (ceiling %s)",
+                 estimated_tokens, token_ceiling)
+    if estimated_tokens > token_ceiling:
+        raise TokenBudgetExceededError(
+            f"Batch {os.path.basename(filename)} needs ~{estimated_tokens} tokens "
+            f"but only {token_ceiling} remain in the budget")
+
+
 def upload_batch_file(filename: str):
     """Upload files for Batch API."""
     batch_input_file = openai.files.create(
@@ -118,92 +154,88 @@ def wait_for_batch(batch_id: str, poll_interval: int = 20, timeout: int = 300):
     raise TimeoutError(f"Batch {batch_id} did not complete within {timeout}s")
 
 
-def get_batch_token_usage(batch_id: str):
-    """Retrieve and print token usage per request and total usage for a completed batch."""
+def parse_batch_record(line: str) -> dict:
+    """Parse a single line of a batch output file into its custom_id, content and token usage."""
+    record = json.loads(line)
+    body = record.get("response", {}).get("body", {})
+    choices = body.get("choices") or [{}]
+    return {
+        "custom_id": record.get("custom_id"),
+        "content": choices[0].get("message", {}).get("content"),
+        "model": body.get("model"),
+        "usage": body.get("usage", {})
+    }
 
-    # Get batch object
-    batch = openai.batches.retrieve(batch_id)
-    output_file_id = batch.output_file_id
 
-    if not output_file_id:
-        logging.info(
-            "No output file yet for batch %s. Current status: %s",
-            batch_id, batch.status)
-        return None
+def iter_batch_results(output_file_id: str):
+    """Stream a batch output file line by line, yielding each parsed record."""
+    with openai.files.with_streaming_response.content(output_file_id) as response:
+        for line in response.iter_lines():
+            if line.strip():
+                yield parse_batch_record(line)
 
-    # Download output file
-    output_file = openai.files.content(output_file_id)
-    total_batch_tokens = 0
-    token_summary = []
 
-    for line in output_file.text.strip().split("\n"):
-        record = json.loads(line)
-        custom_id = record.get("custom_id")
-        usage = record.get("response", {}).get("body", {}).get("usage", {})
+def read_batch_results(batch) -> tuple[dict, list[dict], int]:
+    """Download the output file of a completed batch once, returning the content
+    of each request keyed by custom_id alongside the token usage per request and in total."""
+    if not batch.output_file_id:
+        raise ValueError(
+            "Batch not finished processing yet or no output file detected.")
 
-        input_tokens = usage.get("prompt_tokens", 0)
+    contents = {}
+    token_summary = []
+    total_batch_tokens = 0
+
+    for record in iter_batch_results(batch.output_file_id):
+        usage = record["usage"]
         total_request_tokens = usage.get("total_tokens", 0)
         total_batch_tokens += total_request_tokens
 
+        contents[record["custom_id"]] = record["content"]
         token_summary.append({
-            "custom_id": custom_id,
-            "input_tokens": input_tokens,
+            "custom_id": record["custom_id"],
+            "model": record["model"] or MODEL,
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
             "total_request_tokens": total_request_tokens
-
         })
 
-    return token_summary, total_batch_tokens
+    return contents, token_summary, total_batch_tokens
 
 
-def get_batch_meaningful_headers(batch_id: str) -> dict:
-    """Return a dictionary mapping the unique case citation to a list of meaningful headers for a transcript."""
-    batch = wait_for_batch(batch_id)
-
-    # show token usage for requests in the batch
-    token_summary, total_batch_tokens = get_batch_token_usage(batch_id)
+def log_token_usage(token_summary: list[dict], total_batch_tokens: int) -> None:
+    """Log the token usage per request and in total for a batch."""
     logging.info("Token usage per request:")
     for item in token_summary:
-        logging.info(f"{item['custom_id']} Request Token Usage: {item}")
-    logging.info(f"Total batch tokens used: {total_batch_tokens}")
+        logging.info("%s Request Token Usage: %s", item['custom_id'], item)
+    logging.info("Total batch tokens used: %s", total_batch_tokens)
 
-    response = openai.files.content(batch.output_file_id)
-    headers_dict = {}
-    for line in response.text.splitlines():
-        response_obj = json.loads(line)
 
-        custom_id = response_obj.get("custom_id")
-        headers_list = response_obj.get("response", {}).get("body", {}).get(
-            "choices", [])[0].get("message", {}).get("content")
+def get_batch_meaningful_headers(batch_id: str, token_log: list = None) -> dict:
+    """Return a dictionary mapping the unique case citation to a list of meaningful headers
+    for a transcript. If `token_log` is given, the token usage of each request is appended to it."""
+    batch = wait_for_batch(batch_id)
 
-        headers_dict[custom_id] = headers_list
+    headers_dict, token_summary, total_batch_tokens = read_batch_results(batch)
+    log_token_usage(token_summary, total_batch_tokens)
+    if token_log is not None:
+        token_log.extend(token_summary)
 
     return headers_dict
 
 
-def get_batch_summaries(batch_id: str) -> dict:
-    """Return the summary responses from the GPT-API request for a transcript."""
+def get_batch_summaries(batch_id: str, token_log: list = None) -> dict:
+    """Return the summary responses from the GPT-API request for a transcript.
+    If `token_log` is given, the token usage of each request is appended to it."""
     batch = wait_for_batch(batch_id)
 
-    if not batch.output_file_id:
-        raise ValueError(
-            "Batch not finished processing yet or no output file detected.")
+    contents, token_summary, total_batch_tokens = read_batch_results(batch)
+    log_token_usage(token_summary, total_batch_tokens)
+    if token_log is not None:
+        token_log.extend(token_summary)
 
-    # show token usage for requests in the batch
-    token_summary, total_batch_tokens = get_batch_token_usage(batch_id)
-    logging.info("Token usage per request:")
-    for item in token_summary:
-        logging.info(f"{item['custom_id']} Request Token Usage: {item}")
-    logging.info(f"Total batch tokens used: {total_batch_tokens}")
-
-    response = openai.files.content(batch.output_file_id)
     summary_dict = {}
-    for line in response.text.splitlines():
-        response_obj = json.loads(line)
-
-        custom_id = response_obj.get("custom_id")
-        summary = response_obj.get("response", {}).get("body", {}).get(
-            "choices", [])[0].get("message", {}).get("content")
-
+    for custom_id, summary in contents.items():
         # Ensure summary is a dict (parse it to be JSON-like if text)
         if isinstance(summary, str):
             try:
@@ -220,10 +252,13 @@ def get_batch_summaries(batch_id: str) -> dict:
     return summary_dict
 
 
-def extract_meaningful_headers(transcripts: list[dict], filename: str) -> dict:
+def extract_meaningful_headers(transcripts: list[dict], filename: str,
+                               token_log: list = None, token_ceiling: int = None) -> dict:
     """Return necessary headers needed to summarise each court transcript.
     transcripts: list of dictionaries where each dictionary represents a court citation mapped to
     a dictionary of headers and their text in the transcript.
+    token_log: optional list which the token usage of each request is appended to.
+    token_ceiling: optional maximum number of tokens the batch may use before it is submitted.
 
     """
 
@@ -236,17 +271,22 @@ def extract_meaningful_headers(transcripts: list[dict], filename: str) -> dict:
                 query_message, citation)
             insert_request(request, filename)
 
+    check_token_ceiling(filename, token_ceiling)
+
     # Upload batch file to openai and run the batch process.
     batch_input_file = upload_batch_file(filename)
     batch = run_batch_requests(batch_input_file)
 
-    return get_batch_meaningful_headers(batch.id)
+    return get_batch_meaningful_headers(batch.id, token_log)
 
 
-def summarise(transcripts: list[dict], filename: str) -> dict:
+def summarise(transcripts: list[dict], filename: str,
+              token_log: list = None, token_ceiling: int = None) -> dict:
     """Return summarised data for each court transcript.
     transcripts: list of dictionaries where each dictionary represents a court citation mapped to
     a dictionary of meaningful headers and their text in the transcript.
+    token_log: optional list which the token usage of each request is appended to.
+    token_ceiling: optional maximum number of tokens the batch may use before it is submitted.
     """
 
     # Setup .jsonl file with individual requests
@@ -257,8 +297,10 @@ def summarise(transcripts: list[dict], filename: str) -> dict:
             request = create_batch_request(query_message, citation)
             insert_request(request, filename)
 
+    check_token_ceiling(filename, token_ceiling)
+
     # Upload batch file to openai and run the batch process.
     batch_input_file = upload_batch_file(filename)
     batch = run_batch_requests(batch_input_file)
 
-    return get_batch_summaries(batch.id)
+    return get_batch_summaries(batch.id, token_log)
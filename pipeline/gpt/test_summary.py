@@ -4,9 +4,18 @@
 
 import pytest
 import json
-from unittest.mock import mock_open, patch
+from unittest.mock import MagicMock, mock_open, patch
+
+from summary import (create_query_messages, create_batch_request, insert_request,
+                     parse_batch_record, read_batch_results, estimate_batch_tokens,
+                     check_token_ceiling, TokenBudgetExceededError, OUTPUT_TOKEN_ALLOWANCE)
+
+
+def make_batch_line(custom_id, content, total_tokens):
+    return json.dumps({"custom_id": custom_id, "response": {"body": {
+        "choices": [{"message": {"content": content}}],
+        "usage": {"prompt_tokens": total_tokens - 1, "total_tokens": total_tokens}}}})
 
-from summary import create_query_messages, create_batch_request, insert_request
 
 def test_create_query_messages_valid_prompt_type():
     """Check that a query message has string prompts stored in the content keys"""
@@ -49,4 +58,47 @@ def test_insert_request():
     mock.assert_called_once_with("fake_file.jsonl", "a")
     handle = mock()
     # Check if request was written once to the jsonl file
-    handle.write.assert_called_once_with(json.dumps(mock_data) + "\n")
\ No newline at end of file
+    handle.write.assert_called_once_with(json.dumps(mock_data) + "\n")
+
+
+def test_parse_batch_record():
+    """Check a batch output line is parsed into its custom_id, content and usage"""
+    record = parse_batch_record(make_batch_line("[2025] UKPC 47", "'Facts'", 10))
+    assert record["custom_id"] == "[2025] UKPC 47"
+    assert record["content"] == "'Facts'"
+    assert record["usage"]["total_tokens"] == 10
+
+
+def test_read_batch_results_downloads_output_once():
+    """Check the batch output file is only downloaded once for both content and token usage"""
+    lines = [make_batch_line("a", "x", 10), "", make_batch_line("b", "y", 5)]
+    batch = MagicMock(output_file_id="file-123")
+    with patch("summary.iter_batch_results",
+               return_value=map(parse_batch_record, filter(None, lines))) as mock_iter:
+        contents, token_summary, total = read_batch_results(batch)
+    mock_iter.assert_called_once_with("file-123")
+    assert contents == {"a": "x", "b": "y"}
+    assert [item["custom_id"] for item in token_summary] == ["a", "b"]
+    assert total == 15
+
+
+def test_read_batch_results_no_output_file():
+    """Check an unfinished batch raises a ValueError"""
+    with pytest.raises(ValueError):
+        read_batch_results(MagicMock(output_file_id=None))
+
+
+def test_estimate_batch_tokens(tmp_path):
+    """Check the batch token estimate counts prompt characters and a completion allowance per request"""
+    filename = str(tmp_path / "batch.jsonl")
+    insert_request(create_batch_request(create_query_messages("a" * 40, "b" * 40), "x"), filename)
+    assert estimate_batch_tokens(filename) == 20 + OUTPUT_TOKEN_ALLOWANCE
+
+
+def test_check_token_ceiling_raises_over_budget(tmp_path):
+    """Check a batch estimated to exceed the token ceiling is stopped before submission"""
+    filename = str(tmp_path / "batch.jsonl")
+    insert_request(create_batch_request(create_query_messages("a" * 4000, "b"), "x"), filename)
+    check_token_ceiling(filename, None)
+    with pytest.raises(TokenBudgetExceededError):
+        check_token_ceiling(filename, 100)
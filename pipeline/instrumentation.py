@@ -0,0 +1,180 @@
+"""Lightweight per-stage timing & throughput instrumentation for the pipeline.
+
+Wrap a stage in `span(name)` (or decorate it with `timed(name)`) to record its wall time,
+along with the items processed, bytes downloaded and DB round trips made while it runs.
+Each finished span is logged as a JSON line, and `log_run_summary` logs a table with
+the totals per stage at the end of a run.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2.extensions import connection, cursor
+
+_lock = threading.Lock()
+_local = threading.local()
+_totals = {}
+
+
+class Span:
+    """Counters for a single timed stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+        self.db_round_trips = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the span's counters as a dictionary."""
+        return {
+            "span": self.name,
+            "seconds": round(self.seconds, 3),
+            "items": self.items,
+            "bytes": self.bytes,
+            "db_round_trips": self.db_round_trips
+        }
+
+
+def _active_spans() -> list[Span]:
+    """Returns the spans currently open in this thread, outermost first."""
+    if not hasattr(_local, "spans"):
+        _local.spans = []
+    return _local.spans
+
+
+def add_items(count: int = 1) -> None:
+    """Records `count` items processed by every open span in this thread."""
+    for active in _active_spans():
+        active.items += count
+
+
+def add_bytes(count: int) -> None:
+    """Records `count` bytes downloaded by every open span in this thread."""
+    for active in _active_spans():
+        active.bytes += count
+
+
+def add_db_round_trip() -> None:
+    """Records a DB round trip made by every open span in this thread."""
+    for active in _active_spans():
+        active.db_round_trips += 1
+
+
+@contextmanager
+def span(name: str, log: bool = True):
+    """
+    Times the enclosed block as stage `name`, yielding its Span.
+    Set `log` to False for per-item spans, which are only counted towards the run summary.
+    """
+    current = Span(name)
+    _active_spans().append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        _active_spans().remove(current)
+        _record(current)
+        if log:
+            logging.info(json.dumps(current.as_dict()))
+
+
+def timed(name: str, log: bool = True):
+    """Decorator which runs the decorated function inside `span(name)`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, log):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(finished: Span) -> None:
+    """Adds a finished span to the per-stage totals."""
+    with _lock:
+        totals = _totals.setdefault(finished.name, {
+            "calls": 0, "seconds": 0.0, "items": 0, "bytes": 0, "db_round_trips": 0})
+        totals["calls"] += 1
+        totals["seconds"] += finished.seconds
+        totals["items"] += finished.items
+        totals["bytes"] += finished.bytes
+        totals["db_round_trips"] += finished.db_round_trips
+
+
+def get_stage_totals() -> dict[str, dict]:
+    """Returns a copy of the per-stage totals recorded so far."""
+    with _lock:
+        return {name: dict(totals) for name, totals in _totals.items()}
+
+
+def reset() -> None:
+    """Clears all recorded totals, e.g. between warm Lambda invocations."""
+    with _lock:
+        _totals.clear()
+
+
+def format_summary(totals: dict[str, dict]) -> str:
+    """Formats per-stage totals as a plain text table."""
+    header = f"{'stage':<20} {'calls':>6} {'seconds':>9} {'items':>7} " \
+        f"{'items/s':>8} {'MB':>8} {'db trips':>9}"
+    lines = [header, "-" * len(header)]
+    for name, stage in totals.items():
+        rate = stage["items"] / stage["seconds"] if stage["seconds"] else 0
+        lines.append(
+            f"{name:<20} {stage['calls']:>6} {stage['seconds']:>9.2f} {stage['items']:>7} "
+            f"{rate:>8.2f} {stage['bytes'] / 1_000_000:>8.2f} {stage['db_round_trips']:>9}")
+    return "\n".join(lines)
+
+
+def log_run_summary() -> None:
+    """Logs the per-stage totals as JSON, and as a table."""
+    totals = get_stage_totals()
+    logging.info(json.dumps({"run_summary": totals}))
+    logging.info("Run summary:\n%s", format_summary(totals))
+
+
+class CountingCursorMixin:
+    """Cursor mixin which records a DB round trip for each statement executed."""
+
+    def execute(self, query, params=None):
+        """Executes `query`, counting a round trip."""
+        add_db_round_trip()
+        return super().execute(query, params)
+
+    def executemany(self, query, params_seq):
+        """Executes `query` for each of `params_seq`, counting one round trip."""
+        add_db_round_trip()
+        return super().executemany(query, params_seq)
+
+
+_counting_cursor_classes = {}
+
+
+def _get_counting_cursor_class(base: type) -> type:
+    """Returns a subclass of cursor class `base` which counts DB round trips."""
+    if base not in _counting_cursor_classes:
+        _counting_cursor_classes[base] = type(
+            f"Counting{base.__name__}", (CountingCursorMixin, base), {})
+    return _counting_cursor_classes[base]
+
+
+class CountingConnection(connection):
+    """Connection which records a DB round trip for every statement and commit."""
+
+    def cursor(self, *args, **kwargs):
+        """Returns a cursor which counts round trips, of the requested (or default) cursor class."""
+        base = kwargs.pop("cursor_factory", None) or self.cursor_factory or cursor
+        kwargs["cursor_factory"] = _get_counting_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        """Commits the transaction, counting a round trip."""
+        add_db_round_trip()
+        return super().commit()
@@ -4,6 +4,7 @@ import json
 import logging
 from typing import Optional
 from psycopg2.extensions import connection
+import db_pool
 from judge_scraping.rds_utils import get_db_connection, query_rds
 from judge_scraping.judge_scraper import judge_main
 
@@ -132,7 +133,7 @@ def scrape_and_upload_judges():
 
     logging.info("All judges loaded!")
 
-    con.close()
+    db_pool.release_connection(con)
 
 
 if __name__ == "__main__":
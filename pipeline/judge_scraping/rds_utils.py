@@ -1,28 +1,19 @@
 """File holding RDS Utility functions"""
 
 import logging
-from os import environ as ENV
 from psycopg2.extensions import connection
-from psycopg2 import connect, Error
 from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
+
+import db_pool
 
 
 def get_db_connection():
-    load_dotenv()
-    """Gets the db connection and returns it."""
+    """Gets a connection from the shared pool and returns it."""
     try:
-        con = connect(
-            host=ENV["DB_HOST"],
-            database=ENV["DB_NAME"],
-            user=ENV["DB_USERNAME"],
-            password=ENV["DB_PASSWORD"],
-            port=ENV["DB_PORT"],
-            cursor_factory=RealDictCursor,
-        )
+        con = db_pool.get_connection(cursor_factory=RealDictCursor)
         logging.info("Connected to RDS.")
         return con
-    except Error as e:
+    except ConnectionError:
         logging.critical("Error connecting to RDS")
         return None
 
@@ -1,30 +1,46 @@
 """This script loads data into the hearing table as well as the judge_hearing table."""
 
 import logging
-from os import environ as ENV
-from psycopg2 import connect
+from datetime import date, datetime
+from typing import Optional
+from psycopg2.errors import UndefinedFunction
 from psycopg2.extensions import connection
 from psycopg2.extras import RealDictCursor
-from psycopg2 import Error
-
 
+import db_pool
 from judge_scraping.judge_scraper import parse_name
+from trigram_index import TrigramIndex
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+# How many months of hearing partitions each run creates in advance
+PARTITION_MONTHS_AHEAD = 3
+
+# Months whose hearing partition is known to exist, so each is only checked once per process
+_partitioned_months = set()
+
+# How similar (by trigrams) a judge's last name must be to a known judge's to be taken as a
+# spelling variant of it: enough for "Brigs" to match "Briggs", but not "Lewis" "Lewison"
+JUDGE_MATCH_THRESHOLD = 0.6
+# How many of the most similar known judges are checked, enough for judges sharing a common surname
+JUDGE_CANDIDATES = 20
+
+# Known judges' last names, to match judges in-process if the DB has no pg_trgm extension
+_judge_index = None
+_judge_first_names = {}
+
+# Hearings loaded since the data version was last bumped, so runs which load none don't
+# invalidate the dashboard's cache, and the judges who sat them, whose word clouds need redrawing
+_hearings_loaded = 0
+_loaded_judge_ids = set()
+
 
 def get_db_connection() -> connection:
-    """ Returns a connection to our database. """
+    """ Returns a connection to our database from the shared pool. """
     try:
-        db_connection = connect(
-            host=ENV['DB_HOST'],
-            user=ENV['DB_USERNAME'],
-            password=ENV['DB_PASSWORD'],
-            database=ENV['DB_NAME']
-        )
-        return db_connection
-    except Error as e:
+        return db_pool.get_connection()
+    except ConnectionError as e:
         print(f"Error connecting to database: {e}")
         return None
 
@@ -83,42 +99,104 @@ def insert_judges(conn: connection, judges: list) -> list[int]:
                     INSERT INTO
                         judge(title_id, first_name, middle_name, last_name, appointment_date)
                     VALUES(%s, %s, %s, %s, %s)
-                    ON CONFLICT (title_id, first_name, middle_name, last_name, appointment_date) DO NOTHING
+                    ON CONFLICT (title_id, first_name, middle_name, last_name, appointment_date)
+                    -- A no-op update, so a judge already stored still returns their ID
+                    DO UPDATE SET last_name = EXCLUDED.last_name
                     RETURNING judge_id;
                     """
                 cur.execute(query, (title_id, name.get(
                     'first_name'), name.get('middle_name'), name.get('last_name'), None))
-                data = cur.fetchone()
-                if data:
-                    judge_ids.append(data[0])
-                    logging.info("Inserted Judge: %s with ID: %s",
-                                 name.get('last_name'), data[0])
-                else:
-                    logging.info("Response is None.")
+                judge_id = cur.fetchone()[0]
+                judge_ids.append(judge_id)
+                logging.info("Stored Judge: %s with ID: %s", name.get('last_name'), judge_id)
+                if _judge_index is not None:
+                    _judge_index.add(judge_id, name.get('last_name'))
+                    _judge_first_names[judge_id] = name.get('first_name')
                 conn.commit()
     return judge_ids
 
 
+def is_same_judge(name: dict, candidate: dict) -> bool:
+    """Returns whether a known judge, matched by last name, can be the judge `name`: their last
+    names must be similar enough, and their first names (where both are known) share an initial,
+    so judges who only share a surname aren't merged."""
+    first_name, candidate_first_name = name.get("first_name"), candidate.get("first_name")
+    if first_name and candidate_first_name \
+            and first_name[0].lower() != candidate_first_name[0].lower():
+        return False
+    return candidate["score"] >= JUDGE_MATCH_THRESHOLD
+
+
+def get_judge_candidates(conn: connection, last_name: str) -> list[dict]:
+    """Returns the known judges with last names most similar to `last_name`,
+    with their `score`, most similar first."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+        SELECT judge_id, first_name, similarity(LOWER(last_name), LOWER(%s)) AS score
+        FROM judge
+        WHERE LOWER(last_name) %% LOWER(%s)
+        ORDER BY score DESC, judge_id
+        LIMIT %s;
+        """
+        cur.execute(query, (last_name, last_name, JUDGE_CANDIDATES))
+        return cur.fetchall()
+
+
+def get_judge_index(conn: connection) -> TrigramIndex:
+    """Returns the in-process index of known judges' last names, building it on first use."""
+    global _judge_index  # pylint: disable=global-statement
+    if _judge_index is None:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT judge_id, first_name, last_name FROM judge;")
+            judges = cur.fetchall()
+        _judge_index = TrigramIndex()
+        for judge in judges:
+            _judge_index.add(judge["judge_id"], judge["last_name"])
+            _judge_first_names[judge["judge_id"]] = judge["first_name"]
+        logging.info("Indexed %s judges in-process, as pg_trgm is unavailable", len(judges))
+    return _judge_index
+
+
+def search_judge_index(conn: connection, last_name: str) -> list[dict]:
+    """Returns the known judges with last names most similar to `last_name`, like
+    `get_judge_candidates`, from the in-process index."""
+    return [{"judge_id": judge_id, "score": score, "first_name": _judge_first_names.get(judge_id)}
+            for judge_id, score in get_judge_index(conn).search(last_name, limit=JUDGE_CANDIDATES)]
+
+
+def find_judge(conn: connection, name: dict) -> Optional[int]:
+    """Returns the ID of the known judge `name` (parsed by `parse_name`) is, matching their last
+    name exactly or, failing that, a close spelling of it."""
+    if _judge_index is not None:
+        # The DB has already been found to have no pg_trgm extension
+        candidates = search_judge_index(conn, name["last_name"])
+    else:
+        try:
+            candidates = get_judge_candidates(conn, name["last_name"])
+        except UndefinedFunction:
+            conn.rollback()
+            candidates = search_judge_index(conn, name["last_name"])
+
+    for candidate in candidates:
+        if is_same_judge(name, candidate):
+            return candidate["judge_id"]
+    return None
+
+
 def check_judge_exists(conn: connection, judges: list) -> list[int]:
-    """ Returns the judge_id if the judge exists in the judge table. """
+    """ Returns the judge_id of each judge in `judges` found in the judge table. """
 
     judge_ids = []
     if judges:
         for judge in judges:
-            judge = parse_name(judge)
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                query = """
-                SELECT judge_id
-                FROM judge
-                WHERE LOWER(last_name) = LOWER(%s);
-                """
-
-                cur.execute(query, (judge.get('last_name'),))
-                data = cur.fetchone()
-                if data:
-                    logging.info(
-                        "Judge ID %s found. Appending to judge_ids", data['judge_id'])
-                    judge_ids.append(data['judge_id'])
+            name = parse_name(judge)
+            if not name.get('last_name'):
+                continue
+            judge_id = find_judge(conn, name)
+            if judge_id:
+                logging.info(
+                    "Judge ID %s found. Appending to judge_ids", judge_id)
+                judge_ids.append(judge_id)
 
     return judge_ids
 
@@ -169,16 +247,65 @@ def insert_into_court(conn: connection, court: str) -> int:
         return cur.fetchone()['court_id']
 
 
-def insert_into_judge_hearing(conn: connection, judge_ids: list, hearing_id: int) -> None:
+def get_partition_month(hearing_date: datetime | str) -> date:
+    """Returns the first day of the month of `hearing_date`,
+    which may be an ISO string from a checkpoint."""
+    if isinstance(hearing_date, str):
+        hearing_date = date.fromisoformat(hearing_date[:10])
+    return date(hearing_date.year, hearing_date.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Returns the first day of the month `months` after `month`."""
+    month_index = month.month - 1 + months
+    return date(month.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def create_hearing_partitions(conn: connection, from_date: date, to_date: date) -> int:
+    """Creates the monthly hearing partitions from `from_date` to `to_date` which don't exist,
+    returning how many."""
+    with conn.cursor() as cur:
+        query = """
+        SELECT create_hearing_partitions(%s, %s);
+        """
+        cur.execute(query, (from_date, to_date))
+        created = cur.fetchone()[0]
+        conn.commit()
+    return created
+
+
+def ensure_hearing_partition(conn: connection, hearing_date: datetime | str) -> None:
+    """Creates the partition a hearing on `hearing_date` belongs in, if it doesn't exist."""
+    month = get_partition_month(hearing_date)
+    if month in _partitioned_months:
+        return
+    if create_hearing_partitions(conn, month, month):
+        logging.info("Created hearing partition for %s", month.strftime("%Y-%m"))
+    _partitioned_months.add(month)
+
+
+def create_future_partitions(conn: connection, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """Creates the hearing partitions for this month & the next `months_ahead`,
+    returning how many were new."""
+    this_month = get_partition_month(date.today())
+    created = create_hearing_partitions(conn, this_month, add_months(this_month, months_ahead))
+    if created:
+        logging.info("Created %s future hearing partition(s)", created)
+    return created
+
+
+def insert_into_judge_hearing(conn: connection, judge_ids: list, hearing_id: int,
+                              hearing_date: datetime | str) -> None:
     """ Inserts records in the judge_hearing table. """
 
     for judge_id in judge_ids:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             query = """
-            INSERT INTO judge_hearing (judge_id, hearing_id)
-            VALUES (%s, %s);
+            INSERT INTO judge_hearing (judge_id, hearing_id, hearing_date)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (judge_id, hearing_id) DO NOTHING;
             """
-            cur.execute(query, (judge_id, hearing_id))
+            cur.execute(query, (judge_id, hearing_id, hearing_date))
             logging.info("Inserting judge hearing: %s, %s...",
                          judge_id, hearing_id)
             conn.commit()
@@ -186,8 +313,10 @@ def insert_into_judge_hearing(conn: connection, judge_ids: list, hearing_id: int
                          judge_id, hearing_id)
 
 
-def insert_into_hearing(conn: connection, hearing: dict, metadata: dict) -> None:
-    """ Inserts a new row in the hearing table. """
+def insert_into_hearing(conn: connection, hearing: dict, metadata: dict) -> bool:
+    """ Inserts a new row in the hearing table.
+    Returns False if the hearing has no date, so it can't be loaded until it's given one,
+    and True otherwise, whether it was loaded or skipped for good. """
     if not metadata.get('judges'):
         # Skip if judges is None
         logging.info('No Judges in %s - defaulting to unknown.',
@@ -196,16 +325,28 @@ def insert_into_hearing(conn: connection, hearing: dict, metadata: dict) -> None
 
     if not get_judgement_id(conn, hearing.get('ruling')):
         logging.info('Skipping. No conclusive judgement found.')
-        return
+        return True
 
     if metadata.get('court') is None:
         logging.info('Skipping. No court name found.')
-        return
+        return True
+
+    # The hearing table is partitioned by date, so every hearing needs one. Transcripts
+    # without a judgement date are dated by when they were published, so this is rare
+    if not metadata.get('verdict_date'):
+        logging.warning('Not loading %s yet: it has no hearing date.', metadata.get("citation"))
+        return False
 
-    judge_ids = check_judge_exists(conn, metadata.get('judges'))
+    judge_ids, new_judges = [], []
+    for judge in metadata.get('judges'):
+        found = check_judge_exists(conn, [judge])
+        judge_ids += found
+        if not found:
+            new_judges.append(judge)
 
-    if len(judge_ids) != len(metadata.get('judges')):
-        judge_ids += insert_judges(conn, metadata.get('judges'))
+    # Only judges not matched (even by a close spelling) are new
+    if new_judges:
+        judge_ids += insert_judges(conn, new_judges)
 
     logging.info("Judge IDs: %s", judge_ids)
 
@@ -229,17 +370,50 @@ def insert_into_hearing(conn: connection, hearing: dict, metadata: dict) -> None
     logging.info("Anomaly: %s", anomaly[:100])
     logging.info("Hearing URL: %s", hearing_url)
 
+    ensure_hearing_partition(conn, hearing_date)
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # hearing's unique constraints must include hearing_date, so the citation is
+        # registered first, and the hearing is only inserted if it wasn't registered already
         query = """
+        WITH registered AS (
+            INSERT INTO hearing_citation (hearing_citation, hearing_id, hearing_date)
+            VALUES (%s, nextval('hearing_hearing_id_seq'), %s)
+            ON CONFLICT (hearing_citation) DO NOTHING
+            RETURNING hearing_id, hearing_date
+        )
         INSERT INTO hearing
-        (judgement_id, court_id, hearing_citation, hearing_title, hearing_date, hearing_description, hearing_url, hearing_anomaly)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        (hearing_id, judgement_id, court_id, hearing_citation, hearing_title, hearing_date,
+         hearing_description, hearing_url, hearing_anomaly)
+        SELECT hearing_id, %s, %s, %s, %s, hearing_date, %s, %s, %s
+        FROM registered
         RETURNING hearing_id;
         """
-        cur.execute(query, (judgement_id, court_id, citation,
-                    hearing_title, hearing_date, description[:1000], hearing_url, anomaly[:1000]))
-        hearing_id = cur.fetchone()['hearing_id']
+        cur.execute(query, (citation, hearing_date, judgement_id, court_id, citation,
+                    hearing_title, description[:1000], hearing_url, anomaly[:1000]))
+        inserted = cur.fetchone()
         logging.info("Inserting hearing: %s...", citation)
         conn.commit()
-        logging.info("Inserted hearing: %s", citation)
-    insert_into_judge_hearing(conn, judge_ids, hearing_id)
+    if inserted is None:
+        logging.info("Skipping. Hearing %s already loaded.", citation)
+        return True
+    logging.info("Inserted hearing: %s", citation)
+    insert_into_judge_hearing(conn, judge_ids, inserted['hearing_id'], hearing_date)
+    global _hearings_loaded  # pylint: disable=global-statement
+    _hearings_loaded += 1
+    _loaded_judge_ids.update(judge_ids)
+    return True
+
+
+def pop_hearings_loaded() -> int:
+    """Returns how many hearings have been loaded since this was last called,
+    resetting the count."""
+    global _hearings_loaded  # pylint: disable=global-statement
+    loaded, _hearings_loaded = _hearings_loaded, 0
+    return loaded
+
+
+def pop_loaded_judge_ids() -> set[int]:
+    """Returns the judges of the hearings loaded since this was last called, resetting them."""
+    judge_ids = set(_loaded_judge_ids)
+    _loaded_judge_ids.clear()
+    return judge_ids
@@ -0,0 +1,212 @@
+"""Applies versioned schema migrations (`migrations/NNN_name.sql`) to the RDS, in order.
+
+Each applied migration is recorded in the `schema_migration` table, so running this again
+only applies the new ones. Runs hold an advisory lock, so two deploys can't race.
+`database/schema.sql` records the migrations it already includes, with no checksum.
+
+A migration normally runs in a single transaction with its state row, so it is applied
+all-or-nothing. Statements like `CREATE INDEX CONCURRENTLY` can't run in a transaction:
+migrations whose first line is `-- migrate:no-transaction` are run statement by statement
+in autocommit instead, and so must be safe to re-run if they fail part way through
+(e.g. with `IF NOT EXISTS`).
+"""
+
+import argparse
+import hashlib
+import logging
+import re
+from pathlib import Path
+
+from psycopg2.extensions import connection
+
+from db_pool import pooled_connection
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+MIGRATION_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+NO_TRANSACTION = "-- migrate:no-transaction"
+# Any constant will do, as long as nothing else takes the same advisory lock
+LOCK_ID = 40_001
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class Migration:
+    """A migration file, with its version, name & SQL."""
+
+    def __init__(self, path: Path):
+        match = MIGRATION_PATTERN.match(path.name)
+        if not match:
+            raise ValueError(f"Migration {path.name} isn't named NNN_name.sql")
+        self.path = path
+        self.version = int(match.group(1))
+        self.name = match.group(2)
+        self.sql = path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        """Returns the SHA-256 of the migration's SQL, to spot edits to applied migrations."""
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    @property
+    def transactional(self) -> bool:
+        """Returns whether the migration can run in a transaction."""
+        return not self.sql.lstrip().startswith(NO_TRANSACTION)
+
+
+def get_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Returns every migration in `directory`, in version order."""
+    migrations = sorted((Migration(path) for path in directory.glob("*.sql")),
+                        key=lambda migration: migration.version)
+    for previous, migration in zip(migrations, migrations[1:]):
+        if previous.version == migration.version:
+            raise ValueError(f"Migrations {previous.path.name} & {migration.path.name} "
+                             "share a version")
+    return migrations
+
+
+def split_statements(sql: str) -> list[str]:
+    """Splits SQL into statements on `;`, ignoring those in quotes, dollar-quotes & comments."""
+    statements = []
+    start = i = 0
+    while i < len(sql):
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end + 1
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = len(sql) if end == -1 else end + 2
+        elif sql[i] in "'\"":
+            end = sql.find(sql[i], i + 1)
+            # A doubled quote is an escaped quote, so the quoted string carries on
+            while end != -1 and sql.startswith(sql[i], end + 1):
+                end = sql.find(sql[i], end + 2)
+            i = len(sql) if end == -1 else end + 1
+        elif sql[i] == "$" and (tag := re.match(r"\$(\w*)\$", sql[i:])):
+            end = sql.find(tag.group(0), i + len(tag.group(0)))
+            i = len(sql) if end == -1 else end + len(tag.group(0))
+        elif sql[i] == ";":
+            statements.append(sql[start:i])
+            start = i = i + 1
+        else:
+            i += 1
+    statements.append(sql[start:])
+    return [statement.strip() for statement in statements if has_code(statement)]
+
+
+def has_code(statement: str) -> bool:
+    """Returns whether a statement contains anything other than comments & whitespace."""
+    without_comments = re.sub(r"--[^\n]*|/\*.*?\*/", "", statement, flags=re.DOTALL)
+    return bool(without_comments.strip())
+
+
+def create_migration_table(conn: connection) -> None:
+    """Creates the table of applied migrations, if it doesn't exist."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migration (
+                version INT PRIMARY KEY,
+                name TEXT NOT NULL,
+                checksum TEXT,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+    conn.commit()
+
+
+def get_applied(conn: connection) -> dict[int, str]:
+    """Returns the checksum of every applied migration (None if applied by schema.sql),
+    by version."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT version, checksum
+            FROM schema_migration;
+        """)
+        applied = {version: checksum for version, checksum in cur.fetchall()}
+    conn.commit()
+    return applied
+
+
+def record_migration(conn: connection, migration: Migration) -> None:
+    """Records `migration` as applied."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO schema_migration (version, name, checksum)
+            VALUES (%s, %s, %s);
+        """, (migration.version, migration.name, migration.checksum))
+
+
+def apply_migration(conn: connection, migration: Migration) -> None:
+    """Applies one migration, with its state row, in a transaction if it allows one."""
+    if migration.transactional:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(migration.sql)
+            record_migration(conn, migration)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return
+
+    conn.autocommit = True
+    try:
+        for statement in split_statements(migration.sql):
+            with conn.cursor() as cur:
+                cur.execute(statement)
+        record_migration(conn, migration)
+    finally:
+        conn.autocommit = False
+
+
+def migrate(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Applies every pending migration in order, returning those applied."""
+    migrations = get_migrations(directory)
+    applied_now = []
+    with pooled_connection() as conn:
+        create_migration_table(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s);", (LOCK_ID,))
+        conn.commit()
+        try:
+            applied = get_applied(conn)
+            for migration in migrations:
+                if migration.version in applied:
+                    if applied[migration.version] not in (None, migration.checksum):
+                        logging.warning("Migration %s has changed since it was applied.",
+                                        migration.path.name)
+                    continue
+                logging.info("Applying migration %s.", migration.path.name)
+                apply_migration(conn, migration)
+                applied_now.append(migration)
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s);", (LOCK_ID,))
+            conn.commit()
+    logging.info("Applied %s migration(s).", len(applied_now))
+    return applied_now
+
+
+def get_status(directory: Path = MIGRATIONS_DIR) -> list[tuple[Migration, bool]]:
+    """Returns every migration, with whether it has been applied."""
+    with pooled_connection() as conn:
+        create_migration_table(conn)
+        applied = get_applied(conn)
+    return [(migration, migration.version in applied) for migration in get_migrations(directory)]
+
+
+def get_args() -> argparse.Namespace:
+    """Sets up CLI arguments."""
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--status", action="store_true",
+                        help="List migrations and whether each is applied, without applying any.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    if args.status:
+        for pending_migration, is_applied in get_status():
+            print(f"{'applied' if is_applied else 'pending'} {pending_migration.path.name}")
+    else:
+        migrate()
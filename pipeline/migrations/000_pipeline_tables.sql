@@ -0,0 +1,57 @@
+-- Tables the pipeline relies on which pre-date the migrations (see database/schema.sql):
+-- run & token usage accounting, transcript checkpoints, backfill entries & parsed sections.
+-- Runs first, as 001 indexes token_usage. Safe to re-run on DBs which already have them.
+
+CREATE TABLE IF NOT EXISTS pipeline_run (
+    run_id BIGSERIAL PRIMARY KEY,
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    token_budget BIGINT
+);
+
+CREATE TABLE IF NOT EXISTS token_usage (
+    token_usage_id BIGSERIAL PRIMARY KEY,
+    run_id BIGINT REFERENCES pipeline_run (run_id),
+    hearing_citation VARCHAR(50) NOT NULL,
+    stage VARCHAR(20) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    input_tokens INT NOT NULL,
+    output_tokens INT NOT NULL,
+    total_tokens INT NOT NULL,
+    recorded_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS transcript_checkpoint (
+    hearing_citation VARCHAR(50) PRIMARY KEY,
+    stage VARCHAR(20) NOT NULL,
+    metadata JSONB NOT NULL,
+    payload JSONB,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS transcript_checkpoint_pending_idx
+ON
+transcript_checkpoint (stage)
+WHERE stage <> 'loaded';
+
+CREATE TABLE IF NOT EXISTS backfill_entry (
+    entry_uri VARCHAR(200) PRIMARY KEY,
+    entry_title VARCHAR(500),
+    xml_url VARCHAR(300) NOT NULL,
+    shard_index INT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    claimed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS backfill_entry_claim_idx
+ON
+backfill_entry (shard_index, status, entry_uri);
+
+CREATE TABLE IF NOT EXISTS hearing_section (
+    hearing_citation VARCHAR(50) NOT NULL,
+    section_order INT NOT NULL,
+    section_heading TEXT NOT NULL,
+    section_content BYTEA NOT NULL,
+    PRIMARY KEY (hearing_citation, section_order)
+);
+
+ALTER TABLE hearing_section ALTER COLUMN section_content SET STORAGE EXTERNAL;
@@ -0,0 +1,64 @@
+-- migrate:no-transaction
+-- Indexes & constraints for the lookups made by the API, dashboard, email & loader.
+-- Safe to re-run, and built CONCURRENTLY so tables stay writable.
+-- If a concurrent build fails (e.g. duplicate citations), it leaves an INVALID index:
+-- drop it, fix the data, and re-run.
+
+-- Remove duplicate judge/hearing links before making them unique
+DELETE FROM judge_hearing a
+USING judge_hearing b
+WHERE a.judge_id = b.judge_id
+AND a.hearing_id = b.hearing_id
+AND a.judge_hearing_id > b.judge_hearing_id;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_judge_hearing
+ON
+judge_hearing (judge_id, hearing_id);
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_hearing_citation
+ON
+hearing (hearing_citation);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'unique_judge_hearing') THEN
+        ALTER TABLE judge_hearing
+        ADD CONSTRAINT unique_judge_hearing UNIQUE USING INDEX unique_judge_hearing;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'unique_hearing_citation') THEN
+        ALTER TABLE hearing
+        ADD CONSTRAINT unique_hearing_citation UNIQUE USING INDEX unique_hearing_citation;
+    END IF;
+END $$;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS hearing_date_idx
+ON
+hearing (hearing_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS hearing_court_idx
+ON
+hearing (court_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS hearing_judgement_idx
+ON
+hearing (judgement_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS judge_hearing_hearing_idx
+ON
+judge_hearing (hearing_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS judge_last_name_lower_idx
+ON
+judge (LOWER(last_name));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS court_name_lower_idx
+ON
+court (LOWER(court_name));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS title_name_lower_idx
+ON
+title (LOWER(title_name));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS token_usage_run_idx
+ON
+token_usage (run_id);
@@ -0,0 +1,194 @@
+-- migrate:no-transaction
+-- Rebuilds hearing as a table partitioned by month of hearing_date (see database/schema.sql).
+-- Rows are copied into a new partitioned table in batches, each committed, so hearing stays
+-- readable & writable while they are. Only the final catch-up of rows inserted meanwhile, and
+-- the swap of the two tables, lock hearing & judge_hearing. This relies on hearings only being
+-- inserted (as the loader does) while it runs. Safe to re-run if it fails part way through.
+-- Fails if any hearing has no hearing_date, or shares its citation & date with another:
+-- give those a date, or delete them.
+
+CREATE OR REPLACE FUNCTION create_hearing_partitions(from_date DATE, to_date DATE)
+RETURNS INT AS $$
+DECLARE
+    partition_month DATE := date_trunc('month', from_date);
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    -- Concurrent loaders may need the same partition, so only one creates it
+    PERFORM pg_advisory_xact_lock(hashtext('create_hearing_partitions'));
+    WHILE partition_month <= to_date LOOP
+        partition_name := 'hearing_' || to_char(partition_month, '"y"YYYY"m"MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF hearing FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, partition_month, partition_month + interval '1 month');
+            created := created + 1;
+        END IF;
+        partition_month := partition_month + interval '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Creates the monthly partitions of hearing_partitioned covering every hearing so far, and the
+-- next few months'. They're named as hearing's will be, as they become hearing's in the swap.
+CREATE OR REPLACE FUNCTION create_partitions_for_copy()
+RETURNS VOID AS $$
+DECLARE
+    partition_month DATE;
+    last_month DATE;
+    partition_name TEXT;
+BEGIN
+    SELECT
+        date_trunc('month', COALESCE(MIN(hearing_date), CURRENT_DATE)),
+        GREATEST(CURRENT_DATE, MAX(hearing_date)::DATE) + interval '3 months'
+    INTO partition_month, last_month
+    FROM hearing;
+    WHILE partition_month <= last_month LOOP
+        partition_name := 'hearing_' || to_char(partition_month, '"y"YYYY"m"MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF hearing_partitioned '
+                           || 'FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, partition_month, partition_month + interval '1 month');
+        END IF;
+        partition_month := partition_month + interval '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'hearing'::regclass) THEN
+        RETURN;
+    END IF;
+    IF EXISTS (SELECT 1 FROM hearing WHERE hearing_date IS NULL) THEN
+        RAISE EXCEPTION 'hearing has rows without a hearing_date, which cannot be partitioned';
+    END IF;
+
+    CREATE TABLE IF NOT EXISTS hearing_partitioned (
+        hearing_id BIGINT NOT NULL DEFAULT nextval('hearing_hearing_id_seq'),
+        judgement_id BIGINT REFERENCES judgement (judgement_id),
+        court_id BIGINT REFERENCES court (court_id),
+        hearing_citation VARCHAR(50) NOT NULL,
+        hearing_title VARCHAR(200),
+        hearing_date TIMESTAMP NOT NULL,
+        hearing_description VARCHAR(1000),
+        hearing_anomaly VARCHAR(1000),
+        hearing_url VARCHAR(100),
+        CONSTRAINT hearing_partitioned_pkey PRIMARY KEY (hearing_id, hearing_date),
+        CONSTRAINT hearing_partitioned_citation UNIQUE (hearing_citation, hearing_date)
+    ) PARTITION BY RANGE (hearing_date);
+    PERFORM create_partitions_for_copy();
+
+    -- Built now, while the new table isn't in use, rather than during the swap
+    CREATE INDEX IF NOT EXISTS hearing_partitioned_date_idx
+    ON
+    hearing_partitioned (hearing_date);
+
+    CREATE INDEX IF NOT EXISTS hearing_partitioned_court_idx
+    ON
+    hearing_partitioned (court_id);
+
+    CREATE INDEX IF NOT EXISTS hearing_partitioned_judgement_idx
+    ON
+    hearing_partitioned (judgement_id);
+
+    -- Partitioned keys include hearing_date, so judge_hearing carries it too
+    ALTER TABLE judge_hearing ADD COLUMN IF NOT EXISTS hearing_date TIMESTAMP;
+END $$;
+
+-- Copies hearings (and their judges' hearing dates) in batches of hearing IDs, committing each
+DO $$
+DECLARE
+    batch_size CONSTANT INT := 5000;
+    batch_start BIGINT;
+    last_id BIGINT;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'hearing'::regclass) THEN
+        RETURN;
+    END IF;
+    SELECT COALESCE(MAX(hearing_id) + 1, 1) INTO batch_start FROM hearing_partitioned;
+    SELECT MAX(hearing_id) INTO last_id FROM hearing;
+    WHILE batch_start <= last_id LOOP
+        INSERT INTO hearing_partitioned
+            (hearing_id, judgement_id, court_id, hearing_citation, hearing_title,
+             hearing_date, hearing_description, hearing_anomaly, hearing_url)
+        SELECT
+            hearing_id, judgement_id, court_id, hearing_citation, hearing_title,
+            hearing_date, hearing_description, hearing_anomaly, hearing_url
+        FROM hearing
+        WHERE hearing_id >= batch_start AND hearing_id < batch_start + batch_size
+        ON CONFLICT (hearing_id, hearing_date) DO NOTHING;
+
+        UPDATE judge_hearing jh
+        SET hearing_date = h.hearing_date
+        FROM hearing h
+        WHERE jh.hearing_id = h.hearing_id
+        AND jh.hearing_id >= batch_start AND jh.hearing_id < batch_start + batch_size
+        AND jh.hearing_date IS NULL;
+
+        COMMIT;
+        batch_start := batch_start + batch_size;
+    END LOOP;
+END $$;
+
+-- Copies the hearings inserted (or committed) since their batch was copied, then swaps the tables
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'hearing'::regclass) THEN
+        RETURN;
+    END IF;
+    LOCK TABLE hearing, judge_hearing IN ACCESS EXCLUSIVE MODE;
+
+    -- Hearings loaded during the copy may be older than any before it
+    PERFORM create_partitions_for_copy();
+    INSERT INTO hearing_partitioned
+        (hearing_id, judgement_id, court_id, hearing_citation, hearing_title,
+         hearing_date, hearing_description, hearing_anomaly, hearing_url)
+    SELECT
+        h.hearing_id, h.judgement_id, h.court_id, h.hearing_citation, h.hearing_title,
+        h.hearing_date, h.hearing_description, h.hearing_anomaly, h.hearing_url
+    FROM hearing h
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM hearing_partitioned hp
+        WHERE hp.hearing_id = h.hearing_id
+    );
+
+    UPDATE judge_hearing jh
+    SET hearing_date = h.hearing_date
+    FROM hearing h
+    WHERE jh.hearing_id = h.hearing_id
+    AND jh.hearing_date IS NULL;
+    DELETE FROM judge_hearing WHERE hearing_date IS NULL;
+
+    -- Move the old table, its constraints & indexes out of the way, keeping its id sequence
+    ALTER TABLE judge_hearing DROP CONSTRAINT IF EXISTS judge_hearing_hearing_id_fkey;
+    ALTER TABLE hearing RENAME TO hearing_unpartitioned;
+    ALTER TABLE hearing_unpartitioned DROP CONSTRAINT hearing_pkey;
+    ALTER TABLE hearing_unpartitioned DROP CONSTRAINT IF EXISTS unique_hearing_citation;
+    DROP INDEX IF EXISTS hearing_date_idx;
+    DROP INDEX IF EXISTS hearing_court_idx;
+    DROP INDEX IF EXISTS hearing_judgement_idx;
+    ALTER TABLE hearing_unpartitioned ALTER COLUMN hearing_id DROP DEFAULT;
+
+    ALTER TABLE hearing_partitioned RENAME TO hearing;
+    ALTER TABLE hearing RENAME CONSTRAINT hearing_partitioned_pkey TO hearing_pkey;
+    ALTER TABLE hearing RENAME CONSTRAINT hearing_partitioned_citation TO unique_hearing_citation;
+    ALTER INDEX hearing_partitioned_date_idx RENAME TO hearing_date_idx;
+    ALTER INDEX hearing_partitioned_court_idx RENAME TO hearing_court_idx;
+    ALTER INDEX hearing_partitioned_judgement_idx RENAME TO hearing_judgement_idx;
+    ALTER SEQUENCE hearing_hearing_id_seq OWNED BY hearing.hearing_id;
+    DROP TABLE hearing_unpartitioned;
+
+    ALTER TABLE judge_hearing ALTER COLUMN hearing_id SET NOT NULL;
+    ALTER TABLE judge_hearing ALTER COLUMN hearing_date SET NOT NULL;
+    -- Checked below, without blocking writes
+    ALTER TABLE judge_hearing
+    ADD CONSTRAINT judge_hearing_hearing_id_hearing_date_fkey
+    FOREIGN KEY (hearing_id, hearing_date) REFERENCES hearing (hearing_id, hearing_date)
+    NOT VALID;
+END $$;
+
+ALTER TABLE judge_hearing VALIDATE CONSTRAINT judge_hearing_hearing_id_hearing_date_fkey;
+
+DROP FUNCTION IF EXISTS create_partitions_for_copy;
@@ -0,0 +1,59 @@
+-- Materialized views of the counts the dashboard charts (see database/schema.sql).
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS ruling_count_by_court_month AS
+SELECT
+    COALESCE(c.court_name, 'Unknown') AS court_name,
+    date_trunc('month', h.hearing_date)::DATE AS hearing_month,
+    COALESCE(j.judgement_favour, 'Undisclosed') AS judgement_favour,
+    COUNT(*)::INT AS hearing_count
+FROM hearing h
+LEFT JOIN court c ON h.court_id = c.court_id
+LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ruling_count_by_court_month_idx
+ON
+ruling_count_by_court_month (court_name, hearing_month, judgement_favour);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS ruling_count_by_title_month AS
+SELECT
+    COALESCE(t.title_name, 'Unknown') AS title_name,
+    date_trunc('month', h.hearing_date)::DATE AS hearing_month,
+    COALESCE(j.judgement_favour, 'Undisclosed') AS judgement_favour,
+    COUNT(DISTINCT h.hearing_id)::INT AS hearing_count
+FROM hearing h
+LEFT JOIN judgement j ON h.judgement_id = j.judgement_id
+LEFT JOIN judge_hearing jh ON h.hearing_id = jh.hearing_id AND h.hearing_date = jh.hearing_date
+LEFT JOIN judge jd ON jh.judge_id = jd.judge_id
+LEFT JOIN title t ON jd.title_id = t.title_id
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ruling_count_by_title_month_idx
+ON
+ruling_count_by_title_month (title_name, hearing_month, judgement_favour);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS anomaly_count_by_court_month AS
+SELECT
+    COALESCE(c.court_name, 'Unknown') AS court_name,
+    date_trunc('month', h.hearing_date)::DATE AS hearing_month,
+    COUNT(*)::INT AS anomaly_count
+FROM hearing h
+LEFT JOIN court c ON h.court_id = c.court_id
+WHERE LOWER(TRIM(COALESCE(h.hearing_anomaly, ''))) <> 'none found'
+GROUP BY 1, 2;
+
+CREATE UNIQUE INDEX IF NOT EXISTS anomaly_count_by_court_month_idx
+ON
+anomaly_count_by_court_month (court_name, hearing_month);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS judge_case_count AS
+SELECT
+    judge_id,
+    COUNT(DISTINCT hearing_id)::INT AS case_count,
+    MAX(hearing_date) AS last_hearing_date
+FROM judge_hearing
+GROUP BY judge_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS judge_case_count_idx
+ON
+judge_case_count (judge_id);
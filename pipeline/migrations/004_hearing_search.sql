@@ -0,0 +1,58 @@
+-- migrate:no-transaction
+-- Full-text search over hearing titles, summaries & anomalies (see database/schema.sql).
+-- A plain column kept up to date by a trigger, so adding it doesn't rewrite hearing; existing
+-- hearings are filled in in batches, each committed, so hearing stays writable while they are.
+-- Building the index blocks writes (not reads) to hearing, as partitioned tables can't be
+-- indexed CONCURRENTLY. Safe to re-run if it fails part way through.
+
+CREATE OR REPLACE FUNCTION get_hearing_search(title TEXT, description TEXT, anomaly TEXT)
+RETURNS TSVECTOR AS $$
+    SELECT
+        setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(description, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(anomaly, '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION set_hearing_search()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.hearing_search := get_hearing_search(
+        NEW.hearing_title, NEW.hearing_description, NEW.hearing_anomaly);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE hearing
+ADD COLUMN IF NOT EXISTS hearing_search TSVECTOR;
+
+DROP TRIGGER IF EXISTS hearing_search_trigger ON hearing;
+
+CREATE TRIGGER hearing_search_trigger
+BEFORE INSERT OR UPDATE OF hearing_title, hearing_description, hearing_anomaly ON hearing
+FOR EACH ROW EXECUTE FUNCTION set_hearing_search();
+
+-- Hearings inserted from now on are searchable, so only those before need filling in
+DO $$
+DECLARE
+    batch_size CONSTANT INT := 5000;
+    batch_start BIGINT;
+    last_id BIGINT;
+BEGIN
+    SELECT MIN(hearing_id), MAX(hearing_id)
+    INTO batch_start, last_id
+    FROM hearing
+    WHERE hearing_search IS NULL;
+    WHILE batch_start <= last_id LOOP
+        UPDATE hearing
+        SET hearing_search = get_hearing_search(
+            hearing_title, hearing_description, hearing_anomaly)
+        WHERE hearing_id >= batch_start AND hearing_id < batch_start + batch_size
+        AND hearing_search IS NULL;
+        COMMIT;
+        batch_start := batch_start + batch_size;
+    END LOOP;
+END $$;
+
+CREATE INDEX IF NOT EXISTS hearing_search_idx
+ON
+hearing USING GIN (hearing_search);
@@ -0,0 +1,17 @@
+-- Fuzzy (trigram) search of judge names (see database/schema.sql).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE judge
+ADD COLUMN IF NOT EXISTS judge_name TEXT GENERATED ALWAYS AS (
+    TRIM(regexp_replace(LOWER(COALESCE(first_name, '') || ' ' || COALESCE(middle_name, '') || ' ' || last_name),
+                   '\s+', ' ', 'g'))
+) STORED;
+
+CREATE INDEX IF NOT EXISTS judge_name_trgm_idx
+ON
+judge USING GIN (judge_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS judge_last_name_trgm_idx
+ON
+judge USING GIN (LOWER(last_name) gin_trgm_ops);
@@ -0,0 +1,17 @@
+-- The data version & the dashboard's shared cache keyed by it (see database/schema.sql).
+
+CREATE TABLE IF NOT EXISTS data_version (
+    single_row BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (single_row),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version DEFAULT VALUES
+ON CONFLICT (single_row) DO NOTHING;
+
+CREATE UNLOGGED TABLE IF NOT EXISTS dashboard_cache (
+    cache_key TEXT PRIMARY KEY,
+    data_version BIGINT NOT NULL,
+    cache_value BYTEA NOT NULL,
+    cached_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,11 @@
+-- Judges' pre-rendered word clouds (see database/schema.sql).
+-- Run `python word_clouds.py --all` afterwards to render them for judges already loaded.
+
+CREATE TABLE IF NOT EXISTS judge_word_cloud (
+    judge_id BIGINT PRIMARY KEY REFERENCES judge (judge_id),
+    term_frequencies JSONB NOT NULL,
+    word_cloud_png BYTEA NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE judge_word_cloud ALTER COLUMN word_cloud_png SET STORAGE EXTERNAL;
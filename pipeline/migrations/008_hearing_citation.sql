@@ -0,0 +1,33 @@
+-- A registry of hearing citations (see database/schema.sql), which keeps each citation to one
+-- hearing now that hearing's unique constraints must include hearing_date.
+-- Any citation loaded more than once since migration 002 keeps only its first hearing.
+
+CREATE TABLE IF NOT EXISTS hearing_citation (
+    hearing_citation VARCHAR(50) PRIMARY KEY,
+    hearing_id BIGINT NOT NULL,
+    hearing_date TIMESTAMP NOT NULL,
+    FOREIGN KEY (hearing_id, hearing_date) REFERENCES hearing (hearing_id, hearing_date)
+        ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED
+);
+
+CREATE TEMPORARY TABLE duplicate_hearing ON COMMIT DROP AS
+SELECT hearing_id, hearing_date
+FROM (
+    SELECT
+        hearing_id,
+        hearing_date,
+        ROW_NUMBER() OVER (PARTITION BY hearing_citation ORDER BY hearing_id) AS copy
+    FROM hearing
+) copies
+WHERE copy > 1;
+
+DELETE FROM judge_hearing
+WHERE (hearing_id, hearing_date) IN (SELECT hearing_id, hearing_date FROM duplicate_hearing);
+
+DELETE FROM hearing
+WHERE (hearing_id, hearing_date) IN (SELECT hearing_id, hearing_date FROM duplicate_hearing);
+
+INSERT INTO hearing_citation (hearing_citation, hearing_id, hearing_date)
+SELECT hearing_citation, hearing_id, hearing_date
+FROM hearing
+ON CONFLICT (hearing_citation) DO NOTHING;
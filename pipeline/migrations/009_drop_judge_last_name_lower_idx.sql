@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- Drops the index on LOWER(last_name) added by 001: the loader now matches judges by trigram
+-- similarity (judge_last_name_trgm_idx, from 005), so no query uses it (see database/schema.sql).
+
+DROP INDEX CONCURRENTLY IF EXISTS judge_last_name_lower_idx;
@@ -0,0 +1 @@
+../common/rds_pool.py
\ No newline at end of file
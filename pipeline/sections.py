@@ -0,0 +1,60 @@
+"""Stores every parsed heading -> text section of a transcript, compressed,
+in the `hearing_section` table.
+
+Keeping the sections means summaries can be re-run with new prompts or models, and search
+indexes or analytics built, without re-downloading and re-parsing the XML corpus.
+"""
+
+import logging
+import zlib
+
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor, execute_values
+
+COMPRESSION_LEVEL = 6
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def compress_text(text: str) -> bytes:
+    """Compresses `text` for storage."""
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress_text(data: bytes) -> str:
+    """Reverses `compress_text`."""
+    return zlib.decompress(bytes(data)).decode("utf-8")
+
+
+def save_sections(conn: connection, citation: str, sections: dict[str, str]) -> None:
+    """Stores the sections of a transcript in order,
+    replacing any previously stored for `citation`."""
+    rows = [(citation, order, heading, compress_text(text))
+            for order, (heading, text) in enumerate(sections.items())]
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM hearing_section WHERE hearing_citation = %s;", (citation,))
+        if rows:
+            query = """
+            INSERT INTO hearing_section
+            (hearing_citation, section_order, section_heading, section_content)
+            VALUES %s;
+            """
+            execute_values(cur, query, rows)
+        conn.commit()
+    logging.info("Stored %s sections for %s", len(rows), citation)
+
+
+def get_sections(conn: connection, citation: str) -> dict[str, str]:
+    """Returns the stored sections of a transcript,
+    as a {heading: text} dictionary in document order."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+        SELECT section_heading, section_content
+        FROM hearing_section
+        WHERE hearing_citation = %s
+        ORDER BY section_order;
+        """
+        cur.execute(query, (citation,))
+        rows = cur.fetchall()
+    return {row["section_heading"]: decompress_text(row["section_content"]) for row in rows}
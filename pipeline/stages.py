@@ -0,0 +1,180 @@
+"""Bounded-queue stages for running the ETL as a pipeline of concurrent producers & consumers.
+
+Each stage reads items from an input queue, and puts whatever its function returns
+onto an output queue. When the input is exhausted, a STOP marker is passed downstream
+so the next stage knows to finish once it has drained its own queue.
+
+An item which fails is logged and skipped, unless its error is one of a `Failure`'s
+fatal errors: then the failure is recorded, the feed stops, every stage drains its
+queue without processing anything more, and the error can be re-raised once they finish.
+"""
+
+import logging
+import threading
+from queue import Queue
+from typing import Callable, Iterable, Optional
+
+STOP = object()
+
+
+class Failure:
+    """Records the first fatal error raised by any stage of a pipeline, so all of them stop."""
+
+    def __init__(self, fatal_errors: tuple[type[BaseException], ...] = ()):
+        self.fatal_errors = fatal_errors
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def failed(self) -> bool:
+        """Returns whether a fatal error has been recorded."""
+        return self.error is not None
+
+    def record(self, error: BaseException) -> bool:
+        """Records `error` if it's fatal (and the first to be), returning whether it's fatal."""
+        if not isinstance(error, self.fatal_errors):
+            return False
+        with self._lock:
+            if self.error is None:
+                self.error = error
+        return True
+
+    def abort(self, error: BaseException) -> None:
+        """Records `error`, fatal or not, so every stage stops (unless one was recorded first)."""
+        with self._lock:
+            if self.error is None:
+                self.error = error
+
+    def raise_error(self) -> None:
+        """Re-raises the recorded fatal error, if there is one."""
+        if self.error is not None:
+            raise self.error
+
+
+def feed_queue(items: Iterable, out_queue: Queue, failure: Optional[Failure] = None) -> None:
+    """Puts every item onto `out_queue`, followed by STOP. Blocks while the queue is full.
+    Stops early if `failure` has failed. If producing the items raises, the error is recorded
+    with `failure`, so the stages stop, and re-raised; STOP is always put."""
+    try:
+        for item in items:
+            if failure is not None and failure.failed:
+                break
+            out_queue.put(item)
+    except BaseException as error:
+        if failure is not None:
+            failure.abort(error)
+        raise
+    finally:
+        out_queue.put(STOP)
+
+
+def drain_queue(in_queue: Queue) -> list:
+    """Collects items from `in_queue` until STOP is received."""
+    items = []
+    while (item := in_queue.get()) is not STOP:
+        items.append(item)
+    return items
+
+
+def _handle_error(error: Exception, failure: Optional[Failure], message: str, *args) -> None:
+    """Records `error` with `failure` if it's fatal,
+    otherwise logs it so the item can be skipped."""
+    if failure is not None and failure.record(error):
+        logging.error("%s: %s, stopping the pipeline", message % args, error)
+    else:
+        # One bad transcript should not bring down the whole run
+        logging.exception("%s, skipping", message % args)
+
+
+def _run_worker(func: Callable, in_queue: Queue, out_queue: Queue, name: str,
+                failure: Optional[Failure] = None) -> None:
+    """Applies `func` to each item from `in_queue`, until STOP is received.
+    Once `failure` has failed, items are only drained."""
+    while (item := in_queue.get()) is not STOP:
+        if failure is not None and failure.failed:
+            continue
+        try:
+            results = func(item)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            _handle_error(error, failure, "[%s] Failed to process item", name)
+            continue
+        for result in results or []:
+            out_queue.put(result)
+    # Put STOP back so that sibling workers also see it
+    in_queue.put(STOP)
+
+
+def _run_batch_worker(func: Callable, in_queue: Queue, out_queue: Queue,
+                      batch_size: int, name: str, failure: Optional[Failure] = None) -> None:
+    """Applies `func` to lists of up to `batch_size` items from `in_queue`, until STOP is received.
+    Once `failure` has failed, items are only drained."""
+    finished = False
+    while not finished:
+        batch = []
+        while len(batch) < batch_size:
+            item = in_queue.get()
+            if item is STOP:
+                finished = True
+                break
+            batch.append(item)
+        if not batch or (failure is not None and failure.failed):
+            continue
+        try:
+            results = func(batch)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            _handle_error(error, failure, "[%s] Failed to process batch of %s", name, len(batch))
+            continue
+        for result in results or []:
+            out_queue.put(result)
+
+
+def _supervise(workers: list[threading.Thread], out_queue: Queue) -> None:
+    """Waits for all `workers` to finish, then signals the next stage to stop."""
+    for worker in workers:
+        worker.join()
+    out_queue.put(STOP)
+
+
+def start_stage(func: Callable, in_queue: Queue, out_queue: Queue,
+                workers: int = 1, name: str = "stage",
+                failure: Optional[Failure] = None) -> threading.Thread:
+    """
+    Starts `workers` threads which each take an item from `in_queue` and put
+    every result of `func(item)` (an iterable, possibly empty) onto `out_queue`.
+    Returns a thread which finishes once the whole stage has finished.
+    """
+    if workers < 1:
+        raise ValueError("workers must be a value greater than 0")
+    threads = [threading.Thread(target=_run_worker,
+                                args=(func, in_queue, out_queue, name, failure),
+                                name=f"{name}-{i}", daemon=True)
+               for i in range(workers)]
+    return _start_supervisor(threads, out_queue, name)
+
+
+def start_batch_stage(func: Callable, in_queue: Queue, out_queue: Queue,
+                      batch_size: int, name: str = "stage",
+                      failure: Optional[Failure] = None) -> threading.Thread:
+    """
+    Starts a thread which groups items from `in_queue` into lists of up to `batch_size`,
+    and puts every result of `func(batch)` onto `out_queue`.
+    Returns a thread which finishes once the whole stage has finished.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a value greater than 0")
+    thread = threading.Thread(target=_run_batch_worker,
+                              args=(func, in_queue, out_queue, batch_size, name, failure),
+                              name=f"{name}-0", daemon=True)
+    return _start_supervisor([thread], out_queue, name)
+
+
+def _start_supervisor(threads: list[threading.Thread], out_queue: Queue,
+                      name: str) -> threading.Thread:
+    """Starts `threads` along with a supervisor thread
+    which stops the next stage once they finish."""
+    for thread in threads:
+        thread.start()
+    supervisor = threading.Thread(target=_supervise, args=(threads, out_queue),
+                                  name=f"{name}-supervisor", daemon=True)
+    supervisor.start()
+    return supervisor
@@ -0,0 +1,44 @@
+# pylint: skip-file
+
+"""Tests for publishing loaded hearings to the dashboard."""
+
+from unittest.mock import MagicMock, patch
+
+from analytics import ANALYTICS_VIEWS, refresh_analytics_views, bump_data_version, publish_changes
+
+
+def test_refresh_analytics_views():
+    """Check every view is refreshed concurrently, committing after each."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    refresh_analytics_views(conn)
+    executed = [call[0][0] for call in cur.execute.call_args_list]
+    assert executed == [f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};" for view in ANALYTICS_VIEWS]
+    assert conn.commit.call_count == len(ANALYTICS_VIEWS)
+
+
+def test_bump_data_version():
+    """Check the bumped version is returned, and results cached for older ones dropped."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = (8,)
+    assert bump_data_version(conn) == 8
+    assert cur.execute.call_args_list[1][0][1] == (8,)
+    conn.commit.assert_called_once()
+
+
+def test_publish_changes_only_after_loads():
+    """Check the views, word clouds & data version are left alone by runs which loaded no hearings."""
+    conn = MagicMock()
+    with patch("analytics.load.pop_hearings_loaded", side_effect=[0, 3]), \
+            patch("analytics.load.pop_loaded_judge_ids", side_effect=[set(), {4, 5}]), \
+            patch("analytics.refresh_analytics_views") as mock_refresh, \
+            patch("analytics.word_clouds.update_word_clouds") as mock_word_clouds, \
+            patch("analytics.bump_data_version") as mock_bump:
+        publish_changes(conn)
+        mock_refresh.assert_not_called()
+        mock_bump.assert_not_called()
+        publish_changes(conn)
+    mock_refresh.assert_called_once_with(conn)
+    mock_word_clouds.assert_called_once_with(conn, {4, 5})
+    mock_bump.assert_called_once_with(conn)
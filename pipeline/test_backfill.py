@@ -0,0 +1,193 @@
+# pylint: skip-file
+
+"""Tests for backfill sharding and the backfill queue.
+
+The queue is tested against its exact SQL, and, where the PostgreSQL server binaries are
+installed, against an ephemeral PostgreSQL server.
+"""
+
+import os
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+
+from backfill import (
+    CLAIMED,
+    CLAIM_TIMEOUT_MINUTES,
+    DONE,
+    PENDING,
+    claim_entries,
+    get_shard_dates,
+    mark_entries_done,
+    register_entries
+)
+from benchmarks import ephemeral_db
+
+ENTRIES = [("R v Smith", "uri-1", "https://example.com/1.xml"),
+           ("R v Jones", "uri-2", "https://example.com/2.xml"),
+           ("R v Brown", "uri-3", "https://example.com/3.xml")]
+
+
+def normalise(query: str) -> str:
+    return " ".join(query.split())
+
+
+def test_get_shard_dates_are_disjoint_and_complete():
+    """Check every day in the range belongs to exactly one shard."""
+    start, end = date(2024, 1, 1), date(2024, 3, 31)
+    shards = [get_shard_dates(start, end, 4, i) for i in range(4)]
+    all_days = [day for shard in shards for day in shard]
+    assert len(all_days) == len(set(all_days)) == 91
+    assert min(all_days) == start and max(all_days) == end
+
+
+def test_get_shard_dates_single_shard():
+    """Check a single shard covers the whole range in order."""
+    days = get_shard_dates(date(2024, 1, 1), date(2024, 1, 3), 1, 0)
+    assert days == [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)]
+
+
+@pytest.mark.parametrize("shards, shard_index", [(0, 0), (2, 2), (2, -1)])
+def test_get_shard_dates_rejects_bad_shards(shards, shard_index):
+    """Check invalid shard numbers are rejected."""
+    with pytest.raises(ValueError):
+        get_shard_dates(date(2024, 1, 1), date(2024, 1, 3), shards, shard_index)
+
+
+def test_get_shard_dates_rejects_reversed_range():
+    """Check the end date cannot be before the start date."""
+    with pytest.raises(ValueError):
+        get_shard_dates(date(2024, 1, 3), date(2024, 1, 1), 1, 0)
+
+
+
+def test_register_entries_sql():
+    """Check entries with an XML are inserted for the shard, skipping registered ones."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    with patch("backfill.execute_values") as execute_values:
+        register_entries(conn, ENTRIES[:2] + [("No XML", "uri-4", None)], 3)
+    query, rows = execute_values.call_args.args[1:]
+    assert execute_values.call_args.args[0] is cur
+    assert normalise(query) == normalise("""
+        INSERT INTO backfill_entry (entry_uri, entry_title, xml_url, shard_index)
+        VALUES %s
+        ON CONFLICT (entry_uri) DO NOTHING;
+    """)
+    assert rows == [("uri-1", "R v Smith", "https://example.com/1.xml", 3),
+                    ("uri-2", "R v Jones", "https://example.com/2.xml", 3)]
+    conn.commit.assert_called_once()
+
+
+def test_register_entries_nothing_to_register():
+    """Check entries without an XML don't touch the DB."""
+    conn = MagicMock()
+    register_entries(conn, [("No XML", "uri-4", None)], 0)
+    conn.cursor.assert_not_called()
+
+
+def test_claim_entries_sql():
+    """Check a claim skips locked rows and takes pending or stale claimed ones of the shard."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [{"entry_uri": "uri-1"}]
+    assert claim_entries(conn, 2, 5) == [{"entry_uri": "uri-1"}]
+    query, params = cur.execute.call_args.args
+    assert normalise(query) == normalise("""
+        UPDATE backfill_entry
+        SET status = %s, claimed_at = NOW()
+        WHERE entry_uri IN (
+            SELECT entry_uri
+            FROM backfill_entry
+            WHERE shard_index = %s
+            AND (
+                status = %s
+                OR (status = %s AND claimed_at < NOW() - make_interval(mins => %s))
+            )
+            ORDER BY entry_uri
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING entry_uri, entry_title, xml_url;
+    """)
+    assert params == (CLAIMED, 2, PENDING, CLAIMED, CLAIM_TIMEOUT_MINUTES, 5)
+    conn.commit.assert_called_once()
+
+
+@pytest.fixture(scope="module")
+def backfill_db():
+    """Points the DB_* env vars at a fresh DB on an ephemeral PostgreSQL server."""
+    try:
+        ephemeral_db.find_binary("initdb")
+    except FileNotFoundError as e:
+        pytest.skip(str(e))
+    with patch.dict(os.environ), ephemeral_db.ephemeral_postgres():
+        ephemeral_db.reset_database()
+        yield
+
+
+@pytest.fixture
+def connect(backfill_db):
+    """Opens connections to the ephemeral DB, emptying the backfill queue first."""
+    conns = []
+
+    def make_connection():
+        conn = psycopg2.connect(dbname=os.environ["DB_NAME"], host=os.environ["DB_HOST"],
+                                port=os.environ["DB_PORT"], user=os.environ["DB_USERNAME"])
+        conns.append(conn)
+        return conn
+
+    with make_connection() as conn, conn.cursor() as cur:
+        cur.execute("TRUNCATE backfill_entry;")
+    yield make_connection
+    for conn in conns:
+        conn.close()
+
+
+def test_register_entries_twice(connect):
+    """Check registering an entry again leaves it, and its progress, alone."""
+    conn = connect()
+    register_entries(conn, ENTRIES[:2], 0)
+    mark_entries_done(conn, ["uri-1"])
+    register_entries(conn, ENTRIES, 0)
+    with conn.cursor() as cur:
+        cur.execute("SELECT entry_uri, status FROM backfill_entry ORDER BY entry_uri;")
+        assert cur.fetchall() == [("uri-1", DONE), ("uri-2", PENDING), ("uri-3", PENDING)]
+
+
+def test_claim_entries_skips_locked(connect):
+    """Check a claim skips entries locked by another worker, and never claims one twice."""
+    conn, other_conn = connect(), connect()
+    register_entries(conn, ENTRIES, 0)
+    with other_conn.cursor() as cur:
+        cur.execute("SELECT * FROM backfill_entry WHERE entry_uri = 'uri-1' FOR UPDATE;")
+    claimed = claim_entries(conn, 0, 2)
+    other_conn.rollback()
+    assert sorted(entry["entry_uri"] for entry in claimed) == ["uri-2", "uri-3"]
+    assert sorted(entry["entry_uri"] for entry in claim_entries(conn, 0, 2)) == ["uri-1"]
+    assert claim_entries(conn, 0, 2) == []
+
+
+def test_claim_entries_reclaims_stale(connect):
+    """Check only claims older than the timeout are claimed again."""
+    conn = connect()
+    register_entries(conn, ENTRIES[:2], 0)
+    claim_entries(conn, 0, 2)
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE backfill_entry
+            SET claimed_at = NOW() - make_interval(mins => %s)
+            WHERE entry_uri = 'uri-1';
+        """, (CLAIM_TIMEOUT_MINUTES + 1,))
+    conn.commit()
+    assert sorted(entry["entry_uri"] for entry in claim_entries(conn, 0, 2)) == ["uri-1"]
+
+
+def test_claim_entries_by_shard(connect):
+    """Check a claim only takes its own shard's entries."""
+    conn = connect()
+    register_entries(conn, ENTRIES[:1], 0)
+    register_entries(conn, ENTRIES[1:], 1)
+    assert sorted(entry["entry_uri"] for entry in claim_entries(conn, 1, 5)) == ["uri-2", "uri-3"]
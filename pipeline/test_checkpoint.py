@@ -0,0 +1,64 @@
+# pylint: skip-file
+
+"""Tests for ETL transcript checkpoints."""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from checkpoint import (
+    PARSED,
+    SUMMARISED,
+    serialise_metadata,
+    deserialise_metadata,
+    save_checkpoint,
+    get_checkpointed_citations,
+    get_citations_at
+)
+
+
+def test_metadata_round_trip():
+    """Check metadata survives being stored as JSON."""
+    metadata = {"citation": "[2025] UKPC 47",
+                "verdict_date": datetime(2025, 9, 30),
+                "judges": ["Lord Briggs"]}
+    serialised = serialise_metadata(metadata)
+    assert serialised["verdict_date"] == "2025-09-30T00:00:00"
+    assert deserialise_metadata(serialised) == metadata
+
+
+def test_serialise_metadata_does_not_modify_original():
+    """Check serialising leaves the original metadata untouched."""
+    metadata = {"citation": "x", "verdict_date": datetime(2025, 9, 30)}
+    serialise_metadata(metadata)
+    assert isinstance(metadata["verdict_date"], datetime)
+
+
+def test_save_checkpoint_rejects_unknown_stage():
+    """Check only known stages can be checkpointed."""
+    conn = MagicMock()
+    with pytest.raises(ValueError):
+        save_checkpoint(conn, {"citation": "x"}, "fetched")
+    conn.cursor.assert_not_called()
+
+
+def test_get_citations_at():
+    """Check only citations at the given stage are returned."""
+    checkpoints = {"a": {"stage": PARSED}, "b": {"stage": SUMMARISED}, "c": {"stage": PARSED}}
+    assert get_citations_at(checkpoints, PARSED) == ["a", "c"]
+
+
+def test_get_checkpointed_citations():
+    """Check citations are looked up at any stage, with no query for no citations."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [("[2025] UKPC 47",)]
+    assert get_checkpointed_citations(conn, ["[2025] UKPC 47", "[2025] UKSC 1"]) == {"[2025] UKPC 47"}
+    query, params = cur.execute.call_args.args
+    assert "stage" not in query
+    assert params == (["[2025] UKPC 47", "[2025] UKSC 1"],)
+
+    cur.execute.reset_mock()
+    assert get_checkpointed_citations(conn, []) == set()
+    cur.execute.assert_not_called()
@@ -0,0 +1,89 @@
+# pylint: skip-file
+
+"""Tests for the compressed transcript corpus store."""
+
+import pytest
+
+from corpus_store import CorpusStore, get_digest, INDEX_FILENAME
+
+XML = "<akomaNtoso>" + "<p>The appellant submits that the judge erred.</p>" * 100 + "</akomaNtoso>"
+OTHER_XML = "<akomaNtoso><p>Another judgment.</p></akomaNtoso>"
+
+
+def test_put_and_get(tmp_path):
+    """Check XMLs can be read back by digest and by citation."""
+    with CorpusStore(tmp_path) as store:
+        digest = store.put(XML, "[2025] UKPC 47")
+        store.put(OTHER_XML, "[2025] UKSC 1")
+        assert store.get(digest) == XML
+        assert store.get_by_citation("[2025] UKSC 1") == OTHER_XML
+
+
+def test_put_is_content_addressed(tmp_path):
+    """Check the same XML is only stored once."""
+    with CorpusStore(tmp_path) as store:
+        first = store.put(XML, "[2025] UKPC 47")
+        second = store.put(XML, "[2025] UKPC 47")
+        assert first == second == get_digest(XML)
+        assert len(store) == 1
+        assert len((tmp_path / INDEX_FILENAME).read_text().splitlines()) == 1
+
+
+def test_xml_compressed(tmp_path):
+    """Check stored XMLs take less space than the raw XML."""
+    with CorpusStore(tmp_path) as store:
+        store.put(XML)
+        stats = store.get_stats()
+    assert stats["compressed_bytes"] < stats["raw_bytes"] == len(XML)
+
+
+def test_store_reopened(tmp_path):
+    """Check a store can be reopened, and written to again."""
+    with CorpusStore(tmp_path) as store:
+        store.put(XML, "[2025] UKPC 47")
+    with CorpusStore(tmp_path) as store:
+        store.put(OTHER_XML, "[2025] UKSC 1")
+        assert store.get_by_citation("[2025] UKPC 47") == XML
+        assert store.get_by_citation("[2025] UKSC 1") == OTHER_XML
+
+
+def test_reopened_with_partly_written_index(tmp_path):
+    """Check a partly written index line (e.g. after a crash) is skipped."""
+    with CorpusStore(tmp_path) as store:
+        store.put(XML, "[2025] UKPC 47")
+    with open(tmp_path / INDEX_FILENAME, "a") as index:
+        index.write('{"digest": "abc", "offs')
+    with CorpusStore(tmp_path) as store:
+        assert len(store) == 1
+
+
+def test_written_after_partly_written_index(tmp_path):
+    """Check records written after a partly written index line aren't lost with it."""
+    with CorpusStore(tmp_path) as store:
+        store.put(XML, "[2025] UKPC 47")
+    with open(tmp_path / INDEX_FILENAME, "a") as index:
+        index.write('{"digest": "abc", "offs')
+    with CorpusStore(tmp_path) as store:
+        store.put(OTHER_XML, "[2025] UKSC 1")
+    with CorpusStore(tmp_path) as store:
+        assert store.get_by_citation("[2025] UKSC 1") == OTHER_XML
+        assert len(store) == 2
+
+
+def test_shared_by_several_writers(tmp_path):
+    """Check stores open on the same directory see each other's writes, and never store an XML twice."""
+    with CorpusStore(tmp_path) as first, CorpusStore(tmp_path) as second:
+        first.put(XML, "[2025] UKPC 47")
+        second.put(OTHER_XML, "[2025] UKSC 1")
+        second.put(XML, "[2025] UKPC 47")
+        assert len(second) == 2
+        assert first.get_by_citation("[2025] UKSC 1") == OTHER_XML
+        assert second.get_by_citation("[2025] UKPC 47") == XML
+    assert len((tmp_path / INDEX_FILENAME).read_text().splitlines()) == 2
+
+
+def test_unknown_citation(tmp_path):
+    """Check a KeyError is raised for citations not in the store."""
+    with CorpusStore(tmp_path) as store:
+        with pytest.raises(KeyError):
+            store.get_by_citation("[2025] UKSC 1")
@@ -0,0 +1,115 @@
+# pylint: skip-file
+
+"""Tests for the per-stage timing & throughput instrumentation."""
+
+import json
+import logging
+
+import pytest
+from psycopg2.extensions import cursor
+
+import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def reset_totals():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+def test_span_records_counters():
+    """Check items, bytes and DB round trips are recorded against the span."""
+    with instrumentation.span("fetch") as span:
+        instrumentation.add_items(3)
+        instrumentation.add_bytes(1024)
+        instrumentation.add_db_round_trip()
+    assert (span.items, span.bytes, span.db_round_trips) == (3, 1024, 1)
+    assert span.seconds >= 0
+
+
+def test_counters_outside_span_are_ignored():
+    """Check counting with no open span is a no-op."""
+    instrumentation.add_items(5)
+    assert instrumentation.get_stage_totals() == {}
+
+
+def test_nested_spans_both_count():
+    """Check counters are added to every open span."""
+    with instrumentation.span("outer") as outer:
+        with instrumentation.span("inner") as inner:
+            instrumentation.add_items(2)
+        instrumentation.add_items()
+    assert inner.items == 2
+    assert outer.items == 3
+
+
+def test_span_logs_json(caplog):
+    """Check a finished span is logged as a JSON line."""
+    with caplog.at_level(logging.INFO):
+        with instrumentation.span("parse"):
+            instrumentation.add_items(4)
+    logged = json.loads(caplog.records[-1].getMessage())
+    assert logged["span"] == "parse"
+    assert logged["items"] == 4
+
+
+def test_span_not_logged(caplog):
+    """Check spans with log=False are only counted in the totals."""
+    with caplog.at_level(logging.INFO):
+        with instrumentation.span("parse", log=False):
+            pass
+    assert not caplog.records
+    assert instrumentation.get_stage_totals()["parse"]["calls"] == 1
+
+
+def test_span_recorded_on_error():
+    """Check a span is still recorded when its block raises."""
+    with pytest.raises(ValueError):
+        with instrumentation.span("load"):
+            raise ValueError
+    assert instrumentation.get_stage_totals()["load"]["calls"] == 1
+
+
+def test_timed_totals_across_calls():
+    """Check repeated calls of a timed function are totalled per stage."""
+    @instrumentation.timed("load", log=False)
+    def load(count):
+        instrumentation.add_items(count)
+        return count
+
+    assert load(2) == 2
+    load(3)
+    totals = instrumentation.get_stage_totals()["load"]
+    assert totals["calls"] == 2
+    assert totals["items"] == 5
+
+
+def test_format_summary():
+    """Check the summary table has a row per stage."""
+    table = instrumentation.format_summary({
+        "fetch": {"calls": 1, "seconds": 2.0, "items": 10,
+                  "bytes": 2_000_000, "db_round_trips": 4}
+    })
+    row = table.splitlines()[-1].split()
+    assert row == ["fetch", "1", "2.00", "10", "5.00", "2.00", "4"]
+
+
+def test_counting_cursor_class_is_cached():
+    """Check each cursor class is only wrapped once."""
+    first = instrumentation._get_counting_cursor_class(cursor)
+    assert first is instrumentation._get_counting_cursor_class(cursor)
+    assert issubclass(first, cursor)
+
+
+def test_counting_cursor_counts_execute():
+    """Check executing a statement counts as a round trip."""
+    class FakeCursor:
+        def execute(self, query, params=None):
+            return "executed"
+
+    counting = type("CountingFakeCursor",
+                    (instrumentation.CountingCursorMixin, FakeCursor), {})()
+    with instrumentation.span("load") as span:
+        assert counting.execute("SELECT 1;") == "executed"
+    assert span.db_round_trips == 1
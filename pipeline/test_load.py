@@ -0,0 +1,122 @@
+# pylint: skip-file
+
+"""Tests for loading hearings: their monthly partitions, and matching their judges."""
+
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import load
+from load import get_partition_month, add_months, ensure_hearing_partition, create_future_partitions
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    load._partitioned_months.clear()
+    load._judge_index = None
+    yield
+    load._partitioned_months.clear()
+    load._judge_index = None
+
+
+def test_get_partition_month():
+    """Check datetimes & ISO strings from checkpoints both map to the first of their month."""
+    assert get_partition_month(datetime(2025, 3, 17, 12)) == date(2025, 3, 1)
+    assert get_partition_month("2025-03-17") == date(2025, 3, 1)
+    assert get_partition_month("2025-03-17 00:00:00") == date(2025, 3, 1)
+
+
+def test_add_months_over_year_end():
+    """Check adding months rolls over into the next year."""
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), 0) == date(2025, 1, 1)
+
+
+def test_ensure_hearing_partition_checked_once():
+    """Check each month's partition is only checked with the DB once per process."""
+    with patch("load.create_hearing_partitions", return_value=1) as mock_create:
+        ensure_hearing_partition(MagicMock(), datetime(2025, 3, 17))
+        ensure_hearing_partition(MagicMock(), "2025-03-02")
+        ensure_hearing_partition(MagicMock(), "2025-04-02")
+    assert [call.args[1] for call in mock_create.call_args_list] == [
+        date(2025, 3, 1), date(2025, 4, 1)]
+
+
+def test_create_future_partitions():
+    """Check partitions are created from this month to `months_ahead` months on."""
+    conn = MagicMock()
+    with patch("load.create_hearing_partitions", return_value=2) as mock_create, \
+            patch("load.date") as mock_date:
+        mock_date.today.return_value = date(2025, 12, 15)
+        mock_date.side_effect = date
+        assert create_future_partitions(conn, months_ahead=2) == 2
+    mock_create.assert_called_once_with(conn, date(2025, 12, 1), date(2026, 2, 1))
+
+
+def test_hearing_without_date_skipped():
+    """Check hearings without a date aren't loaded, as they have no partition, and are
+    reported as not done, so they're tried again."""
+    conn = MagicMock()
+    metadata = {"judges": ["Lord Briggs"], "court": "Supreme Court", "verdict_date": None}
+    with patch("load.get_judgement_id", return_value=1), \
+            patch("load.check_judge_exists") as mock_check_judges:
+        assert not load.insert_into_hearing(conn, {"ruling": "Plaintiff"}, metadata)
+    mock_check_judges.assert_not_called()
+
+
+@pytest.mark.parametrize("registered, loaded", [({"hearing_id": 7}, True), (None, False)])
+def test_hearing_citation_registered(registered, loaded):
+    """Check a hearing is only inserted, with its judges, if its citation wasn't registered."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = registered
+    metadata = {"judges": ["Lord Briggs"], "court": "Supreme Court", "citation": "[2025] UKSC 1",
+                "verdict_date": datetime(2025, 3, 17), "title": "R v Smith", "url": "url"}
+    hearing = {"ruling": "Plaintiff", "summary": "Summary", "anomaly": "None"}
+    with patch("load.get_judgement_id", return_value=1), \
+            patch("load.check_judge_exists", return_value=[3]), \
+            patch("load.get_court_id", return_value=2), \
+            patch("load.ensure_hearing_partition"), \
+            patch("load.insert_into_judge_hearing") as mock_judge_hearing:
+        load.insert_into_hearing(conn, hearing, metadata)
+    query, params = cur.execute.call_args.args
+    assert "INSERT INTO hearing_citation" in query
+    assert "ON CONFLICT (hearing_citation) DO NOTHING" in query
+    assert params[:2] == ("[2025] UKSC 1", datetime(2025, 3, 17))
+    assert mock_judge_hearing.called == loaded
+    load.pop_hearings_loaded()
+    load.pop_loaded_judge_ids()
+
+
+def test_insert_judges_returns_existing_judge_id():
+    """Check a judge who is already stored still has their ID returned."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = (42,)
+    with patch("load.get_title_id", return_value=1):
+        assert load.insert_judges(conn, ["Lord Briggs"]) == [42]
+    query = cur.execute.call_args.args[0]
+    assert "DO UPDATE SET last_name = EXCLUDED.last_name" in query
+    assert "RETURNING judge_id" in query
+
+
+def test_is_same_judge():
+    """Check close spellings are taken, but only if their first initials agree."""
+    assert load.is_same_judge({"first_name": "John"}, {"score": 1.0, "first_name": "J."})
+    assert not load.is_same_judge({"first_name": "John"}, {"score": 1.0, "first_name": "Mary"})
+    assert load.is_same_judge({"first_name": "John"}, {"score": 1.0, "first_name": None})
+    assert load.is_same_judge({"first_name": None}, {"score": 0.7, "first_name": "Mary"})
+    assert not load.is_same_judge({"first_name": "John"}, {"score": 0.7, "first_name": "Mary"})
+    assert not load.is_same_judge({"first_name": None}, {"score": 0.5, "first_name": None})
+
+
+def test_find_judge_falls_back_to_in_process_index():
+    """Check judges are matched in-process if the DB has no pg_trgm extension."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [{"judge_id": 7, "first_name": None, "last_name": "Briggs"}]
+    with patch("load.get_judge_candidates", side_effect=load.UndefinedFunction):
+        assert load.find_judge(conn, {"first_name": None, "last_name": "Brigs"}) == 7
+        assert load.find_judge(conn, {"first_name": None, "last_name": "Hale"}) is None
+    conn.rollback.assert_called_once()
@@ -0,0 +1,110 @@
+# pylint: skip-file
+
+"""Tests for the schema migration runner."""
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from migrate import Migration, get_migrations, split_statements, apply_migration, migrate
+
+
+def write_migration(directory, filename, sql):
+    path = directory / filename
+    path.write_text(sql)
+    return path
+
+
+def test_split_statements():
+    """Check SQL is split on semicolons, but not those in strings, dollar-quotes or comments."""
+    sql = """
+        -- a comment; with a semicolon
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS a_idx ON a (b);
+        INSERT INTO a VALUES ('it''s; fine');
+        DO $$ BEGIN PERFORM 1; END $$;
+        /* trailing; comment */
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 3
+    assert statements[0].endswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS a_idx ON a (b)")
+    assert statements[1] == "INSERT INTO a VALUES ('it''s; fine')"
+    assert statements[2] == "DO $$ BEGIN PERFORM 1; END $$"
+
+
+def test_get_migrations_ordered(tmp_path):
+    """Check migrations are ordered by version, not by filename."""
+    write_migration(tmp_path, "10_later.sql", "SELECT 1;")
+    write_migration(tmp_path, "2_earlier.sql", "SELECT 1;")
+    assert [migration.name for migration in get_migrations(tmp_path)] == ["earlier", "later"]
+
+
+def test_get_migrations_duplicate_version(tmp_path):
+    """Check two migrations can't share a version."""
+    write_migration(tmp_path, "001_a.sql", "SELECT 1;")
+    write_migration(tmp_path, "1_b.sql", "SELECT 1;")
+    with pytest.raises(ValueError):
+        get_migrations(tmp_path)
+
+
+def test_badly_named_migration(tmp_path):
+    """Check a migration must be named NNN_name.sql."""
+    with pytest.raises(ValueError):
+        Migration(write_migration(tmp_path, "indexes.sql", "SELECT 1;"))
+
+
+def test_no_transaction_directive(tmp_path):
+    """Check migrations starting with the directive run outside a transaction."""
+    assert Migration(write_migration(tmp_path, "001_a.sql", "SELECT 1;")).transactional
+    assert not Migration(write_migration(
+        tmp_path, "002_b.sql", "-- migrate:no-transaction\nSELECT 1;")).transactional
+
+
+def test_bundled_migrations_valid():
+    """Check the migrations shipped with the pipeline can be loaded and split."""
+    for migration in get_migrations():
+        if not migration.transactional:
+            assert all(split_statements(migration.sql))
+
+
+def test_apply_migration_no_transaction(tmp_path):
+    """Check no-transaction migrations run statement by statement in autocommit."""
+    migration = Migration(write_migration(
+        tmp_path, "001_a.sql", "-- migrate:no-transaction\nSELECT 1;\nSELECT 2;"))
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    apply_migration(conn, migration)
+    executed = [call[0][0] for call in cur.execute.call_args_list]
+    assert executed[:2] == ["-- migrate:no-transaction\nSELECT 1", "SELECT 2"]
+    assert "INSERT INTO schema_migration" in executed[2]
+    assert conn.autocommit is False
+
+
+def test_apply_migration_rolls_back(tmp_path):
+    """Check a failing transactional migration is rolled back, and not recorded."""
+    migration = Migration(write_migration(tmp_path, "001_a.sql", "SELECT 1;"))
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.execute.side_effect = Exception("syntax error")
+    with pytest.raises(Exception):
+        apply_migration(conn, migration)
+    conn.rollback.assert_called_once()
+    conn.commit.assert_not_called()
+
+
+def test_migrate_skips_applied(tmp_path):
+    """Check only migrations not yet applied are run."""
+    first = Migration(write_migration(tmp_path, "001_a.sql", "SELECT 1;"))
+    write_migration(tmp_path, "002_b.sql", "SELECT 2;")
+    conn = MagicMock()
+
+    @contextmanager
+    def fake_pooled_connection():
+        yield conn
+
+    with patch("migrate.pooled_connection", fake_pooled_connection), \
+            patch("migrate.get_applied", return_value={1: first.checksum}), \
+            patch("migrate.apply_migration") as mock_apply:
+        applied = migrate(tmp_path)
+    assert [migration.name for migration in applied] == ["b"]
+    mock_apply.assert_called_once()
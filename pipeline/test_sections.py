@@ -0,0 +1,43 @@
+# pylint: skip-file
+
+"""Tests for storing parsed transcript sections."""
+
+from unittest.mock import MagicMock, patch
+
+from sections import compress_text, decompress_text, save_sections, get_sections
+
+
+def test_compression_round_trip():
+    """Check text survives compression, and repetitive text shrinks."""
+    text = "The appellant submits that the judge erred in law. " * 50
+    compressed = compress_text(text)
+    assert len(compressed) < len(text)
+    assert decompress_text(compressed) == text
+
+
+def test_decompress_memoryview():
+    """Check BYTEA values, which psycopg2 returns as memoryviews, can be decompressed."""
+    assert decompress_text(memoryview(compress_text("Conclusion"))) == "Conclusion"
+
+
+def test_save_sections_keeps_order():
+    """Check sections are stored compressed, numbered in document order."""
+    conn = MagicMock()
+    with patch("sections.execute_values") as mock_execute_values:
+        save_sections(conn, "[2025] UKPC 47", {"DOC_START": "a", "The facts": "b"})
+    rows = mock_execute_values.call_args[0][2]
+    assert [(row[0], row[1], row[2]) for row in rows] == [
+        ("[2025] UKPC 47", 0, "DOC_START"), ("[2025] UKPC 47", 1, "The facts")]
+    assert decompress_text(rows[1][3]) == "b"
+    conn.commit.assert_called_once()
+
+
+def test_get_sections():
+    """Check stored sections are decompressed into a {heading: text} dictionary."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [
+        {"section_heading": "DOC_START", "section_content": compress_text("a")},
+        {"section_heading": "The facts", "section_content": compress_text("b")}
+    ]
+    assert get_sections(conn, "[2025] UKPC 47") == {"DOC_START": "a", "The facts": "b"}
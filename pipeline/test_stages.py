@@ -0,0 +1,116 @@
+# pylint: skip-file
+
+"""Tests for the bounded-queue pipeline stages."""
+
+from queue import Queue
+
+import pytest
+
+from stages import STOP, Failure, feed_queue, drain_queue, start_stage, start_batch_stage
+
+
+def test_feed_queue_ends_with_stop():
+    """Check every item is queued, followed by STOP."""
+    queue = Queue()
+    feed_queue([1, 2], queue)
+    assert [queue.get(), queue.get(), queue.get()] == [1, 2, STOP]
+
+
+def test_start_stage_processes_all_items():
+    """Check every result of every item reaches the output queue, across workers."""
+    in_queue, out_queue = Queue(maxsize=2), Queue(maxsize=2)
+    stage = start_stage(lambda x: [x, x * 10], in_queue, out_queue, workers=3)
+    feed_queue(range(5), in_queue)
+    results = drain_queue(out_queue)
+    stage.join()
+    assert sorted(results) == [0, 0, 1, 2, 3, 4, 10, 20, 30, 40]
+
+
+def test_start_stage_skips_failed_items():
+    """Check an item which raises is dropped without stopping the stage."""
+    in_queue, out_queue = Queue(), Queue()
+
+    def invert(x):
+        return [1 / x]
+
+    start_stage(invert, in_queue, out_queue, workers=2)
+    feed_queue([1, 0, 2], in_queue)
+    assert sorted(drain_queue(out_queue)) == [0.5, 1.0]
+
+
+def test_start_stage_rejects_no_workers():
+    """Check a stage must have at least one worker."""
+    with pytest.raises(ValueError):
+        start_stage(list, Queue(), Queue(), workers=0)
+
+
+def test_start_batch_stage_groups_items():
+    """Check items are grouped into batches, with a final partial batch."""
+    in_queue, out_queue = Queue(), Queue()
+    start_batch_stage(lambda batch: [batch], in_queue, out_queue, batch_size=2)
+    feed_queue(range(5), in_queue)
+    assert drain_queue(out_queue) == [[0, 1], [2, 3], [4]]
+
+
+def test_stages_chain_together():
+    """Check STOP propagates through chained stages."""
+    first, second, third = Queue(maxsize=1), Queue(maxsize=1), Queue(maxsize=1)
+    start_stage(lambda x: [x + 1], first, second, workers=2)
+    start_batch_stage(lambda batch: [sum(batch)], second, third, batch_size=10)
+    feed_queue(range(3), first)
+    assert drain_queue(third) == [6]
+
+
+def test_fatal_error_stops_pipeline():
+    """Check a fatal error stops the feed & every stage, and is recorded to be re-raised."""
+    failure = Failure((KeyboardInterrupt, LookupError))
+    first, second, third = Queue(maxsize=1), Queue(maxsize=1), Queue()
+    fetched = []
+
+    def fetch(x):
+        fetched.append(x)
+        return [x]
+
+    def summarise(batch):
+        if 2 in batch:
+            raise KeyError("budget")
+        return batch
+
+    stages = [start_stage(fetch, first, second, workers=2, failure=failure),
+              start_batch_stage(summarise, second, third, batch_size=1, failure=failure)]
+    feed_queue(range(1000), first, failure)
+    for stage in stages:
+        stage.join()
+    results = drain_queue(third)
+
+    assert isinstance(failure.error, KeyError)
+    assert 2 not in results and len(fetched) < 1000
+    with pytest.raises(KeyError):
+        failure.raise_error()
+
+
+def test_non_fatal_error_is_skipped_with_failure():
+    """Check errors which aren't fatal are still only skipped."""
+    failure = Failure((KeyError,))
+    in_queue, out_queue = Queue(), Queue()
+    start_stage(lambda x: [1 / x], in_queue, out_queue, failure=failure)
+    feed_queue([1, 0, 2], in_queue, failure)
+    assert sorted(drain_queue(out_queue)) == [0.5, 1.0]
+    assert not failure.failed
+
+
+def test_failing_feed_stops_pipeline():
+    """Check a feed which raises still ends with STOP, and stops every stage."""
+    failure = Failure((KeyError,))
+    in_queue, out_queue = Queue(), Queue()
+    stage = start_stage(lambda x: [x], in_queue, out_queue, failure=failure)
+
+    def items():
+        yield 1
+        raise ConnectionError("feed")
+
+    with pytest.raises(ConnectionError):
+        feed_queue(items(), in_queue, failure)
+    stage.join()
+    assert isinstance(failure.error, ConnectionError)
+    assert drain_queue(out_queue) in ([], [1])
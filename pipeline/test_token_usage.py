@@ -0,0 +1,112 @@
+# pylint: skip-file
+
+"""Tests for recording & reporting GPT-API token usage."""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from token_usage import (
+    SUMMARY_STAGE,
+    insert_token_usage,
+    get_remaining_budget,
+    get_cost,
+    get_run_rollups,
+    format_rollups
+)
+
+
+def make_conn(*rows):
+    """Returns a connection whose cursor fetches `rows`."""
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = rows[0] if rows else None
+    cur.fetchall.return_value = list(rows)
+    return conn, cur
+
+
+def make_rollup(**overrides):
+    row = {"run_id": 7, "started_at": datetime(2025, 10, 1, 9, 30), "token_budget": 50000,
+           "stage": SUMMARY_STAGE, "model": "gpt-4.1-nano-2025-04-14", "requests": 2,
+           "input_tokens": 1_000_000, "output_tokens": 500_000, "total_tokens": 1_500_000}
+    row.update(overrides)
+    return row
+
+
+def test_insert_token_usage():
+    """Check a row is inserted per request, tagged with its run & stage, and committed."""
+    conn, cur = make_conn()
+    token_summary = [{"custom_id": "[2025] UKSC 1", "model": "gpt-4.1-nano",
+                      "input_tokens": 100, "output_tokens": 20, "total_request_tokens": 120}]
+    with patch("token_usage.execute_values") as execute_values:
+        insert_token_usage(conn, 7, SUMMARY_STAGE, token_summary)
+    execute_values.assert_called_once()
+    assert execute_values.call_args.args[0] is cur
+    assert "INSERT INTO token_usage" in execute_values.call_args.args[1]
+    assert execute_values.call_args.args[2] == [
+        (7, "[2025] UKSC 1", SUMMARY_STAGE, "gpt-4.1-nano", 100, 20, 120)]
+    conn.commit.assert_called_once()
+
+
+def test_insert_token_usage_nothing_to_record():
+    """Check an empty batch doesn't touch the DB."""
+    conn, _ = make_conn()
+    insert_token_usage(conn, 7, SUMMARY_STAGE, [])
+    conn.cursor.assert_not_called()
+
+
+@pytest.mark.parametrize("used, expected", [(30000, 20000), (60000, 0)])
+def test_get_remaining_budget(used, expected):
+    """Check the remaining budget is what the run hasn't used, and never negative."""
+    conn, cur = make_conn({"total": used})
+    assert get_remaining_budget(conn, 7, 50000) == expected
+    assert cur.execute.call_args.args[1] == (7,)
+
+
+def test_get_remaining_budget_without_budget():
+    """Check a run without a budget has no limit, and the DB isn't queried."""
+    conn, _ = make_conn()
+    assert get_remaining_budget(conn, 7, None) is None
+    conn.cursor.assert_not_called()
+
+
+@pytest.mark.parametrize("model, expected", [
+    ("gpt-4.1-nano", 0.15),
+    ("gpt-4.1-nano-2025-04-14", 0.15),
+    ("gpt-4.1-2025-04-14", 3.00),
+    ("gpt-5-turbo", None)
+])
+def test_get_cost(model, expected):
+    """Check costs use the model's (or its snapshot's) prices, at the Batch API discount."""
+    cost = get_cost(model, 1_000_000, 500_000)
+    if expected is None:
+        assert cost is None
+    else:
+        assert cost == pytest.approx(expected)
+
+
+def test_get_run_rollups_adds_cost():
+    """Check each rollup is costed, and runs which used no tokens cost nothing."""
+    conn, cur = make_conn(
+        make_rollup(),
+        make_rollup(run_id=6, stage=None, model=None, requests=0,
+                    input_tokens=0, output_tokens=0, total_tokens=0))
+    rollups = get_run_rollups(conn, 2)
+    assert cur.execute.call_args.args[1] == (2,)
+    assert rollups[0]["cost"] == pytest.approx(0.15)
+    assert rollups[1]["cost"] == 0
+
+
+def test_format_rollups():
+    """Check the report has a row per rollup, with its cost and '-' for anything missing."""
+    report = format_rollups([
+        make_rollup(cost=0.15),
+        make_rollup(run_id=6, token_budget=None, model="gpt-5-turbo", cost=None)
+    ]).splitlines()
+    assert "cost" in report[0]
+    assert len(report) == 4
+    assert report[2].split() == ["7", "2025-10-01", "09:30:00", "summary",
+                                 "gpt-4.1-nano-2025-04-14", "2", "1000000", "500000",
+                                 "1500000", "$0.1500", "50000"]
+    assert report[3].split()[-2:] == ["?", "-"]
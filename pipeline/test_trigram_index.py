@@ -0,0 +1,41 @@
+# pylint: skip-file
+
+"""Tests for the in-memory trigram index."""
+
+import pytest
+
+from trigram_index import TrigramIndex, get_trigrams, get_similarity
+
+
+def test_get_trigrams_pads_each_word():
+    """Check words are lower-cased & padded as pg_trgm does."""
+    assert get_trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert get_trigrams("a-b") == {"  a", " a ", "  b", " b "}
+
+
+def test_similarity_matches_pg_trgm():
+    """Check scores match pg_trgm's similarity() for the same strings."""
+    assert get_similarity("briggs", "briggs") == 1
+    assert get_similarity("brigs", "briggs") == pytest.approx(5 / 8)
+    assert get_similarity("lewis", "lewison") == pytest.approx(5 / 9)
+    assert get_similarity("", "briggs") == 0
+
+
+def test_search_ranks_closest_first():
+    """Check only matches above the threshold are returned, most similar first."""
+    index = TrigramIndex()
+    index.add(1, "Briggs")
+    index.add(2, "Brigstocke")
+    index.add(3, "Hale")
+    assert [key for key, _ in index.search("Brigs", threshold=0.3)] == [1, 2]
+    assert index.search("Brigs", threshold=0.6) == [(1, pytest.approx(5 / 8))]
+
+
+def test_add_replaces_and_remove():
+    """Check re-adding a key replaces its text, and removed keys aren't found."""
+    index = TrigramIndex()
+    index.add(1, "Briggs")
+    index.add(1, "Hale")
+    assert index.search("Briggs") == []
+    index.remove(1)
+    assert index.search("Hale") == [] and len(index) == 0
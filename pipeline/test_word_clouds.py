@@ -0,0 +1,34 @@
+# pylint: skip-file
+
+"""Tests for rendering judges' word clouds."""
+
+from unittest.mock import MagicMock, patch
+
+from word_clouds import (GOLDS, HIGHLIGHTS, get_word_colour, get_term_frequencies,
+                         render_word_cloud, update_word_clouds)
+
+
+def test_get_word_colour_is_deterministic():
+    """Check words are coloured from their palette, the same way every time."""
+    assert get_word_colour("Court") in GOLDS
+    assert get_word_colour("appeal") in HIGHLIGHTS
+    assert get_word_colour("appeal", font_size=10) == get_word_colour("Appeal")
+
+
+def test_render_word_cloud_is_stable():
+    """Check the same words always render the same PNG."""
+    frequencies = get_term_frequencies("The court allowed the appeal. The appeal was allowed.")
+    png = render_word_cloud(frequencies)
+    assert png.startswith(b"\x89PNG")
+    assert png == render_word_cloud(frequencies)
+
+
+def test_update_word_clouds_skips_judges_without_words():
+    """Check judges whose summaries are empty (or only stopwords) get no word cloud."""
+    conn = MagicMock()
+    with patch("word_clouds.get_summaries", side_effect=["", "the court allowed the appeal"]), \
+            patch("word_clouds.render_word_cloud", return_value=b"png"), \
+            patch("word_clouds.save_word_cloud") as mock_save:
+        assert update_word_clouds(conn, {1, 2}) == 1
+    mock_save.assert_called_once()
+    assert mock_save.call_args.args[1] == 2
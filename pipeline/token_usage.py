@@ -0,0 +1,164 @@
+"""Records GPT-API token usage per citation, stage and model, and reports per-run rollups
+with their cost."""
+
+import argparse
+import logging
+from typing import Optional
+
+from psycopg2.extensions import connection
+from psycopg2.extras import RealDictCursor, execute_values
+
+import db_pool
+
+HEADINGS_STAGE = "headings"
+SUMMARY_STAGE = "summary"
+
+# Standard USD prices per million input & output tokens (update them when OpenAI's change).
+# Every request goes through the Batch API, which charges `BATCH_DISCOUNT` of them.
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+BATCH_DISCOUNT = 0.5
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def create_run(conn: connection, token_budget: Optional[int] = None) -> int:
+    """Inserts a new pipeline run and returns its id."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+        INSERT INTO pipeline_run (token_budget)
+        VALUES (%s)
+        RETURNING run_id;
+        """
+        cur.execute(query, (token_budget,))
+        run_id = cur.fetchone()['run_id']
+        conn.commit()
+    logging.info("Started pipeline run %s", run_id)
+    return run_id
+
+
+def insert_token_usage(conn: connection, run_id: int, stage: str,
+                       token_summary: list[dict]) -> None:
+    """Inserts the per-request token usage of a batch for the given run and stage."""
+    if not token_summary:
+        return
+
+    rows = [(run_id, item['custom_id'], stage, item['model'], item['input_tokens'],
+             item['output_tokens'], item['total_request_tokens'])
+            for item in token_summary]
+    with conn.cursor() as cur:
+        query = """
+        INSERT INTO token_usage
+        (run_id, hearing_citation, stage, model, input_tokens, output_tokens, total_tokens)
+        VALUES %s;
+        """
+        execute_values(cur, query, rows)
+        conn.commit()
+    logging.info("Recorded %s token usage rows for run %s (%s)",
+                 len(rows), run_id, stage)
+
+
+def get_run_total_tokens(conn: connection, run_id: int) -> int:
+    """Returns the total tokens used so far by a run."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+        SELECT COALESCE(SUM(total_tokens), 0) AS total
+        FROM token_usage
+        WHERE run_id = %s;
+        """
+        cur.execute(query, (run_id,))
+        return cur.fetchone()['total']
+
+
+def get_remaining_budget(conn: connection, run_id: int,
+                         token_budget: Optional[int]) -> Optional[int]:
+    """Returns how many tokens a run may still use, or None if the run has no budget."""
+    if token_budget is None:
+        return None
+    return max(token_budget - get_run_total_tokens(conn, run_id), 0)
+
+
+def get_model_prices(model: Optional[str]) -> Optional[tuple[float, float]]:
+    """Returns the standard prices of `model` per million input & output tokens, or None if
+    they're unknown. Dated snapshots (e.g. `gpt-4.1-nano-2025-04-14`) have their model's."""
+    return next((prices for name, prices in MODEL_PRICES.items()
+                 if model and (model == name or model.startswith(f"{name}-2"))), None)
+
+
+def get_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Returns what the tokens cost in USD at Batch API prices, or None if the model's prices
+    are unknown."""
+    prices = get_model_prices(model)
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    return (input_tokens * input_price + output_tokens * output_price) \
+        * BATCH_DISCOUNT / 1_000_000
+
+
+def get_run_rollups(conn: connection, number_of_runs: int = 10) -> list[dict]:
+    """Returns token usage rolled up by run, stage and model for the most recent runs, with
+    its cost in USD (None for models without prices, 0 for runs which used no tokens)."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        query = """
+        SELECT
+            r.run_id,
+            r.started_at,
+            r.token_budget,
+            t.stage,
+            t.model,
+            COUNT(t.token_usage_id) AS requests,
+            COALESCE(SUM(t.input_tokens), 0) AS input_tokens,
+            COALESCE(SUM(t.output_tokens), 0) AS output_tokens,
+            COALESCE(SUM(t.total_tokens), 0) AS total_tokens
+        FROM (
+            SELECT * FROM pipeline_run
+            ORDER BY run_id DESC
+            LIMIT %s
+        ) r
+        LEFT JOIN token_usage t USING (run_id)
+        GROUP BY r.run_id, r.started_at, r.token_budget, t.stage, t.model
+        ORDER BY r.run_id DESC, t.stage;
+        """
+        cur.execute(query, (number_of_runs,))
+        rollups = cur.fetchall()
+    for row in rollups:
+        row['cost'] = get_cost(row['model'], row['input_tokens'], row['output_tokens']) \
+            if row['model'] else 0.0
+    return rollups
+
+
+def format_rollups(rollups: list[dict]) -> str:
+    """Formats run rollups as a plain text table."""
+    header = f"{'run':>6} {'started':<19} {'stage':<10} {'model':<24} " \
+        f"{'requests':>8} {'input':>10} {'output':>10} {'total':>10} {'cost':>10} {'budget':>10}"
+    lines = [header, "-" * len(header)]
+    for row in rollups:
+        started = row['started_at'].strftime("%Y-%m-%d %H:%M:%S") if row['started_at'] else ""
+        cost = f"${row['cost']:.4f}" if row['cost'] is not None else "?"
+        lines.append(
+            f"{row['run_id']:>6} {started:<19} {row['stage'] or '-':<10} {row['model'] or '-':<24} "
+            f"{row['requests']:>8} {row['input_tokens']:>10} {row['output_tokens']:>10} "
+            f"{row['total_tokens']:>10} {cost:>10} {row['token_budget'] or '-':>10}")
+    return "\n".join(lines)
+
+
+def get_args() -> argparse.Namespace:
+    """Sets up CLI arguments."""
+    parser = argparse.ArgumentParser(
+        description="Report GPT-API token usage for recent pipeline runs.")
+    parser.add_argument("-r", "--runs", type=int, default=10,
+                        help="Number of most recent runs to report (default 10).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with db_pool.pooled_connection() as db_conn:
+        print(format_rollups(get_run_rollups(db_conn, args.runs)))
@@ -0,0 +1,67 @@
+"""An in-memory trigram index for fuzzy name matching,
+scoring matches as pg_trgm's `similarity()` does.
+
+Used to match judge names when the DB doesn't have the pg_trgm extension.
+"""
+
+import re
+from collections import defaultdict
+from typing import Hashable
+
+
+def get_trigrams(text: str) -> set[str]:
+    """Returns the trigrams of each word in `text`
+    (lower-cased, padded with two spaces before & one after)."""
+    trigrams = set()
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def get_similarity(first: str, second: str) -> float:
+    """Returns the share of their trigrams two strings have in common, from 0 to 1."""
+    return get_trigram_similarity(get_trigrams(first), get_trigrams(second))
+
+
+def get_trigram_similarity(first: set[str], second: set[str]) -> float:
+    """Returns the share of two sets of trigrams in common, from 0 to 1."""
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+class TrigramIndex:
+    """Finds the keys whose text is most similar to a search, looking up candidates by trigram."""
+
+    def __init__(self):
+        self.trigrams = {}
+        self.keys_by_trigram = defaultdict(set)
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Indexes `text` under `key`, replacing any text already indexed under it."""
+        self.remove(key)
+        trigrams = get_trigrams(text)
+        self.trigrams[key] = trigrams
+        for trigram in trigrams:
+            self.keys_by_trigram[trigram].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Removes `key` from the index, if it's in it."""
+        for trigram in self.trigrams.pop(key, ()):
+            self.keys_by_trigram[trigram].discard(key)
+
+    def search(self, text: str, threshold: float = 0.3,
+               limit: int = 10) -> list[tuple[Hashable, float]]:
+        """Returns up to `limit` (key, similarity) pairs at least `threshold` similar to `text`,
+        most similar first."""
+        trigrams = get_trigrams(text)
+        candidates = set().union(*(self.keys_by_trigram.get(trigram, ()) for trigram in trigrams))
+        matches = [(key, get_trigram_similarity(trigrams, self.trigrams[key]))
+                   for key in candidates]
+        matches = [match for match in matches if match[1] >= threshold]
+        return sorted(matches, key=lambda match: -match[1])[:limit]
+
+    def __len__(self) -> int:
+        return len(self.trigrams)
@@ -0,0 +1,136 @@
+"""Renders word clouds of judges' hearing summaries, for the dashboard's Judge Details page.
+
+After each run, the word clouds of the judges of the hearings it loaded are re-rendered and
+stored, with their term frequencies, in the `judge_word_cloud` table, so the dashboard only
+fetches their PNGs. Words are coloured & laid out deterministically, so a judge's word cloud
+only changes when their hearings do.
+"""
+
+import argparse
+import io
+import json
+import logging
+import zlib
+
+from psycopg2.extensions import connection
+from wordcloud import WordCloud
+
+from db_pool import pooled_connection
+
+# The dashboard's palette: golds for words about courts, accents for words about law
+GOLDS = ["#b29758", "#a38c64", "#d4b06a", "#f0d890"]
+HIGHLIGHTS = ["#e0e0e0", "#cfcfcf", "#ffffff", "#027F8B"]
+ACCENTS = ["#c7a15a", "#c4b37b", "#a59162"]
+
+BACKGROUND_COLOUR = "#212838"
+WIDTH = 1000
+HEIGHT = 500
+# Seeds the layout, so the same words are always placed the same way
+RANDOM_STATE = 0
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def get_word_colour(word: str, **_) -> str:
+    """Returns the palette colour of `word`, which is always the same for the same word."""
+    word = word.lower()
+    if "data" in word or "court" in word:
+        palette = GOLDS
+    elif "law" in word or "rights" in word:
+        palette = ACCENTS
+    else:
+        palette = HIGHLIGHTS
+    # Unlike hash(), crc32 isn't salted per process
+    return palette[zlib.crc32(word.encode("utf-8")) % len(palette)]
+
+
+def get_word_cloud() -> WordCloud:
+    """Returns a word cloud in the dashboard's style."""
+    return WordCloud(background_color=BACKGROUND_COLOUR,
+                     color_func=get_word_colour,
+                     height=HEIGHT,
+                     width=WIDTH,
+                     random_state=RANDOM_STATE)
+
+
+def get_term_frequencies(text: str) -> dict[str, int]:
+    """Returns how often each word (other than stopwords) appears in `text`."""
+    return get_word_cloud().process_text(text)
+
+
+def render_word_cloud(frequencies: dict[str, int]) -> bytes:
+    """Returns a word cloud of `frequencies` as a PNG."""
+    image = get_word_cloud().generate_from_frequencies(frequencies).to_image()
+    png = io.BytesIO()
+    image.save(png, format="PNG")
+    return png.getvalue()
+
+
+def get_summaries(conn: connection, judge_id: int) -> str:
+    """Returns the summaries of every hearing a judge has sat, joined into one text."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT string_agg(h.hearing_description, ' ')
+            FROM judge_hearing jh
+            JOIN hearing h USING (hearing_id, hearing_date)
+            WHERE jh.judge_id = %s;
+        """, (judge_id,))
+        summaries = cur.fetchone()[0]
+    conn.commit()
+    return summaries or ""
+
+
+def save_word_cloud(conn: connection, judge_id: int, frequencies: dict[str, int],
+                    png: bytes) -> None:
+    """Stores a judge's word cloud, replacing any they had."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO judge_word_cloud (judge_id, term_frequencies, word_cloud_png)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (judge_id) DO UPDATE
+            SET term_frequencies = EXCLUDED.term_frequencies,
+                word_cloud_png = EXCLUDED.word_cloud_png,
+                updated_at = CURRENT_TIMESTAMP;
+        """, (judge_id, json.dumps(frequencies), png))
+    conn.commit()
+
+
+def update_word_clouds(conn: connection, judge_ids: set[int]) -> int:
+    """Re-renders & stores the word clouds of `judge_ids`, returning how many were stored.
+
+    Judges whose summaries have no words other than stopwords are skipped."""
+    updated = 0
+    for judge_id in sorted(judge_ids):
+        frequencies = get_term_frequencies(get_summaries(conn, judge_id))
+        if not frequencies:
+            continue
+        save_word_cloud(conn, judge_id, frequencies, render_word_cloud(frequencies))
+        updated += 1
+    logging.info("Rendered %s judge word clouds", updated)
+    return updated
+
+
+def get_all_judge_ids(conn: connection) -> set[int]:
+    """Returns every judge who has sat a hearing."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT DISTINCT judge_id FROM judge_hearing;")
+        judge_ids = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return judge_ids
+
+
+def get_args() -> argparse.Namespace:
+    """Sets up CLI arguments."""
+    parser = argparse.ArgumentParser(description="Render judges' word clouds.")
+    parser.add_argument("judge_ids", nargs="*", type=int,
+                        help="The judges whose word clouds to render.")
+    parser.add_argument("--all", action="store_true",
+                        help="Render the word clouds of every judge who has sat a hearing.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with pooled_connection() as db_conn:
+        update_word_clouds(db_conn, get_all_judge_ids(db_conn) if args.all else set(args.judge_ids))
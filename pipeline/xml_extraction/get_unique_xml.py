@@ -1,29 +1,16 @@
 # pylint: skip-file
 
-from os import environ as ENV
-
-import psycopg2
-from psycopg2.extensions import connection
-from psycopg2.errors import Error
 from dotenv import load_dotenv
+from psycopg2.extensions import connection
 
+import db_pool
 from case_fetcher import case_fetcher
 from xml_extraction import metadata_xml
 
 
 def get_db_connection() -> connection:
-    """Return a connection to a PostgreSQL database."""
-    load_dotenv()
-    try:
-        return psycopg2.connect(
-            dbname=ENV["DB_NAME"],
-            host=ENV["DB_HOST"],
-            port=ENV["DB_PORT"],
-            user=ENV["DB_USERNAME"],
-            password=ENV["DB_PASSWORD"]
-        )
-    except Error as e:
-        raise ConnectionError(f"Connection to {ENV['DB_NAME']} failed") from e
+    """Return a connection to a PostgreSQL database from the shared pool."""
+    return db_pool.get_connection()
 
 
 def get_xml_strings(per_page: int = 20) -> list[str]:
@@ -37,9 +24,13 @@ def get_xml_strings(per_page: int = 20) -> list[str]:
 def is_xml_unique(xml_string: str, conn: connection) -> bool:
     """Identifies `xml_string` by its citation, and checks if it's already in DB."""
     citation = metadata_xml.get_metadata(xml_string)["citation"]
+    return is_citation_unique(citation, conn)
+
 
+def is_citation_unique(citation: str, conn: connection) -> bool:
+    """Checks if a hearing with `citation` is already in DB."""
     query = """
-    SELECT * FROM hearing
+    SELECT 1 FROM hearing_citation
     WHERE hearing_citation=%s
     """
     with conn.cursor() as cur:
@@ -60,5 +51,5 @@ if __name__ == "__main__":
         db_conn = get_db_connection()
         unique_xmls = get_unique_xmls(db_conn)
     finally:
-        # ensure that connection is always closed
-        db_conn.close()
+        # ensure that connection is always returned to the pool
+        db_pool.release_connection(db_conn)
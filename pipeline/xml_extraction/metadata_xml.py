@@ -15,72 +15,79 @@ NS_MAPPING = {
 }
 
 
+# Compiled once, and scoped to the <meta> element rather than searching the whole document
+META_XPATH = etree.XPath("/n:akomaNtoso/*/n:meta", namespaces=NS_MAPPING)
+URL_XPATH = etree.XPath(
+    "n:identification/n:FRBRExpression/n:FRBRthis/@value", namespaces=NS_MAPPING)
+DATE_XPATH = etree.XPath(
+    "n:identification/n:FRBRExpression/n:FRBRdate/@date", namespaces=NS_MAPPING)
+# When the XML was first published by The National Archives
+PUBLISHED_DATE_XPATH = etree.XPath(
+    "n:identification/n:FRBRManifestation/n:FRBRdate/@date", namespaces=NS_MAPPING)
+NAME_XPATH = etree.XPath(
+    "n:identification/n:FRBRWork/n:FRBRname/@value", namespaces=NS_MAPPING)
+CITATION_XPATH = etree.XPath("n:proprietary/nuk:cite", namespaces=NS_MAPPING)
+# tna (The National Archives) is also listed as an org, so we need to filter it
+COURT_XPATH = etree.XPath(
+    "n:references/n:TLCOrganization[not(@eId = 'tna')]/@showAs", namespaces=NS_MAPPING)
+# Parties have an empty href, judges link to their page
+JUDGES_XPATH = etree.XPath(
+    "n:references/n:TLCPerson[not(@href = '')]/@showAs", namespaces=NS_MAPPING)
+JUDGE_ROLE_PATTERN = re.compile(r"\(.*\)")
+
+
+def get_first(xpath: etree.XPath, meta: "etree._Element"):
+    """Returns the first result of `xpath` on `meta`, or None if there isn't one."""
+    results = xpath(meta)
+    return results[0] if results else None
+
+
 def get_case_url(meta: "etree._Element") -> Optional[str]:
     """Returns case hearing URL from metadata."""
-    xpath = "//n:FRBRExpression//n:FRBRthis"
-    url_element = meta.xpath(xpath, namespaces=NS_MAPPING)
-    if url_element:
-        url_element = url_element[0]
-    else:
-        # return None if metadata can't be found
-        return None
-    return url_element.get("value")
+    url = get_first(URL_XPATH, meta)
+    return str(url) if url is not None else None
 
 
 def get_case_judgement_date(meta: "etree._Element") -> Optional[datetime]:
     """Returns the date when judgement was handed down from metadata."""
-    xpath = "//n:FRBRExpression//n:FRBRdate"
-    date_element = meta.xpath(xpath, namespaces=NS_MAPPING)
-    if date_element:
-        date_element = date_element[0]
-    else:
+    date_str = get_first(DATE_XPATH, meta)
+    if date_str is None:
         return None
-    date_str = date_element.get("date")
     return datetime.strptime(date_str, "%Y-%m-%d")
 
 
+def get_case_published_date(meta: "etree._Element") -> Optional[datetime]:
+    """Returns the date when the transcript was published from metadata."""
+    date_str = get_first(PUBLISHED_DATE_XPATH, meta)
+    if date_str is None:
+        return None
+    return datetime.strptime(date_str[:10], "%Y-%m-%d")
+
+
 def get_case_citation(meta: "etree._Element") -> Optional[str]:
     """Returns the neutral citation, which can be used as a unique identifier."""
-    xpath = "//nuk:cite"
-    cite_element = meta.xpath(xpath, namespaces=NS_MAPPING)
-    if cite_element:
-        cite_element = cite_element[0]
-    else:
+    cite_element = get_first(CITATION_XPATH, meta)
+    if cite_element is None:
         return None
     return cite_element.text
 
 
 def get_case_name(meta: "etree._Element") -> Optional[str]:
     """Returns the title given to the case hearing."""
-    xpath = "//n:FRBRWork//n:FRBRname"
-    name_element = meta.xpath(xpath, namespaces=NS_MAPPING)
-    if name_element:
-        name_element = name_element[0]
-    else:
-        return None
-    return name_element.get("value")
+    name = get_first(NAME_XPATH, meta)
+    return str(name) if name is not None else None
 
 
 def get_court_name(meta: "etree._Element") -> Optional[str]:
     """Returns the name of the institution/court where the hearing took place."""
-    xpath = "//n:TLCOrganization"
-    org_element = meta.xpath(xpath, namespaces=NS_MAPPING)
-    # tna (The National Archives) is also listed as an org, so we need to filter it
-    org_element = list(filter(lambda e: e.get("eId") != "tna", org_element))
-    if org_element:
-        org_element = org_element[0]
-    else:
-        return None
-    return org_element.get("showAs")
+    court = get_first(COURT_XPATH, meta)
+    return str(court) if court is not None else None
 
 
-def get_judges(root: etree._Element) -> Optional[list[str]]:
+def get_judges(meta: "etree._Element") -> Optional[list[str]]:
     """Returns a list of the judges who sat the hearing."""
-    pattern = re.compile(r"\(.*\)")
-    people = root.xpath("//n:TLCPerson", namespaces=NS_MAPPING)
-    judges = [person.get("showAs")
-              for person in people if person.get("href") != ""]
-    judges = [pattern.sub('', judge).strip().title() for judge in judges]
+    judges = [JUDGE_ROLE_PATTERN.sub('', judge).strip().title()
+              for judge in JUDGES_XPATH(meta)]
     return judges if judges else None
 
 
@@ -91,7 +98,8 @@ def get_metadata(xml_string: str) -> dict:
 
     `title` (`str`): The title of the hearing.
     `citation` (`str`): Neutral citation; can be used as unique identifier.
-    `verdict_date` (`datetime`): The date when judgement was handed down.
+    `verdict_date` (`datetime`): The date when judgement was handed down, or if the
+    transcript doesn't give one, the date it was published.
     `court` (`str`): The name of the court where the hearing took place.
     `url` (`str`): A URL to the hearing transcript page.
     `judges` (`list[str]`): List of judges who sat the hearing.
@@ -100,15 +108,14 @@ def get_metadata(xml_string: str) -> dict:
         raise TypeError("xml_string must be a str type")
 
     root = etree.fromstring(xml_string.encode("utf-8"))
-    try:
-        meta = root.xpath("//n:meta", namespaces=NS_MAPPING)[0]
-    except IndexError as e:
-        raise KeyError("xml_string has no meta element") from e
+    meta = get_first(META_XPATH, root)
+    if meta is None:
+        raise KeyError("xml_string has no meta element")
 
     metadata = {
         "title": get_case_name(meta),
         "citation": get_case_citation(meta),
-        "verdict_date": get_case_judgement_date(meta),
+        "verdict_date": get_case_judgement_date(meta) or get_case_published_date(meta),
         "court": get_court_name(meta),
         "url": get_case_url(meta),
         "judges": get_judges(meta)
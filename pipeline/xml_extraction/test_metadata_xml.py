@@ -11,6 +11,7 @@ from metadata_xml import (
     get_case_name,
     get_case_citation,
     get_case_judgement_date,
+    get_case_published_date,
     get_court_name,
     get_case_url,
     get_judges,
@@ -69,6 +70,20 @@ def test_get_case_judgement_date_correct_citation(xml_metadata):
     assert date == real_date
 
 
+def test_get_case_published_date(xml_metadata):
+    """Check the published date is the day the transcript was first published."""
+    root = etree.fromstring(xml_metadata)
+    meta = root.xpath("//n:meta", namespaces=NS_MAPPING)[0]
+    assert get_case_published_date(meta) == datetime(year=2025, month=9, day=30)
+
+
+def test_get_metadata_falls_back_to_published_date(xml_metadata):
+    """Check a transcript without a judgement date is dated by when it was published."""
+    xml = xml_metadata.decode("utf-8").replace('<FRBRdate date="2025-09-30" name="judgment"/>', "")
+    xml = xml.replace('date="2025-09-30T10:06:38"', 'date="2025-10-02T10:06:38"')
+    assert get_metadata(xml)["verdict_date"] == datetime(year=2025, month=10, day=2)
+
+
 def test_get_court_name_correct_type(xml_metadata):
     """Test court name is string."""
     root = etree.fromstring(xml_metadata)
@@ -147,3 +162,19 @@ def test_get_metadata_dict_has_correct_keys(xml_metadata):
     metadata = get_metadata(xml_metadata.decode("utf-8"))
     assert list(metadata.keys()) == ['title', 'citation', 'verdict_date',
                                      'court', 'url', 'judges']
+
+
+def test_get_metadata_rejects_xml_without_meta():
+    """Test get metadata raises a KeyError if there's no meta element."""
+    with pytest.raises(KeyError):
+        get_metadata('<akomaNtoso xmlns="http://docs.oasis-open.org/legaldocml/ns/akn/3.0">'
+                     '<judgment name="judgment"></judgment></akomaNtoso>')
+
+
+def test_get_metadata_ignores_body(xml_metadata):
+    """Test metadata is only read from meta, not from references in the judgment body."""
+    xml = xml_metadata.decode("utf-8").replace(
+        "</meta>",
+        '</meta><judgmentBody><references><TLCPerson href="/judge-x" showAs="Lord X"/>'
+        '</references></judgmentBody>')
+    assert "Lord X" not in get_metadata(xml)["judges"]